@@ -1,8 +1,8 @@
+import importlib
 import streamlit as st
+import pandas as pd
 from database import DatabaseManager
-from prediction import SalesPredictor as StockPredictor
-from app_pages import dashboard as page_dashboard, products as page_products, sales as page_sales, prediction as page_prediction, reports as page_reports
-from app_pages import users as page_users
+from config import ACTIVE_CONFIG
 
 #Page config
 st.set_page_config(
@@ -21,20 +21,43 @@ try:
 except:
     pass
 
-DB_CACHE_VERSION = 2
+DB_CACHE_VERSION = 6
 
 @st.cache_resource
 def init_database(_version: int = DB_CACHE_VERSION):
     db = DatabaseManager()
     db.create_database_and_tables()
+    db.run_migrations()
+    if ACTIVE_CONFIG.get('table_version_triggers'):
+        db.install_table_version_triggers()
     return db
 
+# Predictor, job restock dan pool prediksi (beserta modulnya) baru dibuat saat
+# halaman yang memakainya dibuka, bukan saat aplikasi start
 @st.cache_resource
 def init_predictor(_db):
-    return StockPredictor(_db)
+    from prediction import SalesPredictor
+    from model_registry import DiskModelStore
+    # Model dari disk dimuat per produk saat pertama kali diminta
+    return SalesPredictor(_db, store=DiskModelStore(ACTIVE_CONFIG.get('model_dir', 'models')))
+
+@st.cache_resource
+def init_restock_job(_predictor):
+    from restock_job import RestockJob
+    # Satu job latar untuk semua sesi; snapshot dibaca dari database
+    job = RestockJob(_predictor)
+    job.start_schedule()
+    return job
+
+@st.cache_resource
+def init_forecast_executor(_predictor):
+    from forecast_jobs import ForecastExecutor
+    # Satu pool untuk semua sesi; produk yang sama dihitung sekali
+    return ForecastExecutor(_predictor)
 
 db = init_database(DB_CACHE_VERSION)
-predictor = init_predictor(db)
+# Satu query ringan per rerun: buang cache/model untuk tabel yang berubah
+db.poll_table_versions()
 
 if 'logged_in' not in st.session_state:
     st.session_state.logged_in = False
@@ -133,54 +156,110 @@ def logout():
     st.session_state.user = None
     st.rerun()
 
+# Modul halaman (beserta st_aggrid/plotly) baru diimport saat halaman pertama kali dibuka
+PAGES = {
+    "Dashboard": "app_pages.dashboard",
+    "Data Produk": "app_pages.products",
+    "Data Penjualan": "app_pages.sales",
+    "Prediksi Penjualan": "app_pages.prediction",
+    "Laporan": "app_pages.reports",
+    "Kelola User": "app_pages.users",
+    "Performa": "app_pages.performance",
+}
+
+def load_page(name):
+    return importlib.import_module(PAGES[name])
+
 def dashboard_page():
-    page_dashboard.render(db)
+    load_page("Dashboard").render(db)
 
 def products_page():
-    page_products.render(db)
+    load_page("Data Produk").render(db)
 
 def sales_page():
-    page_sales.render(db)
+    load_page("Data Penjualan").render(db)
 
 def prediction_page():
-    page_prediction.render(db, predictor)
+    predictor = init_predictor(db)
+    load_page("Prediksi Penjualan").render(db, predictor, init_restock_job(predictor), init_forecast_executor(predictor))
 
 def reports_page():
-    page_reports.render(db)
+    load_page("Laporan").render(db)
+
+def users_page():
+    load_page("Kelola User").render(db)
+
+def performance_page():
+    load_page("Performa").render(db)
 
 def settings_page():
+    import importer
+
     st.header("Pengaturan")
     
     tab1, tab2 = st.tabs(["Import Data", "Pengaturan Sistem"])
     
     with tab1:
-        st.subheader("Import Data dari Excel")
+        st.subheader("Import Data dari Excel/CSV")
+
+        stats = st.session_state.pop("import_stats", None)
+        if stats:
+            st.success(f"Data berhasil diimport! {stats['rows']:,} baris dalam {stats['seconds']:.2f} detik")
+            if stats.get('resumed_from'):
+                st.info(f"Dilanjutkan dari checkpoint baris {stats['resumed_from']:,}")
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Baris/detik", f"{stats['rows_per_sec']:,.0f}")
+            col2.metric("Produk Baru", stats['new_products'])
+            col3.metric("Baris Dilewati", stats['skipped'])
+            if stats.get('unmatched'):
+                st.warning("Produk berikut tidak ditemukan di database dan barisnya dilewati:")
+                st.dataframe(
+                    pd.DataFrame(stats['unmatched'], columns=['Produk', 'Varian', 'Baris']),
+                    use_container_width=True,
+                    hide_index=True,
+                )
+            st.dataframe(
+                pd.DataFrame(list(stats['stages'].items()), columns=['Tahap', 'Durasi (detik)']),
+                use_container_width=True,
+                hide_index=True,
+            )
         
         uploaded_file = st.file_uploader(
-            "Pilih file Excel",
-            type=['xlsx', 'xls'],
-            help="Upload file Excel dengan kolom: Tanggal, Produk, Varian, Jumlah, Jenis, Harga"
+            "Pilih file Excel atau CSV",
+            type=['xlsx', 'xls', 'csv'],
+            help="Upload file Excel/CSV dengan kolom: Tanggal, Produk, Varian, Jumlah, Jenis, Harga"
         )
         
         if uploaded_file is not None:
             try:
-                df = pd.read_excel(uploaded_file)
+                df = importer.read_preview(uploaded_file, uploaded_file.name, 5)
                 st.subheader("Preview Data:")
-                st.dataframe(df.head())
+                st.dataframe(df)
                 
-                required_columns = ['Tanggal', 'Produk', 'Varian', 'Jumlah', 'Jenis', 'Harga']
-                missing_columns = [col for col in required_columns if col not in df.columns]
+                missing_columns = [col for col in importer.IMPORT_COLUMNS if col not in df.columns]
                 
                 if missing_columns:
                     st.error(f"Kolom yang hilang: {missing_columns}")
                 else:
+                    rows_done = db.get_import_checkpoint(importer.file_fingerprint(uploaded_file))
+                    if rows_done:
+                        st.info(f"Import file ini sebelumnya berhenti di baris {rows_done:,}. Import akan dilanjutkan dari baris tersebut.")
+
                     if st.button("Import Data"):
-                        with st.spinner("Mengimport data..."):
-                            if db.import_excel_data(uploaded_file):
-                                st.success("Data berhasil diimport!")
-                                st.rerun()
+                        progress_bar = st.progress(0.0, text="Mengimport data...")
+
+                        def on_progress(done, total):
+                            if total:
+                                progress_bar.progress(min(done / total, 1.0), text=f"Mengimport data... {done:,}/{total:,} baris")
                             else:
-                                st.error("Gagal mengimport data!")
+                                progress_bar.progress(0.0, text=f"Mengimport data... {done:,} baris")
+
+                        stats = db.import_excel_data(uploaded_file, uploaded_file.name, progress=on_progress)
+                        if stats:
+                            st.session_state["import_stats"] = stats
+                            st.rerun()
+                        else:
+                            st.error("Gagal mengimport data! Unggah ulang file yang sama untuk melanjutkan dari checkpoint terakhir.")
             
             except Exception as e:
                 st.error(f"Error membaca file: {str(e)}")
@@ -188,11 +267,59 @@ def settings_page():
     with tab2:
         st.subheader("Pengaturan Sistem")
         
-        st.info("Database: MySQL - stok_material_db")
+        st.info(f"Database: {db.backend.label}")
         st.info("Default Admin: username: admin, password: admin123")
         
         if st.session_state.user and st.session_state.user['role'] == 'admin':
             st.warning("Admin Functions")
+
+            st.markdown("**Cache Model Prediksi**")
+            predictor = init_predictor(db)
+            cache_stats = predictor.model_cache_stats()
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Model Tersimpan", f"{cache_stats['size']}/{cache_stats['max_size']}")
+            col2.metric("Hit", cache_stats['hits'])
+            col3.metric("Miss", cache_stats['misses'])
+            col4.metric("Hit Rate", f"{cache_stats['hit_rate']:.0%}")
+
+            st.markdown("**Antrian Prediksi**")
+            forecast_stats = init_forecast_executor(predictor).status()
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Sedang Berjalan", f"{forecast_stats['running']}/{forecast_stats['workers']}")
+            col2.metric("Hasil Tersimpan", forecast_stats['cached'])
+            col3.metric("Dihitung", forecast_stats['submitted'])
+            col4.metric("Dipakai Ulang", forecast_stats['reused'])
+
+            st.markdown("**Cache Query Database**")
+            query_stats = db.query_cache.stats()
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Entri", f"{query_stats['size']}/{query_stats['max_entries']}")
+            col2.metric("Memori", f"{query_stats['bytes'] / 1024 / 1024:,.1f} MB")
+            col3.metric("Hit Rate", f"{query_stats['hit_rate']:.0%}")
+            col4.metric("Invalidasi", query_stats['invalidations'])
+            key_stats = pd.DataFrame(db.query_cache.key_stats())
+            if not key_stats.empty:
+                key_stats['hit_rate'] = key_stats['hit_rate'].map('{:.0%}'.format)
+                key_stats['bytes'] = (key_stats['bytes'] / 1024).round(1)
+                st.dataframe(
+                    key_stats.sort_values('hits', ascending=False).rename(columns={
+                        'query': 'Query', 'params': 'Parameter', 'hits': 'Hit', 'misses': 'Miss',
+                        'hit_rate': 'Hit Rate', 'bytes': 'Memori (KB)', 'ttl_left': 'Sisa TTL (detik)',
+                        'tables': 'Tabel',
+                    }),
+                    use_container_width=True,
+                    hide_index=True,
+                )
+            if st.button("Kosongkan Cache Query"):
+                db.query_cache.invalidate()
+                st.rerun()
+
+            if st.button("Periksa Index Query"):
+                for name, (key, ok) in db.explain_hot_queries().items():
+                    if ok:
+                        st.success(f"{name}: memakai index {key}")
+                    else:
+                        st.error(f"{name}: tidak memakai index yang diharapkan ({key or 'full scan'})")
             
             if st.button("Reset Semua Data", type="secondary"):
                 st.warning("Fitur ini akan menghapus semua data. Implementasi dapat ditambahkan sesuai kebutuhan.")
@@ -222,6 +349,8 @@ def main():
         ]
         if st.session_state.user and st.session_state.user.get('role') == 'admin':
             nav_options.append(("Kelola User", "Kelola User"))
+            nav_options.append(("Performa", "Performa"))
+            nav_options.append(("Pengaturan", "Pengaturan"))
         
         for icon, option in nav_options:
             if st.sidebar.button(
@@ -238,18 +367,29 @@ def main():
         if st.button("Logout", use_container_width=True, type="primary"):
             logout()
     
-    if st.session_state.current_page == "Dashboard":
-        page_dashboard.render(db)
-    elif st.session_state.current_page == "Data Produk":
-        page_products.render(db)
-    elif st.session_state.current_page == "Data Penjualan":
-        page_sales.render(db)
-    elif st.session_state.current_page == "Prediksi Penjualan":
-        page_prediction.render(db, predictor)
-    elif st.session_state.current_page == "Kelola User":
-        page_users.render(db)
-    elif st.session_state.current_page == "Laporan":
-        page_reports.render(db)
+    # Durasi render per halaman tercatat di halaman Performa
+    with db.metrics.timed('render', st.session_state.current_page):
+        if st.session_state.current_page == "Dashboard":
+            dashboard_page()
+        elif st.session_state.current_page == "Data Produk":
+            products_page()
+        elif st.session_state.current_page == "Data Penjualan":
+            sales_page()
+        elif st.session_state.current_page == "Prediksi Penjualan":
+            prediction_page()
+        elif st.session_state.current_page == "Kelola User":
+            users_page()
+        elif st.session_state.current_page == "Laporan":
+            reports_page()
+        elif st.session_state.current_page == "Performa":
+            performance_page()
+        elif st.session_state.current_page == "Pengaturan":
+            settings_page()
+
+    if ACTIVE_CONFIG.get('metrics_textfile'):
+        db.metrics.write_textfile(
+            ACTIVE_CONFIG['metrics_textfile'], ACTIVE_CONFIG.get('metrics_interval', 15), db.metrics_gauges()
+        )
 
 if __name__ == "__main__":
     main()
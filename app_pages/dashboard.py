@@ -1,5 +1,4 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 
 
@@ -14,30 +13,30 @@ def render(db):
         unsafe_allow_html=True,
     )
 
-    products_df = db.get_products()
-    sales_df = db.get_sales_data()
+    total_products = db.count_products()
+    total_sales = db.count_sales()
+    if total_products is None or total_sales is None:
+        st.error("Gagal memuat ringkasan dari database. Coba muat ulang halaman.")
 
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        total_products = len(products_df)
         st.markdown(
             f"""
         <div class="metric-card">
             <h3>Total Produk</h3>
-            <p class="metric-value">{total_products}</p>
+            <p class="metric-value">{"-" if total_products is None else total_products}</p>
         </div>
         """,
             unsafe_allow_html=True,
         )
 
     with col2:
-        total_sales = len(sales_df)
         st.markdown(
             f"""
         <div class="metric-card">
             <h3>Total Transaksi</h3>
-            <p class="metric-value">{total_sales}</p>
+            <p class="metric-value">{"-" if total_sales is None else total_sales}</p>
         </div>
         """,
             unsafe_allow_html=True,
@@ -48,20 +47,20 @@ def render(db):
             f"""
         <div class="metric-card">
             <h3>Produk Aktif</h3>
-            <p class="metric-value">{total_products}</p>
+            <p class="metric-value">{"-" if total_products is None else total_products}</p>
         </div>
         """,
             unsafe_allow_html=True,
         )
 
     with col4:
-        if not sales_df.empty:
-            total_revenue = sales_df["total_harga"].sum()
+        if total_sales:
+            total_revenue = db.revenue_total()
             st.markdown(
                 f"""
             <div class="metric-card">
                 <h3>Total Pendapatan</h3>
-                <p class="metric-value">Rp {total_revenue:,.0f}</p>
+                <p class="metric-value">{"-" if total_revenue is None else f"Rp {total_revenue:,.0f}"}</p>
             </div>
             """,
                 unsafe_allow_html=True,
@@ -81,13 +80,12 @@ def render(db):
 
     with col1:
         st.subheader("Tren Penjualan Bulanan")
-        if not sales_df.empty:
-            sales_df["tanggal"] = pd.to_datetime(sales_df["tanggal"])
-            monthly_sales = sales_df.groupby(sales_df["tanggal"].dt.to_period("M"))["total_harga"].sum()
+        if total_sales:
+            monthly_sales = db.revenue_by_month()
 
             fig = px.line(
-                x=monthly_sales.index.astype(str),
-                y=monthly_sales.values,
+                x=monthly_sales["bulan"],
+                y=monthly_sales["pendapatan"],
                 title="Tren Pendapatan Bulanan",
             )
             fig.update_layout(xaxis_title="Bulan", yaxis_title="Pendapatan (Rp)")
@@ -97,14 +95,12 @@ def render(db):
 
     with col2:
         st.subheader("Top 5 Produk Terlaris")
-        if not sales_df.empty:
-            top_products = (
-                sales_df.groupby("nama_produk")["jumlah"].sum().sort_values(ascending=False).head(5)
-            )
+        if total_sales:
+            top_products = db.top_products(5, "jumlah")
 
             fig = px.bar(
-                x=top_products.values,
-                y=top_products.index,
+                x=top_products["total"],
+                y=top_products["nama_produk"],
                 orientation="h",
                 title="Produk Terlaris",
             )
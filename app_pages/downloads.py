@@ -0,0 +1,77 @@
+import os
+import streamlit as st
+import exporter
+from config import ACTIVE_CONFIG
+
+
+def export_download(key, label, file_stem, make_export, signature=None):
+    """Pilihan format + tombol unduh untuk file ekspor yang dibuat saat diminta.
+
+    `make_export(fmt)` menulis file sementara dan mengembalikan path-nya
+    (mis. db.export_sales). File hanya dibuat saat tombol "Siapkan" diklik
+    dan dipakai ulang selama format dan `signature` (filter) sama.
+
+    File ditulis bertahap, tetapi st.download_button memuat seluruh isinya
+    ke memori server saat diunduh; karena itu file di atas
+    ACTIVE_CONFIG['export_max_mb'] ditolak.
+    """
+    max_mb = ACTIVE_CONFIG.get('export_max_mb', 100)
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        fmt = st.selectbox(
+            "Format",
+            list(exporter.EXPORT_FORMATS),
+            format_func=lambda f: exporter.EXPORT_FORMATS[f][0],
+            key=f"{key}_format",
+            label_visibility="collapsed",
+        )
+
+    prepared = st.session_state.get(key)
+    if prepared and (prepared["fmt"] != fmt or prepared["signature"] != signature or not os.path.exists(prepared["path"])):
+        _discard(key)
+        prepared = None
+
+    with col2:
+        if st.button("Siapkan File", key=f"{key}_prepare", use_container_width=True):
+            _discard(key)
+            with st.spinner("Menyiapkan file..."):
+                path = make_export(fmt)
+            if not path:
+                st.error("Gagal membuat file ekspor.")
+            elif os.path.getsize(path) > max_mb * 2**20:
+                size_mb = os.path.getsize(path) / 2**20
+                _remove(path)
+                st.error(
+                    f"File ekspor {size_mb:,.1f} MB melebihi batas unduhan {max_mb} MB. "
+                    "Persempit filter atau pilih format CSV (gzip)/Parquet yang lebih kecil."
+                )
+            else:
+                prepared = st.session_state[key] = {"fmt": fmt, "signature": signature, "path": path}
+
+    with col3:
+        if prepared:
+            _, ext, mime = exporter.EXPORT_FORMATS[fmt]
+            with open(prepared["path"], "rb") as f:
+                st.download_button(
+                    label=label,
+                    data=f,
+                    file_name=f"{file_stem}{ext}",
+                    mime=mime,
+                    key=f"{key}_download",
+                    use_container_width=True,
+                )
+        else:
+            st.caption(f"Maksimum ukuran file unduhan {max_mb} MB.")
+
+
+def _discard(key):
+    prepared = st.session_state.pop(key, None)
+    if prepared:
+        _remove(prepared["path"])
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,76 @@
+import streamlit as st
+
+PAGE_SIZES = [25, 50, 100, 200]
+
+
+def page_state(key, filters):
+    """State halaman grid `key` di session; kembali ke halaman pertama bila filter berubah.
+
+    `cursors[i]` adalah kunci keyset awal halaman i (None untuk halaman
+    pertama atau bila grid memakai OFFSET).
+    """
+    state = st.session_state.setdefault(key, {"filters": None, "page": 0, "cursors": [None]})
+    if state["filters"] != filters:
+        state.update(filters=filters, page=0, cursors=[None])
+    return state
+
+
+def _go(state, step, cursor=None):
+    if step > 0:
+        del state["cursors"][state["page"] + 1:]
+        state["cursors"].append(cursor)
+        state["page"] += 1
+    elif state["page"] > 0:
+        state["page"] -= 1
+
+
+def page_controls(key, state, total_rows, page_size, has_next, next_cursor=None):
+    """Tombol sebelumnya/berikutnya di bawah grid; tiap klik memuat satu halaman dari database"""
+    pages = max(1, -(-total_rows // page_size)) if total_rows is not None else None
+    col1, col2, col3 = st.columns([1, 3, 1])
+    with col1:
+        st.button(
+            "‹ Sebelumnya",
+            key=f"{key}_prev",
+            disabled=state["page"] == 0,
+            on_click=_go,
+            args=(state, -1),
+            use_container_width=True,
+        )
+    with col2:
+        caption = f"Halaman {state['page'] + 1}"
+        if pages is not None:
+            caption += f" dari {pages} · {total_rows:,} baris"
+        st.markdown(f"<div style='text-align: center;'>{caption}</div>", unsafe_allow_html=True)
+    with col3:
+        st.button(
+            "Berikutnya ›",
+            key=f"{key}_next",
+            disabled=not has_next,
+            on_click=_go,
+            args=(state, 1, next_cursor),
+            use_container_width=True,
+        )
+
+
+def configure_paged_grid(gb):
+    """Matikan sort, filter dan grouping sisi klien pada AgGrid berhalaman.
+
+    Grid hanya memuat satu halaman, sehingga sort/filter AgGrid hanya
+    berlaku untuk halaman itu sementara jumlah baris dan tombol halaman
+    menggambarkan seluruh hasil. Urutan dan filter ditentukan query
+    (filter di atas grid).
+    """
+    gb.configure_default_column(
+        resizable=True,
+        editable=False,
+        sortable=False,
+        filterable=False,
+        filter=False,
+        floatingFilter=False,
+        groupable=False,
+        enableRowGroup=False,
+        enablePivot=False,
+        enableValue=False,
+        suppressMenu=True,
+    )
@@ -0,0 +1,86 @@
+import pandas as pd
+import streamlit as st
+
+
+def _timing_table(rows, name_label):
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+    return df.rename(columns={
+        'name': name_label, 'count': 'Jumlah', 'items': 'Produk', 'total_ms': 'Total (ms)',
+        'mean_ms': 'Rata-rata (ms)', 'p50_ms': 'p50 (ms)', 'p95_ms': 'p95 (ms)', 'max_ms': 'Maks (ms)',
+    }).drop(columns=['kind']).round(1)
+
+
+def render(db):
+    st.header("Performa")
+    metrics = db.metrics
+    if not metrics.enabled:
+        st.info("Instrumentasi nonaktif (metrics_enabled di config.py).")
+        return
+
+    queries = metrics.query_stats()
+    acquire = metrics.acquire_stats()
+    pool = db.pool.status()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Query", f"{sum(q['count'] for q in queries):,}")
+    col2.metric("Waktu Query", f"{sum(q['total_ms'] for q in queries) / 1000:,.2f} s")
+    col3.metric("Tunggu Koneksi p95", f"{acquire['p95_ms']:.1f} ms")
+    col4.metric("Koneksi Dipakai", f"{pool['in_use']}/{pool['opened']}")
+
+    tab1, tab2, tab3, tab4 = st.tabs(["Query", "Halaman & Forecast", "Query Lambat", "Prometheus"])
+
+    with tab1:
+        if queries:
+            df = pd.DataFrame(queries)
+            df['kb'] = df['bytes'] / 1024
+            st.dataframe(
+                df[['query', 'count', 'total_ms', 'mean_ms', 'p50_ms', 'p95_ms', 'max_ms', 'rows', 'kb', 'acquire_ms']]
+                .rename(columns={
+                    'query': 'Query', 'count': 'Jumlah', 'total_ms': 'Total (ms)', 'mean_ms': 'Rata-rata (ms)',
+                    'p50_ms': 'p50 (ms)', 'p95_ms': 'p95 (ms)', 'max_ms': 'Maks (ms)', 'rows': 'Baris',
+                    'kb': 'Perkiraan KB', 'acquire_ms': 'Tunggu Koneksi (ms)',
+                }).round(1),
+                use_container_width=True,
+                hide_index=True,
+            )
+        else:
+            st.info("Belum ada query yang tercatat.")
+
+    with tab2:
+        st.markdown("**Render Halaman**")
+        renders = _timing_table(metrics.timing_stats('render'), 'Halaman')
+        if renders.empty:
+            st.info("Belum ada render yang tercatat.")
+        else:
+            st.dataframe(renders.drop(columns=['Produk']), use_container_width=True, hide_index=True)
+
+        st.markdown("**Forecast (fit / predict)**")
+        forecasts = _timing_table(metrics.timing_stats('forecast'), 'Tahap')
+        if forecasts.empty:
+            st.info("Belum ada forecast yang tercatat.")
+        else:
+            st.dataframe(forecasts, use_container_width=True, hide_index=True)
+
+    with tab3:
+        st.caption(f"Ambang: {metrics.slow_query_ms} ms (slow_query_ms di config.py)")
+        slow = pd.DataFrame(metrics.slow_queries())
+        if slow.empty:
+            st.info("Tidak ada query lambat.")
+        else:
+            st.dataframe(
+                slow.rename(columns={
+                    'time': 'Waktu', 'ms': 'Durasi (ms)', 'rows': 'Baris', 'query': 'Query', 'params': 'Parameter',
+                }).round(1),
+                use_container_width=True,
+                hide_index=True,
+            )
+
+    with tab4:
+        text = metrics.prometheus_text(db.metrics_gauges())
+        st.download_button("Unduh metrics.prom", text, file_name="metrics.prom", mime="text/plain")
+        st.code(text, language=None)
+
+    if st.button("Reset Statistik"):
+        metrics.reset()
+        st.rerun()
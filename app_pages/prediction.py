@@ -1,77 +1,250 @@
 import streamlit as st
 import pandas as pd
+from forecast_jobs import run_forecast
 
+# st.fragment baru ada sejak streamlit 1.37; versi yang di-pin (1.35) hanya
+# punya st.experimental_fragment dengan parameter run_every yang sama
+_fragment = getattr(st, 'fragment', None) or st.experimental_fragment
 
-def render(db, predictor):
+
+def render(db, predictor, restock_job=None, forecasts=None):
     st.header("Prediksi Penjualan Bulanan")
 
-    products_df = db.get_products()
+    catalog = db.product_catalog()
 
-    if products_df.empty:
+    if catalog.empty:
         st.warning("Belum ada data produk untuk prediksi.")
         return
 
+    tab_single, tab_all, tab_restock = st.tabs(["Per Produk", "Semua Produk", "Rekomendasi Restock"])
+
+    with tab_single:
+        _render_single(catalog, predictor, forecasts)
+
+    with tab_all:
+        _render_all(predictor)
+
+    with tab_restock:
+        _render_restock(db, restock_job)
+
+
+def _render_single(catalog, predictor, forecasts):
     st.subheader("Prediksi Penjualan Bulan Depan")
 
     selected_product = st.selectbox(
         "Pilih Produk",
-        options=products_df['id'].tolist(),
-        format_func=lambda x: f"{products_df[products_df['id']==x]['nama_produk'].iloc[0]} - {products_df[products_df['id']==x]['varian'].iloc[0]}",
+        options=catalog.ids,
+        format_func=catalog.label,
         key="selected_product",
     )
 
     days_ahead = 30
 
     if st.button("Prediksi Penjualan Bulan Depan", type="primary", use_container_width=True):
-        with st.spinner("Memproses prediksi..."):
-            try:
-                predictions, product_info, monthly_forecast = predictor.predict_sales(selected_product, days_ahead)
-
-                if predictions is None or not predictions:
-                    st.warning("Tidak dapat membuat prediksi. Data penjualan tidak mencukupi.")
-                    return
-
-                if not isinstance(predictions, list):
-                    if isinstance(predictions, dict):
-                        predictions = [predictions]
-                    else:
-                        st.warning("Format prediksi tidak valid.")
-                        return
-
-                if monthly_forecast:
-                    st.markdown("---")
-                    st.subheader("Prediksi Bulan Depan")
-
-                    monthly_df = pd.DataFrame(monthly_forecast)
-                    monthly_df['Bulan'] = pd.to_datetime(monthly_df['tahun_bulan']).dt.strftime('%B %Y')
-
-                    total_penjualan = monthly_df['total_penjualan'].sum()
-                    harga_jual = products_df[products_df['id'] == selected_product]['harga'].values[0]
-                    total_keuntungan = total_penjualan * harga_jual
-
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.metric("Total Prediksi Penjualan", f"{total_penjualan:,.0f} unit", help="Total penjualan yang diprediksi untuk bulan depan")
-                    with col2:
-                        st.metric("Perkiraan Keuntungan Kotor", f"Rp {total_keuntungan:,.0f}", help="Perkiraan keuntungan kotor berdasarkan harga jual saat ini")
-
-                    fig = predictor.create_sales_chart(selected_product, 30)
-                    if fig:
-                        st.plotly_chart(fig, use_container_width=True)
-
-                    csv = monthly_df[['Bulan', 'total_penjualan', 'rata_harian']]
-                    csv = csv.rename(columns={'total_penjualan': 'total_penjualan_unit', 'rata_harian': 'rata_harian_unit'})
-                    csv['total_keuntungan'] = csv['total_penjualan_unit'] * harga_jual
-
-                    st.download_button(
-                        label="Unduh Prediksi",
-                        data=csv.to_csv(index=False, float_format='%.2f').encode('utf-8'),
-                        file_name=f"prediksi_penjualan_{products_df[products_df['id'] == selected_product]['nama_produk'].values[0]}.csv",
-                        mime='text/csv',
-                    )
-                else:
-                    st.warning("Tidak dapat membuat prediksi bulanan. Data tidak mencukupi.")
-
-            except Exception as e:
-                st.error(f"Terjadi kesalahan saat memproses prediksi: {str(e)}")
-                st.error("Silakan coba lagi atau hubungi administrator jika masalah berlanjut.")
+        if forecasts is None:
+            # Tanpa executor (mis. benchmark): hitung langsung di thread skrip
+            with st.spinner("Memproses prediksi..."):
+                result = run_forecast(predictor, selected_product, days_ahead)
+            st.session_state["forecast_request"] = (selected_product, days_ahead)
+            st.session_state["forecast_result"] = result
+        else:
+            forecasts.submit(selected_product, days_ahead)
+            st.session_state["forecast_request"] = (selected_product, days_ahead)
+            st.session_state.pop("forecast_result", None)
+
+    request = st.session_state.get("forecast_request")
+    if request is None or request[0] != selected_product:
+        return
+
+    if forecasts is None:
+        result = st.session_state.get("forecast_result")
+    else:
+        future = forecasts.get(*request) or forecasts.submit(*request)
+        if not future.done():
+            _wait_for_forecast(forecasts, request, catalog.label(request[0]))
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            st.session_state.pop("forecast_request", None)
+            st.error(f"Terjadi kesalahan saat memproses prediksi: {str(e)}")
+            st.error("Silakan coba lagi atau hubungi administrator jika masalah berlanjut.")
+            return
+    if result is not None:
+        _show_forecast(catalog, selected_product, result)
+
+
+@_fragment(run_every=1)
+def _wait_for_forecast(forecasts, request, label):
+    """Periksa job prediksi setiap detik tanpa menjalankan ulang seluruh halaman"""
+    future = forecasts.get(*request)
+    if future is None or future.done():
+        st.rerun()
+    st.info(f"Memproses prediksi {label} di latar... Halaman lain tetap bisa dibuka.")
+
+
+def _show_forecast(catalog, selected_product, result):
+    predictions, product_info, monthly_forecast, fig = result
+    try:
+        if predictions is None or not predictions:
+            st.warning("Tidak dapat membuat prediksi. Data penjualan tidak mencukupi.")
+            return
+
+        if not isinstance(predictions, list):
+            if isinstance(predictions, dict):
+                predictions = [predictions]
+            else:
+                st.warning("Format prediksi tidak valid.")
+                return
+
+        if monthly_forecast:
+            st.markdown("---")
+            st.subheader("Prediksi Bulan Depan")
+
+            monthly_df = pd.DataFrame(monthly_forecast)
+            monthly_df['Bulan'] = pd.to_datetime(monthly_df['tahun_bulan']).dt.strftime('%B %Y')
+
+            total_penjualan = monthly_df['total_penjualan'].sum()
+            product_row = catalog.get(selected_product)
+            harga_jual = product_row['harga']
+            total_keuntungan = total_penjualan * harga_jual
+
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("Total Prediksi Penjualan", f"{total_penjualan:,.0f} unit", help="Total penjualan yang diprediksi untuk bulan depan")
+            with col2:
+                st.metric("Perkiraan Keuntungan Kotor", f"Rp {total_keuntungan:,.0f}", help="Perkiraan keuntungan kotor berdasarkan harga jual saat ini")
+
+            if fig:
+                st.plotly_chart(fig, use_container_width=True)
+
+            csv = monthly_df[['Bulan', 'total_penjualan', 'rata_harian']]
+            csv = csv.rename(columns={'total_penjualan': 'total_penjualan_unit', 'rata_harian': 'rata_harian_unit'})
+            csv['total_keuntungan'] = csv['total_penjualan_unit'] * harga_jual
+
+            st.download_button(
+                label="Unduh Prediksi",
+                data=csv.to_csv(index=False, float_format='%.2f').encode('utf-8'),
+                file_name=f"prediksi_penjualan_{product_row['nama_produk']}.csv",
+                mime='text/csv',
+            )
+        else:
+            st.warning("Tidak dapat membuat prediksi bulanan. Data tidak mencukupi.")
+
+    except Exception as e:
+        st.error(f"Terjadi kesalahan saat memproses prediksi: {str(e)}")
+        st.error("Silakan coba lagi atau hubungi administrator jika masalah berlanjut.")
+
+
+def _render_all(predictor):
+    st.subheader("Prediksi Semua Produk")
+
+    days_ahead = 30
+
+    if st.button("Prediksi Semua Produk", use_container_width=True):
+        with st.spinner("Memproses prediksi semua produk..."):
+            st.session_state["forecast_all"] = predictor.predict_all(days_ahead)
+
+    forecast = st.session_state.get("forecast_all")
+    if forecast is None:
+        st.info("Klik tombol di atas untuk memprediksi penjualan 30 hari ke depan untuk semua produk.")
+        return
+    if forecast.empty:
+        st.warning("Tidak dapat membuat prediksi. Data penjualan tidak mencukupi.")
+        return
+
+    summary = forecast.groupby(["product_id", "nama_produk", "varian"], dropna=False, sort=False, observed=True).agg(
+        total_prediksi=("predicted_sales", "sum"),
+        rata_harian=("predicted_sales", "mean"),
+        metode=("method", "first"),
+        kepercayaan=("confidence", "first"),
+    ).reset_index().sort_values("total_prediksi", ascending=False)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Jumlah Produk", len(summary))
+    with col2:
+        st.metric("Total Prediksi Penjualan", f"{summary['total_prediksi'].sum():,.0f} unit")
+
+    st.dataframe(
+        summary.drop(columns=["product_id"]).rename(columns={
+            "nama_produk": "Produk",
+            "varian": "Varian",
+            "total_prediksi": "Total Prediksi (unit)",
+            "rata_harian": "Rata-rata Harian",
+            "metode": "Metode",
+            "kepercayaan": "Kepercayaan",
+        }),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    st.download_button(
+        label="Unduh Prediksi Semua Produk (CSV)",
+        data=forecast.to_csv(index=False, float_format="%.2f").encode("utf-8"),
+        file_name="prediksi_semua_produk.csv",
+        mime="text/csv",
+    )
+
+
+def _render_restock(db, restock_job):
+    st.subheader("Rekomendasi Restock")
+
+    if restock_job is not None:
+        status = restock_job.status()
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            if status["running"]:
+                st.info(f"Perhitungan ulang sedang berjalan sejak {status['started_at']:%d-%m-%Y %H:%M:%S}.")
+            elif status["last_error"]:
+                st.error(f"Perhitungan terakhir gagal: {status['last_error']}")
+            elif status["last_result"]:
+                result = status["last_result"]
+                st.caption(
+                    f"Perhitungan terakhir {status['finished_at']:%d-%m-%Y %H:%M:%S}: "
+                    f"{result['refreshed']} dari {result['products']} produk diperbarui "
+                    f"({result['seconds']} detik)."
+                )
+        with col2:
+            if st.button("Perbarui", use_container_width=True, disabled=status["running"]):
+                restock_job.trigger()
+                st.rerun()
+
+    snapshot = db.get_restock_snapshot()
+    if snapshot.empty:
+        if restock_job is not None and status["started_at"] is None and restock_job.trigger():
+            # Penggunaan pertama: job terjadwal baru berjalan setelah satu interval
+            st.info("Belum ada rekomendasi tersimpan. Perhitungan pertama dimulai di latar; klik Perbarui atau buka ulang halaman ini sebentar lagi.")
+        else:
+            st.info("Belum ada rekomendasi tersimpan. Klik Perbarui untuk menghitungnya di latar.")
+        return
+
+    st.caption(f"Snapshot dihitung pada {snapshot['computed_at'].max():%d-%m-%Y %H:%M}.")
+    snapshot = snapshot[snapshot["recommended_order"] > 0]
+    if snapshot.empty:
+        st.success("Stok semua produk mencukupi; tidak ada produk yang perlu di-restock.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Produk Perlu Restock", len(snapshot))
+    with col2:
+        st.metric("Urgensi Tinggi", int((snapshot["urgency"] == "High").sum()))
+    with col3:
+        st.metric("Total Rekomendasi Order", f"{snapshot['recommended_order'].sum():,.0f} unit")
+
+    st.dataframe(
+        snapshot[[
+            "nama_produk", "varian", "predicted_demand", "recommended_order", "urgency", "confidence", "computed_at"
+        ]].rename(columns={
+            "nama_produk": "Produk",
+            "varian": "Varian",
+            "predicted_demand": "Prediksi Kebutuhan",
+            "recommended_order": "Rekomendasi Order",
+            "urgency": "Urgensi",
+            "confidence": "Kepercayaan",
+            "computed_at": "Dihitung",
+        }),
+        use_container_width=True,
+        hide_index=True,
+    )
@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode, DataReturnMode
+from catalog import format_product_table
+from app_pages.pagination import PAGE_SIZES, configure_paged_grid, page_state, page_controls
 
 
 def render(db):
@@ -16,51 +18,32 @@ def render(db):
     tab1, tab2 = st.tabs(["Daftar Produk", "Tambah Produk"])
 
     with tab1:
-        products_df = db.get_products()
-
-        if not products_df.empty:
-            col1, col2 = st.columns([3, 1])
+        product_count = db.count_products()
+        if product_count is None:
+            st.error("Gagal memuat data produk dari database. Coba muat ulang halaman.")
+        elif product_count > 0:
+            col1, col2, col3 = st.columns([3, 1, 1])
             with col1:
                 search = st.text_input("Cari produk", placeholder="Nama produk...")
             with col2:
+                page_size = st.selectbox("Baris/halaman", PAGE_SIZES, key="products_page_size")
+            with col3:
                 if st.button("Refresh"):
                     st.rerun()
 
-            if search:
-                products_df = products_df[
-                    products_df['nama_produk'].str.contains(search, case=False, na=False)
-                    | products_df['varian'].str.contains(search, case=False, na=False)
-                ]
+            # Pencarian dan pembatasan halaman dijalankan di MySQL
+            state = page_state("products_grid", (search, page_size))
+            total_rows = db.count_products(search) or 0
+            products_df = db.query_products(search, limit=page_size, offset=state['page'] * page_size)
+            has_next = (state['page'] + 1) * page_size < total_rows
 
-            display_data = []
-            for _, row in products_df.iterrows():
-                try:
-                    display_data.append({
-                        'Nama Produk': str(row['nama_produk']) if pd.notna(row['nama_produk']) else '',
-                        'Varian': str(row['varian']) if pd.notna(row['varian']) else '',
-                        'Jenis': str(row['jenis']) if pd.notna(row['jenis']) else '',
-                        'Harga (Rp)': f"{int(row['harga']):,}".replace(',', '.') if pd.notna(row['harga']) else '0'
-                    })
-                except (ValueError, TypeError):
-                    continue
-
-            if display_data:
-                try:
-                    display_df = pd.DataFrame(display_data)
+            display_df = format_product_table(products_df) if not products_df.empty else pd.DataFrame()
 
+            if not display_df.empty:
+                try:
                     gb = GridOptionsBuilder.from_dataframe(display_df)
 
-                    gb.configure_default_column(
-                        resizable=True,
-                        filterable=True,
-                        sortable=True,
-                        editable=False,
-                        groupable=True,
-                        floatingFilter=True,
-                        enableRowGroup=True,
-                        enablePivot=True,
-                        enableValue=True,
-                    )
+                    configure_paged_grid(gb)
 
                     gb.configure_column('Nama Produk', header_name='Nama Produk', width=200)
                     gb.configure_column('Varian', header_name='Varian', width=150)
@@ -69,24 +52,21 @@ def render(db):
                         'Harga (Rp)',
                         header_name='Harga (Rp)',
                         width=150,
-                        type=['numericColumn', 'numberColumnFilter'],
+                        type=['numericColumn'],
                         valueFormatter="value.toLocaleString('id-ID', {style:'currency', currency:'IDR', maximumFractionDigits:0}).replace('IDR', 'Rp')",
                     )
 
                     try:
                         gb.configure_grid_options(
-                            domLayout='autoHeight',
                             enableRangeSelection=True,
                             rowSelection='single',
-                            pagination=True,
-                            paginationPageSize=10,
                             suppressRowClickSelection=True,
                             suppressCellSelection=True,
                             suppressRowDeselection=True,
                             suppressColumnVirtualisation=True,
                         )
                     except Exception:
-                        gb.configure_grid_options(domLayout='autoHeight', pagination=True, paginationPageSize=10)
+                        gb.configure_grid_options(rowSelection='single')
 
                     grid_options = gb.build()
 
@@ -100,7 +80,7 @@ def render(db):
                         height=500,
                         width='100%',
                         enable_enterprise_modules=False,
-                        reload_data=False,
+                        reload_data=True,
                         allow_unsafe_jscode=True,
                     )
                 except Exception as e:
@@ -108,6 +88,8 @@ def render(db):
                     st.dataframe(display_df, use_container_width=True)
             else:
                 st.warning("Tidak ada data produk yang tersedia.")
+
+            page_controls("products_grid", state, total_rows, page_size, has_next)
         else:
             st.info("Belum ada data produk. Silakan tambah produk baru atau import data Excel.")
 
@@ -3,6 +3,9 @@ import pandas as pd
 from datetime import datetime, timedelta
 from st_aggrid import AgGrid, GridOptionsBuilder
 import plotly.express as px
+import exporter
+from app_pages.downloads import export_download
+from app_pages.pagination import PAGE_SIZES, configure_paged_grid, page_state, page_controls
 
 
 def render(db):
@@ -17,42 +20,45 @@ def render(db):
 
     with tab_sales:
         st.subheader("Laporan Penjualan")
-        sales_df = db.get_sales_data()
-
-        if not sales_df.empty:
-            col1, col2 = st.columns(2)
-            with col1:
-                start_date = st.date_input(
-                    "Dari Tanggal", value=datetime.now().date() - timedelta(days=30)
-                )
-            with col2:
-                end_date = st.date_input("Sampai Tanggal", value=datetime.now().date())
-
-            filtered_df = sales_df.copy()
-            filtered_df["tanggal"] = pd.to_datetime(filtered_df["tanggal"], errors="coerce")
-            filtered_df = filtered_df.dropna(subset=["tanggal"])  # guard bad rows
-            filtered_df = filtered_df[
-                (filtered_df["tanggal"].dt.date >= start_date)
-                & (filtered_df["tanggal"].dt.date <= end_date)
-            ]
+        col1, col2 = st.columns(2)
+        with col1:
+            start_date = st.date_input(
+                "Dari Tanggal", value=datetime.now().date() - timedelta(days=30)
+            )
+        with col2:
+            end_date = st.date_input("Sampai Tanggal", value=datetime.now().date())
 
-            display_df = filtered_df.copy()
-            display_df["tanggal"] = display_df["tanggal"].dt.strftime("%Y-%m-%d %H:%M:%S").astype(str)
+        total_tx, total_pendapatan = db.sales_summary(start_date, end_date) or (0, 0)
 
+        if total_tx > 0:
             col1, col2, col3 = st.columns(3)
             with col1:
-                total_tx = int(len(filtered_df))
                 st.metric("Total Transaksi", total_tx)
             with col2:
-                total_pendapatan = int(pd.to_numeric(filtered_df["total_harga"], errors="coerce").fillna(0).sum()) if total_tx > 0 else 0
                 st.metric("Total Pendapatan", f"Rp {total_pendapatan:,.0f}")
             with col3:
-                rata2 = int(pd.to_numeric(filtered_df["total_harga"], errors="coerce").fillna(0).mean()) if total_tx > 0 else 0
+                rata2 = int(total_pendapatan / total_tx)
                 st.metric("Rata-rata per Transaksi", f"Rp {rata2:,.0f}")
 
-            df_to_show = display_df[["tanggal", "nama_produk", "varian", "jumlah", "total_harga"]].copy()
+            # Grid hanya memuat satu halaman; unduhan ditulis langsung dari cursor
+            page_size = PAGE_SIZES[1]
+            state = page_state("report_sales_grid", (start_date, end_date))
+            page_df = db.query_sales(
+                start_date,
+                end_date,
+                columns=["id", "tanggal", "nama_produk", "varian", "jumlah", "total_harga"],
+                limit=page_size + 1,
+                after=state["cursors"][state["page"]],
+            )
+            has_next = len(page_df) > page_size
+            page_df = page_df.iloc[:page_size]
+            next_cursor = (page_df["tanggal"].iloc[-1].date(), int(page_df["id"].iloc[-1])) if has_next else None
+
+            df_to_show = page_df.drop(columns=["id"])
+            df_to_show["tanggal"] = df_to_show["tanggal"].dt.strftime("%Y-%m-%d")
 
             gb = GridOptionsBuilder.from_dataframe(df_to_show)
+            configure_paged_grid(gb)
             gb.configure_columns(["tanggal"], header_name="Tanggal")
             gb.configure_columns(["nama_produk"], header_name="Produk")
             gb.configure_columns(["varian"], header_name="Varian")
@@ -68,42 +74,42 @@ def render(db):
                 theme="streamlit",
                 fit_columns_on_grid_load=True,
                 allow_unsafe_jscode=True,
+                reload_data=True,
             )
-
-            csv = display_df.to_csv(index=False)
-            st.download_button(
-                label="Unduh Laporan Penjualan (CSV)",
-                data=csv,
-                file_name=f"laporan_penjualan_{start_date}_{end_date}.csv",
-                mime="text/csv",
+            page_controls("report_sales_grid", state, total_tx, page_size, has_next, next_cursor)
+
+            export_download(
+                "export_sales_report",
+                "Unduh Laporan Penjualan",
+                f"laporan_penjualan_{start_date}_{end_date}",
+                lambda fmt: db.export_sales(
+                    fmt, start_date, end_date,
+                    columns=["tanggal", "nama_produk", "varian", "jenis", "jumlah", "harga_satuan", "total_harga"],
+                ),
+                signature=(start_date, end_date),
             )
         else:
-            st.info("Belum ada data penjualan")
+            st.info("Tidak ada data penjualan pada periode ini")
 
     with tab_pred:
         st.subheader("Laporan Prediksi (Sederhana)")
-        sales_df = db.get_sales_data()
-        if sales_df.empty:
+        catalog = db.product_catalog()
+        if catalog.empty:
             st.info("Belum ada data penjualan untuk menghitung prediksi.")
         else:
-            sales_df["tanggal"] = pd.to_datetime(sales_df["tanggal"], errors="coerce")
-            sales_df = sales_df.dropna(subset=["tanggal"]) 
-            sales_df["tahun_bulan"] = sales_df["tanggal"].dt.to_period("M").astype(str)
-
-            produk_list = sorted(sales_df["nama_produk"].dropna().unique().tolist())
+            produk_list = catalog.names
             col1, col2 = st.columns(2)
             with col1:
                 produk = st.selectbox("Pilih Produk", produk_list)
             with col2:
                 horizon = st.slider("Horizon (bulan)", 1, 6, 3)
 
-            dfp = sales_df[sales_df["nama_produk"] == produk].copy()
-            if dfp.empty:
+            product_ids = catalog.ids_for_name(produk)
+            monthly = db.sales_by_month(product_ids)
+            if monthly.empty:
                 st.info("Tidak ada data untuk produk ini.")
             else:
-                monthly = dfp.groupby("tahun_bulan")["jumlah"].sum().reset_index()
-                monthly["tahun_bulan_dt"] = pd.to_datetime(monthly["tahun_bulan"])
-                monthly = monthly.sort_values("tahun_bulan_dt")
+                monthly["tahun_bulan_dt"] = pd.to_datetime(monthly["bulan"])
 
                 avg3 = monthly["jumlah"].tail(3).mean() if len(monthly) >= 1 else 0
                 future_periods = pd.date_range(
@@ -132,11 +138,12 @@ def render(db):
                 fig = px.line(chart_df, x="Bulan", y="Jumlah", color="Tipe", markers=True, title=f"Aktual vs Prediksi - {produk}")
                 st.plotly_chart(fig, use_container_width=True)
 
-                st.download_button(
-                    label="Unduh Prediksi (CSV)",
-                    data=forecast_df.to_csv(index=False).encode("utf-8"),
-                    file_name=f"laporan_prediksi_{produk}.csv",
-                    mime="text/csv",
+                export_download(
+                    "export_prediction_report",
+                    "Unduh Prediksi",
+                    f"laporan_prediksi_{produk}",
+                    lambda fmt: exporter.export_frame(forecast_df, fmt, "prediksi"),
+                    signature=(produk, horizon),
                 )
 
     with tab_users:
@@ -152,34 +159,31 @@ def render(db):
                 grid_options = gb.build()
                 AgGrid(users_df, gridOptions=grid_options, theme='streamlit', height=400, fit_columns_on_grid_load=True)
 
-                st.download_button(
-                    label="Unduh Data User (CSV)",
-                    data=users_df.to_csv(index=False),
-                    file_name="laporan_data_user.csv",
-                    mime="text/csv",
+                export_download(
+                    "export_users_report",
+                    "Unduh Data User",
+                    "laporan_data_user",
+                    lambda fmt: db.export_query(
+                        "SELECT id, username, role, created_at FROM users ORDER BY created_at DESC",
+                        fmt=fmt, prefix="users",
+                    ),
                 )
         else:
             st.warning("Fungsi get_users() belum tersedia di DatabaseManager. Restart aplikasi setelah update, atau hubungi admin.")
 
     with tab_abc:
         st.subheader("Laporan Kinerja Produk")
-        sales_df = db.get_sales_data()
-        if sales_df.empty:
+        c1, c2 = st.columns(2)
+        with c1:
+            start_date = st.date_input("Dari Tanggal", value=datetime.now().date() - timedelta(days=90), key="abc_start")
+        with c2:
+            end_date = st.date_input("Sampai Tanggal", value=datetime.now().date(), key="abc_end")
+
+        agg = db.sales_by_product(start_date, end_date)
+        if agg.empty:
             st.info("Belum ada data penjualan.")
         else:
-            c1, c2 = st.columns(2)
-            with c1:
-                start_date = st.date_input("Dari Tanggal", value=datetime.now().date() - timedelta(days=90), key="abc_start")
-            with c2:
-                end_date = st.date_input("Sampai Tanggal", value=datetime.now().date(), key="abc_end")
-
-            sdf = sales_df.copy()
-            sdf["tanggal"] = pd.to_datetime(sdf["tanggal"], errors="coerce")
-            sdf = sdf.dropna(subset=["tanggal"]) 
-            sdf = sdf[(sdf["tanggal"].dt.date >= start_date) & (sdf["tanggal"].dt.date <= end_date)]
-
-            agg = sdf.groupby(["nama_produk", "varian"], dropna=False)["total_harga"].sum().reset_index()
-            agg = agg.sort_values("total_harga", ascending=False)
+            agg = agg[["nama_produk", "varian", "total_harga"]].copy()
             total = agg["total_harga"].sum()
             agg["persen"] = agg["total_harga"] / total
             agg["kumulatif"] = agg["persen"].cumsum()
@@ -208,9 +212,10 @@ def render(db):
             fig = px.bar(agg.head(20), x="nama_produk", y="total_harga", title="Top Produk berdasarkan Pendapatan (Top 20)")
             st.plotly_chart(fig, use_container_width=True)
 
-            st.download_button(
-                label="Unduh Laporan Kinerja Produk (CSV)",
-                data=agg.to_csv(index=False),
-                file_name=f"laporan_kinerja_produk_{start_date}_{end_date}.csv",
-                mime="text/csv",
+            export_download(
+                "export_abc_report",
+                "Unduh Laporan Kinerja Produk",
+                f"laporan_kinerja_produk_{start_date}_{end_date}",
+                lambda fmt: exporter.export_frame(agg.astype({"kategori": str}), fmt, "kinerja_produk"),
+                signature=(start_date, end_date),
             )
@@ -1,7 +1,7 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime, timedelta
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode, DataReturnMode
+from app_pages.pagination import PAGE_SIZES, configure_paged_grid, page_state, page_controls
 
 
 def render(db):
@@ -17,62 +17,58 @@ def render(db):
     tab1, tab2 = st.tabs(["Data Penjualan", "Tambah Transaksi"])
 
     with tab1:
-        sales_df = db.get_sales_data()
+        catalog = db.product_catalog()
 
-        if not sales_df.empty:
-            col1, col2, col3 = st.columns(3)
+        if not catalog.empty:
+            col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
 
             with col1:
                 start_date = st.date_input("Dari Tanggal", value=datetime.now().date() - timedelta(days=30))
             with col2:
                 end_date = st.date_input("Sampai Tanggal", value=datetime.now().date())
             with col3:
-                product_filter = st.selectbox("Filter Produk", ["Semua"] + sales_df['nama_produk'].unique().tolist())
-
-            filtered_df = sales_df.copy()
-            filtered_df['tanggal'] = pd.to_datetime(filtered_df['tanggal'], errors='coerce', utc=True).dt.tz_localize(None)
-            filtered_df = filtered_df[
-                (filtered_df['tanggal'].dt.date >= start_date)
-                & (filtered_df['tanggal'].dt.date <= end_date)
-            ]
+                product_filter = st.selectbox("Filter Produk", ["Semua"] + catalog.names)
+            with col4:
+                page_size = st.selectbox("Baris/halaman", PAGE_SIZES, key="sales_page_size")
 
+            product_ids = None
             if product_filter != "Semua":
-                filtered_df = filtered_df[filtered_df['nama_produk'] == product_filter]
-
-            display_df = filtered_df[['tanggal', 'nama_produk', 'varian', 'jumlah', 'harga_satuan', 'total_harga']].copy()
+                product_ids = catalog.ids_for_name(product_filter)
+
+            # Hanya satu halaman yang diambil dari database (keyset pada tanggal, id)
+            state = page_state("sales_grid", (start_date, end_date, product_filter, page_size))
+            page_df = db.query_sales(
+                start_date,
+                end_date,
+                product_ids=product_ids,
+                columns=['id', 'tanggal', 'nama_produk', 'varian', 'jumlah', 'harga_satuan', 'total_harga'],
+                limit=page_size + 1,
+                after=state['cursors'][state['page']],
+            )
+            has_next = len(page_df) > page_size
+            page_df = page_df.iloc[:page_size]
+            next_cursor = (page_df['tanggal'].iloc[-1].date(), int(page_df['id'].iloc[-1])) if has_next else None
 
+            # tanggal sudah datetime64 dari query_sales
+            display_df = page_df.drop(columns=['id'])
             display_df['tanggal'] = display_df['tanggal'].dt.strftime('%Y-%m-%d %H:%M')
 
             gb = GridOptionsBuilder.from_dataframe(display_df)
 
-            gb.configure_default_column(
-                resizable=True,
-                filterable=True,
-                sortable=True,
-                editable=False,
-                groupable=True,
-                floatingFilter=True,
-                enableRowGroup=True,
-                enablePivot=True,
-                enableValue=True,
-            )
+            configure_paged_grid(gb)
 
             gb.configure_column('tanggal', header_name='Tanggal', width=150)
             gb.configure_column('nama_produk', header_name='Produk', width=200)
             gb.configure_column('varian', header_name='Varian', width=150)
-            gb.configure_column('jumlah', header_name='Jumlah', width=100, type=['numericColumn', 'numberColumnFilter'])
-            gb.configure_column('harga_satuan', header_name='Harga Satuan', width=150, type=['numericColumn', 'numberColumnFilter'],
+            gb.configure_column('jumlah', header_name='Jumlah', width=100, type=['numericColumn'])
+            gb.configure_column('harga_satuan', header_name='Harga Satuan', width=150, type=['numericColumn'],
                                valueFormatter="'Rp ' + value.toString().replace(/\\B(?=(\\d{3})+(?!\\d))/g, '.')")
-            gb.configure_column('total_harga', header_name='Total', width=150, type=['numericColumn', 'numberColumnFilter'],
+            gb.configure_column('total_harga', header_name='Total', width=150, type=['numericColumn'],
                                valueFormatter="'Rp ' + value.toString().replace(/\\B(?=(\\d{3})+(?!\\d))/g, '.')")
 
             gb.configure_grid_options(
-                domLayout='autoHeight',
                 enableRangeSelection=True,
                 rowSelection='single',
-                pagination=True,
-                paginationPageSize=10,
-                defaultColDef={'filter': True, 'sortable': True, 'resizable': True},
             )
 
             grid_options = gb.build()
@@ -88,15 +84,15 @@ def render(db):
                     height=500,
                     width='100%',
                     enable_enterprise_modules=False,
-                    reload_data=False,
+                    reload_data=True,
                     allow_unsafe_jscode=True,
                 )
             except Exception as e:
                 st.error(f"Error displaying data: {str(e)}")
                 st.dataframe(display_df, use_container_width=True)
 
-            total_transactions = len(filtered_df)
-            total_revenue = filtered_df['total_harga'].sum()
+            total_transactions, total_revenue = db.sales_summary(start_date, end_date, product_ids) or (0, 0)
+            page_controls("sales_grid", state, total_transactions, page_size, has_next, next_cursor)
 
             col1, col2 = st.columns(2)
             with col1:
@@ -104,14 +100,14 @@ def render(db):
             with col2:
                 st.metric("Total Pendapatan", f"Rp {total_revenue:,.0f}")
         else:
-            st.info("Belum ada data penjualan")
+            st.info("Belum ada data produk. Silakan tambah produk terlebih dahulu.")
 
     with tab2:
         st.subheader("Tambah Transaksi Baru")
 
-        products_df = db.get_products()
+        catalog = db.product_catalog()
 
-        if not products_df.empty:
+        if not catalog.empty:
             with st.form("add_sale_form"):
                 col1, col2 = st.columns(2)
 
@@ -119,13 +115,13 @@ def render(db):
                     tanggal = st.date_input("Tanggal Transaksi", value=datetime.now().date())
                     product_id = st.selectbox(
                         "Pilih Produk",
-                        options=products_df['id'].tolist(),
-                        format_func=lambda x: f"{products_df[products_df['id']==x]['nama_produk'].iloc[0]} - {products_df[products_df['id']==x]['varian'].iloc[0]}",
+                        options=catalog.ids,
+                        format_func=catalog.label,
                     )
 
                 with col2:
                     jumlah = st.number_input("Jumlah", min_value=0.1, value=1.0, step=0.1)
-                    selected_product = products_df[products_df['id'] == product_id].iloc[0]
+                    selected_product = catalog.get(product_id)
                     harga_satuan = st.number_input("Harga Satuan", value=int(selected_product['harga']))
 
                 total = jumlah * harga_satuan
@@ -135,7 +131,7 @@ def render(db):
 
                 if submitted:
                     if db.add_sale(tanggal, product_id, jumlah, harga_satuan):
-                        product_label = products_df[products_df['id']==product_id]['nama_produk'].iloc[0]
+                        product_label = selected_product['nama_produk']
                         st.session_state["sale_added_success"] = True
                         st.session_state["sale_added_message"] = f"Transaksi '{product_label}' berhasil ditambahkan"
                         st.rerun()
@@ -0,0 +1,300 @@
+import os
+import re
+import sqlite3
+from datetime import date, datetime
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+import mysql.connector
+from mysql.connector import errors
+
+
+class MySQLBackend:
+    """Backend produksi: server MySQL dari DB_CONFIG"""
+
+    name = 'mysql'
+
+    def __init__(self, config):
+        self.host = config['host']
+        self.database = config['database']
+        self.user = config['user']
+        self.password = config['password']
+        self.port = config.get('port', 3306)
+
+    @property
+    def label(self):
+        return f"MySQL - {self.database}"
+
+    def connect(self):
+        return mysql.connector.connect(
+            host=self.host,
+            database=self.database,
+            user=self.user,
+            password=self.password,
+            port=self.port
+        )
+
+    def connect_server(self):
+        """Koneksi untuk create_database_and_tables; database dibuat bila belum ada"""
+        connection = mysql.connector.connect(
+            host=self.host,
+            user=self.user,
+            password=self.password,
+            port=self.port
+        )
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {self.database}")
+            cursor.execute(f"USE {self.database}")
+        finally:
+            cursor.close()
+        return connection
+
+    def explain_index(self, connection, sql, params):
+        """Nama index yang dipakai MySQL untuk `sql` (kolom key EXPLAIN), atau None"""
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute(f"EXPLAIN {sql}", params)
+            plan = cursor.fetchall()
+            return plan[0].get('key') if plan else None
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def trigger_sql(name, event, table, body):
+        return f"CREATE TRIGGER {name} AFTER {event} ON {table} FOR EACH ROW {body}"
+
+
+class SQLiteBackend:
+    """Backend tertanam untuk run lokal, CI dan benchmark tanpa server MySQL.
+
+    Query di database.py tetap ditulis dalam dialek MySQL; SQLiteConnection
+    menerjemahkan konstruksi yang dipakai aplikasi (placeholder %s, INSERT
+    IGNORE, ON DUPLICATE KEY UPDATE, AUTO_INCREMENT, ENUM, DATE_FORMAT)
+    dan mendaftarkan FIELD/GET_LOCK/RELEASE_LOCK sebagai fungsi SQLite.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, config):
+        self.path = config.get('sqlite_path', 'stok_material.db')
+        self.timeout = config.get('pool_timeout', 30)
+
+    @property
+    def label(self):
+        return f"SQLite - {self.path}"
+
+    def connect(self):
+        connection = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,  # koneksi dipinjam bergiliran lewat ConnectionPool
+        )
+        connection.execute("PRAGMA foreign_keys = ON")
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        connection.create_function('FIELD', -1, _field, deterministic=True)
+        connection.create_function('GET_LOCK', 2, lambda name, timeout: 1)
+        connection.create_function('RELEASE_LOCK', 1, lambda name: 1)
+        return SQLiteConnection(connection)
+
+    def connect_server(self):
+        folder = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(folder, exist_ok=True)
+        return self.connect()
+
+    def explain_index(self, connection, sql, params):
+        """Index dari EXPLAIN QUERY PLAN; primary key dilaporkan sebagai 'PRIMARY' seperti MySQL"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            for row in cursor.fetchall():
+                match = re.search(r'USING (?:COVERING )?INDEX (\w+)|USING (INTEGER PRIMARY KEY)', row[-1])
+                if match:
+                    index = match.group(1) or match.group(2)
+                    return 'PRIMARY' if index.startswith('sqlite_autoindex_') or index == 'INTEGER PRIMARY KEY' else index
+            return None
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def trigger_sql(name, event, table, body):
+        return f"CREATE TRIGGER {name} AFTER {event} ON {table} FOR EACH ROW BEGIN {body}; END"
+
+
+BACKENDS = {
+    'mysql': MySQLBackend,
+    'sqlite': SQLiteBackend,
+}
+
+
+def get_backend(config):
+    """Backend sesuai config['backend'] (default 'mysql')"""
+    name = config.get('backend', 'mysql')
+    if name not in BACKENDS:
+        raise ValueError(f"Backend database tidak dikenal: {name}")
+    return BACKENDS[name](config)
+
+
+def _field(value, *options):
+    """FIELD() MySQL: posisi `value` di `options` (mulai 1), 0 bila tidak ada"""
+    try:
+        return options.index(value) + 1
+    except ValueError:
+        return 0
+
+
+def _adapt_datetime(value):
+    # Tengah malam disimpan sebagai tanggal saja, sehingga perbandingan
+    # dengan kolom DATE (teks 'YYYY-MM-DD') sama seperti di MySQL
+    if value.hour == value.minute == value.second == value.microsecond == 0:
+        return value.strftime('%Y-%m-%d')
+    return value.isoformat(' ')
+
+
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_adapter(pd.Timestamp, _adapt_datetime)
+for _type in (np.int8, np.int16, np.int32, np.int64, np.uint8, np.uint16, np.uint32, np.uint64):
+    sqlite3.register_adapter(_type, int)
+for _type in (np.float32, np.float64):
+    sqlite3.register_adapter(_type, float)
+sqlite3.register_adapter(np.bool_, bool)
+sqlite3.register_converter('DATE', lambda b: date.fromisoformat(b.decode()[:10]))
+sqlite3.register_converter('DATETIME', lambda b: datetime.fromisoformat(b.decode()))
+sqlite3.register_converter('TIMESTAMP', lambda b: datetime.fromisoformat(b.decode()))
+
+
+_TRANSLATIONS = [
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\bINSERT\s+IGNORE\b', re.I), 'INSERT OR IGNORE'),
+    (re.compile(r'\bINT\s+AUTO_INCREMENT\s+PRIMARY\s+KEY\b', re.I), 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+    (re.compile(r'\bENUM\s*\([^)]*\)', re.I), 'VARCHAR(20)'),
+    (re.compile(r'\s+ON\s+UPDATE\s+CURRENT_TIMESTAMP\b', re.I), ''),
+    # Hanya format yang sama di MySQL dan strftime (%Y, %m, %d, %H)
+    (re.compile(r"\bDATE_FORMAT\(\s*([\w.]+)\s*,\s*('[^']*')\s*\)", re.I), r'strftime(\2, \1)'),
+]
+_ON_DUPLICATE = re.compile(r'\bON\s+DUPLICATE\s+KEY\s+UPDATE\b', re.I)
+_VALUES_REF = re.compile(r'\bVALUES\((\w+)\)', re.I)
+
+
+@lru_cache(maxsize=512)
+def translate_sql(sql):
+    """Terjemahkan query dialek MySQL aplikasi ke SQLite"""
+    for pattern, replacement in _TRANSLATIONS:
+        sql = pattern.sub(replacement, sql)
+    match = _ON_DUPLICATE.search(sql)
+    if match:
+        # ON DUPLICATE KEY UPDATE x = VALUES(x) -> ON CONFLICT DO UPDATE SET x = excluded.x
+        update = _VALUES_REF.sub(r'excluded.\1', sql[match.end():])
+        sql = sql[:match.start()] + 'ON CONFLICT DO UPDATE SET' + update
+    return sql
+
+
+def _translate_error(e):
+    if isinstance(e, sqlite3.IntegrityError):
+        return errors.IntegrityError(msg=str(e))
+    if isinstance(e, sqlite3.OperationalError):
+        return errors.OperationalError(msg=str(e))
+    return errors.DatabaseError(msg=str(e))
+
+
+class SQLiteCursor:
+    """Cursor sqlite3 dengan antarmuka cursor mysql.connector yang dipakai aplikasi.
+
+    Error sqlite3 diubah menjadi error mysql.connector agar blok
+    `except Error` di database.py berlaku untuk kedua backend.
+    """
+
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        self._dictionary = dictionary
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def execute(self, sql, params=None):
+        try:
+            self._cursor.execute(translate_sql(sql), tuple(params) if params else ())
+        except sqlite3.Error as e:
+            raise _translate_error(e) from e
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        try:
+            self._cursor.executemany(translate_sql(sql), seq_of_params)
+        except sqlite3.Error as e:
+            raise _translate_error(e) from e
+        return self
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip((d[0] for d in self._cursor.description), row))
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size=None):
+        rows = self._cursor.fetchmany(size) if size else self._cursor.fetchmany()
+        return [self._row(row) for row in rows] if self._dictionary else rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        return [self._row(row) for row in rows] if self._dictionary else rows
+
+    def __iter__(self):
+        return (self._row(row) for row in self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """Koneksi sqlite3 dengan method koneksi mysql.connector yang dipakai ConnectionPool/DatabaseManager"""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self, dictionary=False, buffered=None, raw=False):
+        # Cursor sqlite3 selalu membaca bertahap dan nilainya sudah bertipe; `buffered`/`raw` diabaikan
+        return SQLiteCursor(self._connection.cursor(), dictionary)
+
+    @property
+    def in_transaction(self):
+        return self._connection.in_transaction
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def ping(self, reconnect=False):
+        try:
+            self._connection.execute("SELECT 1")
+        except sqlite3.Error as e:
+            raise _translate_error(e) from e
+
+    def is_connected(self):
+        try:
+            self._connection.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def consume_results(self):
+        pass
+
+    def close(self):
+        self._connection.close()
@@ -0,0 +1,58 @@
+"""Utilitas bersama benchmark: metadata run, database SQLite dan penyimpanan hasil JSON."""
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_metadata():
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+    }
+
+
+def sqlite_database(path, fresh=False, **overrides):
+    """DatabaseManager di atas file SQLite `path` dengan skema dan migrasi terpasang.
+
+    Cache query dimatikan (bisa diubah lewat `overrides`) agar setiap
+    pengukuran benar-benar menjalankan query. `fresh=True` menghapus file lama.
+    """
+    from config import SQLITE_CONFIG
+    from database import DatabaseManager
+
+    if fresh:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    db = DatabaseManager({**SQLITE_CONFIG, 'sqlite_path': path, 'query_cache_ttl': 0, **overrides})
+    db.create_database_and_tables()
+    db.run_migrations()
+    return db
+
+
+def save_results(name, results, output=None):
+    """Simpan hasil ke benchmarks/results/<name>-<commit>.json (atau `output`) dan kembalikan path-nya"""
+    payload = {**run_metadata(), 'benchmark': name, 'results': results}
+    path = output or os.path.join(RESULTS_DIR, f"{name}-{payload['commit']}.json")
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2, default=str)
+    return path
@@ -0,0 +1,114 @@
+"""Biaya menyusun DataFrame penjualan: pd.read_sql vs columnar.fetch_frame.
+
+    python -m benchmarks.fetch [--scale 1m] [--repeat 3] [--output hasil.json]
+
+Hasil query get_sales_data pada skala `scale` dibaca sekali dari database
+benchmark, lalu diputar ulang dari memori lewat cursor tiruan sehingga
+yang diukur hanya perakitan DataFrame bertipe, bukan driver. Baris
+diputar dalam dua bentuk: nilai Python bertipe (cursor mysql.connector
+biasa atau sqlite3) dan bytes seperti cursor raw mysql.connector
+(`raw=True`, protokol teks). Waktu end-to-end lewat database ada di
+skenario get_sales_data* dan sales_daily* pada benchmarks.suite.
+"""
+import argparse
+import time
+from datetime import date, datetime
+import pandas as pd
+from benchmarks.common import save_results, sqlite_database
+from benchmarks.suite import SCALES, percentiles, prepare
+
+SQL = """
+    SELECT s.*, p.nama_produk, p.varian, p.jenis
+    FROM sales s
+    JOIN products p ON s.product_id = p.id
+    ORDER BY s.tanggal DESC
+"""
+
+
+class ReplayCursor:
+    """Cursor tiruan yang mengembalikan baris yang sudah dimuat"""
+
+    def __init__(self, columns, rows):
+        self.description = [(column,) for column in columns]
+        self._rows = rows
+        self._pos = 0
+
+    def fetchmany(self, size):
+        rows = self._rows[self._pos:self._pos + size]
+        self._pos += len(rows)
+        return rows
+
+    def fetchall(self):
+        return self.fetchmany(len(self._rows) - self._pos)
+
+
+def _raw_value(value):
+    """Nilai seperti yang dikirim MySQL lewat protokol teks"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S').encode()
+    if isinstance(value, date):
+        return value.isoformat().encode()
+    return str(value).encode()
+
+
+def load_rows(scale):
+    db = sqlite_database(prepare(scale), metrics_enabled=False)
+    with db.connection() as connection:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(SQL)
+            columns = [d[0] for d in cursor.description]
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+    db.pool.dispose()
+    return columns, rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=list(SCALES), default='1m')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--batch-size', type=int, default=50000)
+    parser.add_argument('--output', help="Path file JSON hasil")
+    args = parser.parse_args(argv)
+
+    from columnar import fetch_frame
+    from database import FRAME_DTYPES, _typed_frame
+
+    columns, rows = load_rows(args.scale)
+    raw_rows = [tuple(_raw_value(v) for v in row) for row in rows]
+
+    def read_sql(source):
+        # Yang dilakukan pd.read_sql pada cursor DBAPI, lalu tipe ringkas FRAME_DTYPES
+        cursor = ReplayCursor(columns, source)
+        return _typed_frame(pd.DataFrame.from_records(cursor.fetchall(), columns=columns, coerce_float=True))
+
+    def columnar(source):
+        return fetch_frame(ReplayCursor(columns, source), FRAME_DTYPES, args.batch_size)
+
+    paths = {
+        'read_sql_typed_rows': (read_sql, rows),
+        'columnar_typed_rows': (columnar, rows),
+        'columnar_raw_rows': (columnar, raw_rows),
+    }
+    expected = read_sql(rows)
+    results = {}
+    for name, (fn, source) in paths.items():
+        frame, times = None, []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            frame = fn(source)
+            times.append((time.perf_counter() - started) * 1000)
+        pd.testing.assert_frame_equal(frame, expected, check_categorical=False)
+        results[name] = {'ms': percentiles(times), 'mb': round(frame.memory_usage(deep=True).sum() / 2**20, 1)}
+        print(f"{name:<22} p50 {results[name]['ms']['p50']:>9.1f} ms  ({len(rows) / results[name]['ms']['p50'] * 1000:,.0f} baris/detik)")
+
+    path = save_results('fetch', {'scale': args.scale, 'rows': len(rows), 'paths': results}, args.output)
+    print(f"Hasil: {path}")
+
+
+if __name__ == '__main__':
+    main()
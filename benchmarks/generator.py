@@ -0,0 +1,168 @@
+"""Generator data penjualan sintetis yang deterministik untuk benchmark.
+
+    python -m benchmarks.generator --rows 100000 [--products 165] [--days 730] [--seed 42]
+        [--db benchmarks/data/x.db] [--csv benchmarks/data/x.csv]
+
+Katalog produk diambil dari stok_material_db.sql (nama, varian, jenis,
+harga) dan diperbanyak bila `products` lebih besar. Penjualan per produk
+per hari mengikuti pola data asli: sebagian kecil produk (semen, besi,
+holo) mendominasi, hari Minggu sepi, musim kemarau lebih ramai dan
+sesekali ada pesanan borongan. Seed yang sama selalu menghasilkan data
+yang sama.
+"""
+import argparse
+import os
+import numpy as np
+import pandas as pd
+import importer
+from benchmarks.common import ROOT, sqlite_database
+
+DUMP_PATH = os.path.join(ROOT, 'stok_material_db.sql')
+DATA_DIR = os.path.join(ROOT, 'benchmarks', 'data')
+
+# Faktor hari Senin..Minggu: Sabtu sedikit turun, Minggu sepi
+WEEKDAY_FACTORS = np.array([1.0, 1.0, 1.0, 1.0, 1.05, 0.8, 0.3])
+BULK_RATE = 0.03  # peluang satu transaksi adalah pesanan borongan
+
+
+def dump_catalog():
+    """Produk dari stok_material_db.sql (nama_produk, varian, jenis, harga)"""
+    rows = []
+    for _, columns, batch in importer.iter_sql_dump(DUMP_PATH, {'products'}):
+        rows.extend(dict(zip(columns, row)) for row in batch)
+    return pd.DataFrame(rows, columns=['nama_produk', 'varian', 'jenis', 'harga'])
+
+
+def generate_catalog(n_products, seed=42):
+    """`n_products` produk unik; produk dump dipakai dulu, sisanya varian turunan dengan harga acak ±30%"""
+    rng = np.random.default_rng(seed)
+    base = dump_catalog().drop_duplicates(['nama_produk', 'varian']).reset_index(drop=True)
+    if n_products <= len(base):
+        return base.iloc[:n_products].reset_index(drop=True)
+
+    extra = n_products - len(base)
+    picks = base.iloc[rng.integers(0, len(base), extra)].reset_index(drop=True)
+    picks['varian'] = picks['varian'].fillna('').astype(str) + ' #' + pd.Series(range(2, extra + 2)).astype(str)
+    picks['harga'] = (picks['harga'] * rng.uniform(0.7, 1.3, extra)).round(-2).astype('int64')
+    return pd.concat([base, picks], ignore_index=True)
+
+
+def generate_sales(n_rows, n_products=165, days=730, seed=42, start='2022-01-01'):
+    """(products, sales) dengan kira-kira `n_rows` transaksi dalam `days` hari.
+
+    `sales` berkolom tanggal, product_index (posisi di `products`), jumlah,
+    harga_satuan, total_harga dan diurutkan menurut tanggal.
+    """
+    rng = np.random.default_rng(seed)
+    products = generate_catalog(n_products, seed)
+    dates = pd.date_range(start, periods=days, freq='D')
+
+    # Popularitas mirip Zipf: beberapa produk laku keras, sisanya jarang
+    popularity = 1.0 / np.arange(1, n_products + 1) ** 0.9
+    popularity = rng.permutation(popularity)
+    # Musim kemarau (Juni-September) puncak proyek bangunan, ditambah tren naik pelan
+    day_of_year = dates.dayofyear.to_numpy()
+    seasonal = 1.0 + 0.35 * np.cos(2 * np.pi * (day_of_year - 213) / 365.25)
+    trend = np.linspace(0.9, 1.1, days)
+    daily = WEEKDAY_FACTORS[dates.weekday.to_numpy()] * seasonal * trend
+
+    rate = np.outer(popularity, daily)
+    rate *= n_rows / rate.sum()
+    counts = rng.poisson(rate)
+
+    product_index, day_index = np.nonzero(counts)
+    repeats = counts[product_index, day_index]
+    product_index = np.repeat(product_index, repeats)
+    day_index = np.repeat(day_index, repeats)
+
+    jumlah = 1 + rng.poisson(2.0, len(product_index))
+    bulk = rng.random(len(product_index)) < BULK_RATE
+    jumlah[bulk] *= rng.integers(10, 50, int(bulk.sum()))
+    harga_satuan = products['harga'].to_numpy(dtype='int64')[product_index]
+
+    sales = pd.DataFrame({
+        'tanggal': dates[day_index],
+        'product_index': product_index,
+        'jumlah': jumlah.astype('float64'),
+        'harga_satuan': harga_satuan,
+        'total_harga': jumlah * harga_satuan,
+    }).sort_values(['tanggal', 'product_index'], kind='stable').reset_index(drop=True)
+    return products, sales
+
+
+def to_import_frame(products, sales):
+    """Format file import aplikasi (Tanggal, Produk, Varian, Jumlah, Jenis, Harga satuan)"""
+    catalog = products.iloc[sales['product_index'].to_numpy()].reset_index(drop=True)
+    return pd.DataFrame({
+        'Tanggal': sales['tanggal'].dt.strftime('%Y-%m-%d'),
+        'Produk': catalog['nama_produk'],
+        'Varian': catalog['varian'],
+        'Jumlah': sales['jumlah'],
+        'Jenis': catalog['jenis'],
+        'Harga': sales['harga_satuan'],
+    })
+
+
+def write_csv(path, products, sales):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    to_import_frame(products, sales).to_csv(path, index=False)
+    return path
+
+
+def build_database(db, products, sales, batch_size=50000):
+    """Isi database kosong (skema + migrasi sudah dijalankan) lalu bangun ulang sales_daily"""
+    with db.connection() as connection:
+        cursor = connection.cursor()
+        try:
+            cursor.executemany(
+                "INSERT INTO products (nama_produk, varian, jenis, harga) VALUES (%s, %s, %s, %s)",
+                list(products[['nama_produk', 'varian', 'jenis', 'harga']].itertuples(index=False, name=None)),
+            )
+            cursor.execute("SELECT id, nama_produk, varian FROM products")
+            ids = {(nama, varian): pid for pid, nama, varian in cursor.fetchall()}
+            product_ids = np.array([ids[key] for key in zip(products['nama_produk'], products['varian'])])
+
+            rows = zip(
+                sales['tanggal'].dt.date.tolist(),
+                product_ids[sales['product_index'].to_numpy()].tolist(),
+                sales['jumlah'].tolist(),
+                sales['harga_satuan'].tolist(),
+                sales['total_harga'].tolist(),
+            )
+            while True:
+                batch = [row for _, row in zip(range(batch_size), rows)]
+                if not batch:
+                    break
+                cursor.executemany("""
+                    INSERT INTO sales (tanggal, product_id, jumlah, harga_satuan, total_harga)
+                    VALUES (%s, %s, %s, %s, %s)
+                """, batch)
+            db._bump_table_versions(cursor, 'products', 'sales')
+            connection.commit()
+        finally:
+            cursor.close()
+    return db.rebuild_sales_daily()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, required=True)
+    parser.add_argument('--products', type=int, default=165)
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', help="File SQLite yang dibuat/diisi")
+    parser.add_argument('--csv', help="File CSV format import")
+    args = parser.parse_args(argv)
+
+    products, sales = generate_sales(args.rows, args.products, args.days, args.seed)
+    print(f"{len(sales):,} transaksi, {len(products)} produk, {args.days} hari")
+    if args.csv:
+        print(f"CSV: {write_csv(args.csv, products, sales)}")
+    if args.db:
+        db = sqlite_database(args.db, fresh=True)
+        build_database(db, products, sales)
+        print(f"SQLite: {args.db}")
+
+
+if __name__ == '__main__':
+    main()
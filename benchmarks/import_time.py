@@ -0,0 +1,73 @@
+"""Waktu import modul aplikasi di interpreter baru (python -X importtime).
+
+    python -m benchmarks.import_time [--repeat 5] [--output hasil.json]
+
+Yang paling penting adalah `login`: modul yang diimport app.py sebelum
+halaman mana pun dibuka. Halaman dan dependensi berat (sklearn, plotly,
+st_aggrid) seharusnya tidak ikut di sana.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from benchmarks.common import ROOT, save_results
+
+# Skenario: nama -> modul yang diimport bersamaan
+SCENARIOS = {
+    'login': ['database', 'prediction', 'model_registry', 'restock_job', 'importer'],
+    'page_dashboard': ['app_pages.dashboard'],
+    'page_products': ['app_pages.products'],
+    'page_sales': ['app_pages.sales'],
+    'page_prediction': ['app_pages.prediction'],
+    'page_reports': ['app_pages.reports'],
+    'forecast_fit': ['prediction', 'sklearn.linear_model', 'sklearn.preprocessing'],
+}
+HEAVY_MODULES = ('sklearn', 'plotly', 'st_aggrid', 'joblib', 'openpyxl', 'pyarrow')
+
+
+def measure(modules):
+    """(total mikrodetik, modul berat yang ikut terimport) untuk satu interpreter baru"""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import ' + ', '.join(modules)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    total, loaded = 0, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Modul tingkat atas diawali satu spasi; tiap tingkat anak menambah dua
+        top_level = len(name) - len(name.lstrip()) == 1
+        name = name.strip()
+        if top_level:
+            total += int(cumulative)
+        if name.split('.')[0] in HEAVY_MODULES:
+            loaded.add(name.split('.')[0])
+    return total, sorted(loaded)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help="Path file JSON hasil")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for scenario, modules in SCENARIOS.items():
+        runs, heavy = [], []
+        for _ in range(args.repeat):
+            total, heavy = measure(modules)
+            runs.append(total / 1000)
+        results[scenario] = {
+            'modules': modules,
+            'median_ms': round(statistics.median(runs), 1),
+            'min_ms': round(min(runs), 1),
+            'heavy_modules': heavy,
+        }
+        print(f"{scenario:<16} {results[scenario]['median_ms']:>8.1f} ms  berat: {', '.join(heavy) or '-'}")
+
+    print(f"Hasil: {save_results('import_time', results, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,312 @@
+"""Benchmark skenario utama aplikasi pada data sintetis 10k/100k/1M baris.
+
+    python -m benchmarks.suite [--scale 10k --scale 100k] [--scenario get_sales_data ...]
+        [--repeat 5] [--output hasil.json] [--compare hasil_lama.json]
+
+Setiap skala dibangun sekali dengan benchmarks.generator ke file SQLite di
+benchmarks/data/ (dipakai ulang pada run berikutnya). Setiap skenario
+berjalan di proses terpisah sehingga peak RSS tidak tercampur antar
+skenario. Dilaporkan persentil latensi (ms), jumlah query per pemanggilan
+dan peak RSS. Hasil disimpan sebagai JSON lewat benchmarks.common;
+`--compare` menampilkan perubahan p50 terhadap hasil run lain.
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+import numpy as np
+from benchmarks.common import ROOT, save_results, sqlite_database
+from benchmarks import generator
+
+# skala: (baris, produk, hari)
+SCALES = {
+    '10k': (10_000, 60, 365),
+    '100k': (100_000, 165, 730),
+    '1m': (1_000_000, 300, 1095),
+}
+SEED = 42
+
+
+def _db_path(scale):
+    rows, products, days = SCALES[scale]
+    return os.path.join(generator.DATA_DIR, f"sales-{rows}-{products}-{days}-{SEED}.db")
+
+
+def _csv_path(scale):
+    return _db_path(scale)[:-3] + '.csv'
+
+
+def prepare(scale):
+    """Bangun database (dan CSV import) untuk `scale` bila belum ada"""
+    path = _db_path(scale)
+    if os.path.exists(path) and os.path.exists(_csv_path(scale)):
+        return path
+    rows, n_products, days = SCALES[scale]
+    started = time.perf_counter()
+    products, sales = generator.generate_sales(rows, n_products, days, SEED)
+    generator.write_csv(_csv_path(scale), products, sales)
+    tmp = path + '.tmp'
+    db = sqlite_database(tmp, fresh=True)
+    generator.build_database(db, products, sales)
+    db.pool.dispose()
+    os.replace(tmp, path)
+    print(f"[{scale}] data dibuat: {len(sales):,} transaksi ({time.perf_counter() - started:.1f} detik)")
+    return path
+
+
+class QueryCounter:
+    """Hitung execute/executemany di semua koneksi yang dibuka backend `db`"""
+
+    def __init__(self, db):
+        self.count = 0
+        connect = db.backend.connect
+        db.backend.connect = lambda: _CountingConnection(connect(), self)
+        # Koneksi yang sudah ada di pool (mis. dari run_migrations) dibuka ulang lewat penghitung
+        db.pool.dispose()
+
+
+class _CountingConnection:
+    def __init__(self, connection, counter):
+        self._connection = connection
+        self._counter = counter
+
+    def cursor(self, *args, **kwargs):
+        return _CountingCursor(self._connection.cursor(*args, **kwargs), self._counter)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+class _CountingCursor:
+    def __init__(self, cursor, counter):
+        self._cursor = cursor
+        self._counter = counter
+
+    def execute(self, *args, **kwargs):
+        self._counter.count += 1
+        return self._cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        self._counter.count += 1
+        return self._cursor.executemany(*args, **kwargs)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class Context:
+    """State satu proses skenario: database, predictor dan path data skala"""
+
+    def __init__(self, scale):
+        self.scale = scale
+        self.db = sqlite_database(_db_path(scale))
+        self.queries = QueryCounter(self.db)
+        self._predictor = None
+        self._tmpdir = None
+        self._import_db = None
+
+    @property
+    def predictor(self):
+        if self._predictor is None:
+            from prediction import SalesPredictor
+            self._predictor = SalesPredictor(self.db)
+        return self._predictor
+
+    def top_product(self):
+        top = self.db.sales_by_product()
+        return int(top['product_id'].iloc[0])
+
+    def fresh_database(self):
+        """Database kosong baru (skema + migrasi) untuk skenario import"""
+        if self._tmpdir is None:
+            self._tmpdir = tempfile.mkdtemp(prefix='stok_bench_')
+        if self._import_db is not None:
+            self._import_db.pool.dispose()
+        self._import_db = sqlite_database(os.path.join(self._tmpdir, 'import.db'), fresh=True)
+        return self._import_db
+
+    def close(self):
+        if self._import_db is not None:
+            self._import_db.pool.dispose()
+        if self._tmpdir:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+
+
+def _render(page):
+    def setup(ctx):
+        import importlib
+        module = importlib.import_module(f'app_pages.{page}')
+        if page == 'prediction':
+            return lambda: module.render(ctx.db, ctx.predictor)
+        return lambda: module.render(ctx.db)
+    return setup
+
+
+def _import_setup(ctx):
+    db = ctx.fresh_database()
+    ctx.queries = QueryCounter(db)
+    path = _csv_path(ctx.scale)
+
+    def run():
+        with open(path, 'rb') as f:
+            stats = db.import_excel_data(f, os.path.basename(path))
+        if not stats:
+            raise RuntimeError("import gagal")
+    return run
+
+
+def _predict_setup(ctx):
+    product_id = ctx.top_product()
+    ctx.predictor.registry.discard()
+    return lambda: ctx.predictor.predict_sales(product_id, 30)
+
+
+def _restock_setup(ctx):
+    ctx.predictor.registry.discard()
+    return lambda: ctx.predictor.get_restock_recommendations(30)
+
+
+# Skenario: nama -> (setup(ctx) -> fungsi yang diukur, maksimum ulangan, pemanasan).
+# setup dijalankan sebelum setiap ulangan dan tidak ikut diukur. Pemanasan
+# (satu pemanggilan tanpa diukur) menyingkirkan biaya import modul dan
+# koneksi pertama; dilewati untuk import yang mahal di skala besar.
+SCENARIOS = {
+    'get_sales_data': (lambda ctx: ctx.db.get_sales_data, None, True),
+    'get_sales_data_read_sql': (lambda ctx: lambda: ctx.db.get_sales_data(columnar=False), None, True),
+    'sales_daily': (lambda ctx: ctx.db.sales_daily, None, True),
+    'sales_daily_read_sql': (lambda ctx: lambda: ctx.db.sales_daily(columnar=False), None, True),
+    'query_sales_page': (lambda ctx: lambda: ctx.db.query_sales(limit=50), None, True),
+    'sales_by_month': (lambda ctx: ctx.db.sales_by_month, None, True),
+    'import_excel_data': (_import_setup, 3, False),
+    'predict_sales': (_predict_setup, None, True),
+    'restock_recommendations': (_restock_setup, 3, True),
+    'render_dashboard': (_render('dashboard'), None, True),
+    'render_products': (_render('products'), None, True),
+    'render_sales': (_render('sales'), None, True),
+    'render_reports': (_render('reports'), None, True),
+    'render_prediction': (_render('prediction'), None, True),
+}
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux melaporkan KB, macOS byte
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def percentiles(values):
+    values = np.asarray(values, dtype=float)
+    return {
+        'min': float(values.min()),
+        'p50': float(np.percentile(values, 50)),
+        'p95': float(np.percentile(values, 95)),
+        'p99': float(np.percentile(values, 99)),
+        'max': float(values.max()),
+        'mean': float(values.mean()),
+    }
+
+
+def run_scenario(scale, name, repeat):
+    """Jalankan satu skenario di proses ini; dipanggil oleh proses anak"""
+    warnings.filterwarnings('ignore')
+    import streamlit.logger
+    streamlit.logger.set_log_level('error')
+
+    setup, max_repeat, warmup = SCENARIOS[name]
+    repeat = min(repeat, max_repeat) if max_repeat else repeat
+    ctx = Context(scale)
+    try:
+        if warmup:
+            setup(ctx)()
+        rss_before = _peak_rss_mb()
+        times, queries = [], []
+        for _ in range(repeat):
+            fn = setup(ctx)
+            ctx.queries.count = 0
+            started = time.perf_counter()
+            fn()
+            times.append((time.perf_counter() - started) * 1000)
+            queries.append(ctx.queries.count)
+    finally:
+        ctx.close()
+    return {
+        'runs': repeat,
+        'ms': percentiles(times),
+        'queries': int(np.median(queries)),
+        'rss_peak_mb': round(_peak_rss_mb(), 1),
+        'rss_warm_mb': round(rss_before, 1),
+    }
+
+
+def _spawn(scale, name, repeat):
+    proc = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.suite', '--child', scale, name, '--repeat', str(repeat)],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith('{'):
+            return json.loads(line)
+    return {'error': (proc.stderr.strip().splitlines() or ['gagal'])[-1]}
+
+
+def compare(results, path):
+    """Cetak perubahan p50 terhadap file hasil lain"""
+    with open(path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\nDibanding {os.path.basename(path)} (commit {baseline.get('commit')}):")
+    for scale, scenarios in results.items():
+        for name, result in scenarios.items():
+            old = baseline['results']['scenarios'].get(scale, {}).get(name, {})
+            if 'ms' not in result or 'ms' not in old:
+                continue
+            change = (result['ms']['p50'] / old['ms']['p50'] - 1) * 100 if old['ms']['p50'] else 0.0
+            print(f"  {scale:>5} {name:<24} {old['ms']['p50']:>10.1f} -> {result['ms']['p50']:>10.1f} ms ({change:+.0f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', action='append', choices=list(SCALES), help="Default: 10k dan 100k")
+    parser.add_argument('--scenario', action='append', choices=list(SCENARIOS), help="Default: semua")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help="Path file JSON hasil")
+    parser.add_argument('--compare', help="File JSON hasil run lain sebagai pembanding")
+    parser.add_argument('--child', nargs=2, metavar=('SCALE', 'SCENARIO'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_scenario(*args.child, args.repeat)))
+        return
+
+    results = {}
+    for scale in args.scale or ['10k', '100k']:
+        prepare(scale)
+        results[scale] = {}
+        for name in args.scenario or list(SCENARIOS):
+            result = results[scale][name] = _spawn(scale, name, args.repeat)
+            if 'error' in result:
+                print(f"[{scale}] {name:<24} GAGAL: {result['error']}")
+                continue
+            ms = result['ms']
+            print(
+                f"[{scale}] {name:<24} p50 {ms['p50']:>9.1f} ms  p95 {ms['p95']:>9.1f} ms  "
+                f"{result['queries']:>4} query  RSS {result['rss_peak_mb']:>7.1f} MB"
+            )
+
+    scales = {scale: dict(zip(('rows', 'products', 'days'), SCALES[scale])) for scale in results}
+    path = save_results('suite', {'seed': SEED, 'scales': scales, 'scenarios': results}, args.output)
+    print(f"\nHasil: {path}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
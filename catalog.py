@@ -0,0 +1,71 @@
+import sys
+import pandas as pd
+
+
+def format_rupiah(values):
+    """Format angka menjadi '1.250.000' per elemen Series; nilai kosong/tidak valid menjadi '0'"""
+    numbers = pd.to_numeric(values, errors='coerce').fillna(0).astype('int64')
+    return numbers.map('{:,}'.format).str.replace(',', '.', regex=False)
+
+
+def text_values(values):
+    """Series teks (termasuk category) sebagai str dengan nilai kosong menjadi ''"""
+    return values.astype(object).fillna('').astype(str)
+
+
+def format_product_table(products_df):
+    """Tabel tampilan produk (Nama Produk, Varian, Jenis, Harga (Rp)) dibangun per kolom"""
+    return pd.DataFrame({
+        'Nama Produk': text_values(products_df['nama_produk']),
+        'Varian': text_values(products_df['varian']),
+        'Jenis': text_values(products_df['jenis']),
+        'Harga (Rp)': format_rupiah(products_df['harga']),
+    }).reset_index(drop=True)
+
+
+class ProductCatalog:
+    """Lookup produk yang dibangun sekali per versi tabel products.
+
+    Dipakai halaman untuk pilihan selectbox (`ids`, `label`) dan pencarian
+    per id tanpa memfilter DataFrame produk berulang kali. Objek ini
+    read-only sehingga aman dibagi antar sesi lewat cache query.
+    """
+
+    def __init__(self, products_df):
+        df = products_df.reset_index(drop=True)
+        self.df = df
+        if df.empty:
+            self.ids, self.labels, self.names, self._index, self._by_name = [], {}, [], {}, {}
+            return
+        nama = text_values(df['nama_produk'])
+        varian = text_values(df['varian'])
+        self.ids = df['id'].tolist()
+        self.labels = dict(zip(self.ids, (nama + ' - ' + varian).tolist()))
+        self.names = sorted(nama.unique().tolist())
+        self._index = {product_id: i for i, product_id in enumerate(self.ids)}
+        self._by_name = {name: ids.tolist() for name, ids in df.groupby(nama, sort=False)['id']}
+
+    @property
+    def empty(self):
+        return not self.ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, product_id):
+        return product_id in self._index
+
+    def __sizeof__(self):
+        return int(self.df.memory_usage(deep=True).sum()) + sys.getsizeof(self.labels) + sys.getsizeof(self._index)
+
+    def label(self, product_id):
+        return self.labels.get(product_id, str(product_id))
+
+    def get(self, product_id):
+        """Baris produk sebagai dict, atau None"""
+        i = self._index.get(product_id)
+        return None if i is None else self.df.iloc[i].to_dict()
+
+    def ids_for_name(self, nama_produk):
+        """Semua id produk (semua varian) dengan nama tersebut"""
+        return self._by_name.get(nama_produk, [])
@@ -0,0 +1,81 @@
+"""Fetch hasil query langsung ke array NumPy per kolom untuk DataFrame besar.
+
+pd.read_sql mengambil semua baris sebagai list tuple (fetchall), menebak
+tipe setiap kolom, dan tipe ringkas masih harus diterapkan sesudahnya.
+fetch_frame membaca cursor per `batch_size` baris dengan fetchmany,
+mengubah setiap batch menjadi satu array bertipe per kolom lalu membuang
+tuple barisnya, dan menyusun DataFrame sekali di akhir. Dengan cursor raw
+mysql.connector (`raw=True`) nilai tiba sebagai bytes dan diurai NumPy
+per kolom sekaligus, tanpa objek int/date/Decimal per nilai.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _column(values, dtype):
+    """Array satu kolom dari satu batch -> array bertipe `dtype`; tetap object bila tidak bisa diurai"""
+    if dtype is None or dtype == 'category' or values.dtype != object:
+        return values
+    first = next((v for v in values if v is not None), None)
+    if isinstance(first, bytearray):
+        # Cursor raw pure-Python mengembalikan bytearray
+        values = np.array([None if v is None else bytes(v) for v in values], dtype=object)
+        first = bytes(first)
+    is_date = str(dtype).startswith('datetime64')
+    try:
+        # NULL menjadi NaN/NaT untuk float dan tanggal; untuk integer (dan
+        # bytes) konversi gagal sehingga batch ini tetap object
+        if isinstance(first, bytes):
+            return values.astype('S').astype('datetime64[us]' if is_date else dtype)
+        if is_date:
+            return pd.to_datetime(values).to_numpy()
+        return values.astype(dtype)
+    except (TypeError, ValueError):
+        return values
+
+
+def _decode(values):
+    return np.array([v.decode() if isinstance(v, bytes) else v for v in values], dtype=object)
+
+
+def _categorical(values):
+    """Kategori dari array object; hanya nilai unik yang didekode"""
+    codes, uniques = pd.factorize(values)
+    categorical = pd.Categorical.from_codes(codes, categories=_decode(uniques))
+    return categorical.reorder_categories(categorical.categories.sort_values())
+
+
+def _finish(chunks, dtype):
+    values = np.concatenate(chunks) if len(chunks) > 1 else chunks[0]
+    if dtype == 'category':
+        return _categorical(values)
+    if values.dtype == object:
+        # NULL integer atau nilai yang tidak bisa diurai: jalur lambat pandas
+        values = pd.Series(_decode(values)).infer_objects()
+        return values.astype(dtype) if dtype is not None else values
+    return values.astype(dtype, copy=False) if dtype is not None else values
+
+
+def fetch_frame(cursor, dtypes, batch_size=50000):
+    """DataFrame dari cursor yang sudah di-execute, dengan tipe kolom dari `dtypes`.
+
+    Kolom yang tidak ada di `dtypes` dikembalikan apa adanya (bytes
+    didekode menjadi str). Seluruh hasil dibaca sehingga cursor unbuffered
+    aman ditutup sesudahnya.
+    """
+    columns = [d[0] for d in cursor.description]
+    chunks = {column: [] for column in columns}
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        # Transpose baris -> kolom dilakukan pandas di C; dtype=object melewati
+        # penebakan tipe karena tipe diambil dari `dtypes`
+        batch = pd.DataFrame(rows, columns=columns, dtype=object)
+        del rows
+        for column in columns:
+            chunks[column].append(_column(batch[column].to_numpy(), dtypes.get(column)))
+
+    if not columns or not chunks[columns[0]]:
+        return pd.DataFrame({column: pd.Series(dtype=dtypes.get(column, object)) for column in columns})
+    return pd.DataFrame({column: _finish(chunks[column], dtypes.get(column)) for column in columns})
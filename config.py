@@ -1,2 +1,38 @@
-DB_CONFIG = {'host': 'localhost', 'user': 'root', 'password': '', 'port': 3306, 'database': 'stok_material_db'}
+DB_CONFIG = {
+    'backend': 'mysql',         # 'mysql' atau 'sqlite' (lokal/CI/benchmark tanpa server)
+    'sqlite_path': 'stok_material.db',  # file database untuk backend 'sqlite'
+    'host': 'localhost', 'user': 'root', 'password': '', 'port': 3306, 'database': 'stok_material_db',
+    # Connection pool (dibagi oleh semua sesi Streamlit)
+    'pool_size': 5,             # koneksi idle yang dipertahankan
+    'pool_max_overflow': 10,    # koneksi tambahan saat beban puncak
+    'pool_timeout': 30,         # detik menunggu koneksi bebas
+    'pool_recycle': 3600,       # detik sebelum koneksi dibuka ulang
+    'pool_pre_ping': True,      # ping koneksi sebelum dipinjam
+    'import_batch_size': 1000,  # baris per executemany saat import
+    'import_chunk_size': 5000,  # baris per potongan file (commit + checkpoint)
+    'export_batch_size': 5000,  # baris per fetchmany saat ekspor laporan
+    'export_max_mb': 100,       # batas ukuran file ekspor yang bisa diunduh (dimuat utuh ke memori saat diunduh)
+    'columnar_fetch': True,     # muat penjualan besar lewat columnar.fetch_frame (False = pd.read_sql)
+    'fetch_batch_size': 50000,  # baris per fetchmany pada columnar_fetch
+    'forecast_mode': 'recursive',  # 'recursive' (lag harian) atau 'basic' (per transaksi)
+    'forecast_workers': 0,      # thread paralel untuk prediksi massal (0/1 = serial)
+    'forecast_threads': 2,      # thread latar untuk prediksi per produk di halaman (0 = langsung di skrip)
+    'model_cache_size': 500,    # model produk yang disimpan di memori (LRU)
+    'model_dir': 'models',      # folder artefak model (python manage.py train-models)
+    'restock_workers': 2,       # thread paralel job rekomendasi restock
+    'restock_interval': 3600,   # detik antar refresh restock di latar (0 = hanya manual)
+    'query_cache_ttl': 3600,    # detik hasil query di-cache (0 = nonaktif); perubahan dideteksi lewat table_versions
+    'query_cache_size': 256,    # maksimum entri cache query (LRU)
+    'query_cache_max_mb': 256,  # maksimum memori cache query
+    'table_version_triggers': False,  # pasang trigger MySQL bila tabel juga ditulis tool lain
+    'metrics_enabled': True,    # catat waktu query/render/forecast (halaman Performa)
+    'slow_query_ms': 500,       # query selama ini dicetak beserta parameternya (0 = nonaktif)
+    'metrics_textfile': None,   # path file metrik Prometheus (textfile collector), None = tidak ditulis
+    'metrics_interval': 15,     # detik minimum antar penulisan metrics_textfile
+}
+
+# Database tertanam untuk run lokal, CI dan benchmark; isi dengan
+# `python manage.py load-dump stok_material_db.sql`
+SQLITE_CONFIG = {**DB_CONFIG, 'backend': 'sqlite'}
+
 ACTIVE_CONFIG = DB_CONFIG
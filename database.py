@@ -1,45 +1,483 @@
-import mysql.connector
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 from mysql.connector import Error
 import pandas as pd
 import bcrypt
-from datetime import datetime
+from datetime import datetime, timedelta
 from config import ACTIVE_CONFIG
+import backends
+import importer
+from columnar import fetch_frame
+import exporter
+from catalog import ProductCatalog
+from instrumentation import Metrics
+from query_cache import QueryCache, cached_query
+
+
+class PoolTimeoutError(Error):
+    """Tidak ada koneksi bebas di pool dalam batas waktu checkout"""
+
+
+class ConnectionPool:
+    """Pool koneksi thread-safe dengan overflow, pre-ping dan recycle.
+
+    `size` koneksi idle dipertahankan; saat semuanya dipinjam, pool boleh
+    membuka hingga `max_overflow` koneksi tambahan yang ditutup kembali
+    ketika dikembalikan. Peminjam berikutnya menunggu hingga `timeout` detik.
+    """
+
+    def __init__(self, factory, size=5, max_overflow=10, timeout=30, recycle=3600, pre_ping=True):
+        self._factory = factory
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self._idle = deque()
+        self._created_at = {}
+        self._opened = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        connection = None
+        with self._cond:
+            while True:
+                if self._idle:
+                    connection = self._idle.pop()
+                    break
+                if self._opened < self.size + self.max_overflow:
+                    self._opened += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(
+                        msg=f"Pool koneksi penuh ({self._opened} koneksi), timeout {self.timeout}s"
+                    )
+                self._cond.wait(remaining)
+
+        if connection is not None and not self._is_usable(connection):
+            self._close(connection)
+            connection = None
+
+        if connection is None:
+            try:
+                connection = self._factory()
+            except Exception:
+                with self._cond:
+                    self._opened -= 1
+                    self._cond.notify()
+                raise
+            self._created_at[id(connection)] = time.monotonic()
+        return connection
+
+    def release(self, connection, discard=False):
+        if not discard:
+            try:
+                # Akhiri transaksi/snapshot yang tertinggal agar peminjam
+                # berikutnya tidak membaca data basi
+                if connection.in_transaction:
+                    connection.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            if not discard and len(self._idle) < self.size:
+                self._idle.append(connection)
+                self._cond.notify()
+                return
+            self._opened -= 1
+            self._cond.notify()
+        self._close(connection)
+
+    def dispose(self):
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._opened -= len(idle)
+        for connection in idle:
+            self._close(connection)
+
+    def status(self):
+        with self._cond:
+            return {'opened': self._opened, 'idle': len(self._idle),
+                    'in_use': self._opened - len(self._idle)}
+
+    def _is_usable(self, connection):
+        created_at = self._created_at.get(id(connection), 0)
+        if self.recycle and time.monotonic() - created_at > self.recycle:
+            return False
+        if self.pre_ping:
+            try:
+                connection.ping(reconnect=False)
+            except Exception:
+                return False
+        return True
+
+    def _close(self, connection):
+        self._created_at.pop(id(connection), None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+SALES_COLUMNS = {
+    'id': 's.id',
+    'tanggal': 's.tanggal',
+    'product_id': 's.product_id',
+    'jumlah': 's.jumlah',
+    'harga_satuan': 's.harga_satuan',
+    'total_harga': 's.total_harga',
+    'created_at': 's.created_at',
+    'nama_produk': 'p.nama_produk',
+    'varian': 'p.varian',
+    'jenis': 'p.jenis',
+}
+
+# Tipe kolom tetap untuk DataFrame hasil query, dikonversi sekali saat dimuat:
+# teks produk sebagai category (tiap nilai disimpan sekali), id int32, jumlah
+# float32 (sesuai FLOAT di skema) dan tanggal datetime64, sehingga halaman
+# tidak perlu pd.to_datetime/astype lagi. Kolom yang tidak ada di sini dibiarkan.
+FRAME_DTYPES = {
+    'id': 'int32',
+    'product_id': 'int32',
+    'tanggal': 'datetime64[ns]',
+    'jumlah': 'float32',
+    'harga': 'int32',
+    'harga_satuan': 'int32',
+    'total_harga': 'int64',
+    'qty': 'float64',
+    'revenue': 'int64',
+    'tx_count': 'int32',
+    'nama_produk': 'category',
+    'varian': 'category',
+    'jenis': 'category',
+    'created_at': 'datetime64[ns]',
+    'updated_at': 'datetime64[ns]',
+    'computed_at': 'datetime64[ns]',
+}
+
+
+def _typed_frame(df):
+    """Terapkan FRAME_DTYPES pada kolom `df` yang dikenal"""
+    return df.astype({column: dtype for column, dtype in FRAME_DTYPES.items() if column in df.columns})
+
+
+# Migrasi skema berversi: (versi, deskripsi, perintah SQL). Tambahkan entri
+# baru di akhir daftar; versi yang sudah tercatat di schema_version dilewati.
+MIGRATIONS = [
+    (1, "index sales(tanggal)", [
+        "CREATE INDEX idx_sales_tanggal ON sales (tanggal)",
+    ]),
+    (2, "index sales(product_id, tanggal)", [
+        "CREATE INDEX idx_sales_product_tanggal ON sales (product_id, tanggal)",
+    ]),
+    (3, "index unik products(nama_produk, varian)", [
+        # Gabungkan produk duplikat ke id terkecil sebelum index unik dibuat.
+        # Perintah berbentuk dict berbeda per backend (UPDATE/DELETE ... JOIN hanya ada di MySQL).
+        {'mysql': """
+        UPDATE sales s
+        JOIN products p ON s.product_id = p.id
+        JOIN (
+            SELECT nama_produk, varian, MIN(id) AS keep_id
+            FROM products
+            GROUP BY nama_produk, varian
+        ) k ON p.nama_produk = k.nama_produk AND p.varian = k.varian
+        SET s.product_id = k.keep_id
+        WHERE p.id <> k.keep_id
+        """, 'sqlite': """
+        UPDATE sales SET product_id = (
+            SELECT MIN(k.id) FROM products p
+            JOIN products k ON k.nama_produk = p.nama_produk AND k.varian = p.varian
+            WHERE p.id = sales.product_id
+        )
+        WHERE product_id IN (
+            SELECT p.id FROM products p
+            JOIN products k ON k.nama_produk = p.nama_produk AND k.varian = p.varian AND k.id < p.id
+        )
+        """},
+        {'mysql': """
+        DELETE p FROM products p
+        JOIN (
+            SELECT nama_produk, varian, MIN(id) AS keep_id
+            FROM products
+            GROUP BY nama_produk, varian
+        ) k ON p.nama_produk = k.nama_produk AND p.varian = k.varian
+        WHERE p.id <> k.keep_id
+        """, 'sqlite': """
+        DELETE FROM products WHERE id IN (
+            SELECT p.id FROM products p
+            JOIN products k ON k.nama_produk = p.nama_produk AND k.varian = p.varian AND k.id < p.id
+        )
+        """},
+        "CREATE UNIQUE INDEX uq_products_nama_varian ON products (nama_produk, varian)",
+    ]),
+    (4, "tabel import_checkpoints", [
+        """
+        CREATE TABLE IF NOT EXISTS import_checkpoints (
+            file_hash CHAR(40) PRIMARY KEY,
+            file_name VARCHAR(255),
+            rows_done INT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+    (5, "tabel restock_recommendations", [
+        """
+        CREATE TABLE IF NOT EXISTS restock_recommendations (
+            product_id INT PRIMARY KEY,
+            days_ahead INT NOT NULL,
+            predicted_demand FLOAT NOT NULL,
+            recommended_order INT NOT NULL,
+            urgency VARCHAR(10) NOT NULL,
+            method VARCHAR(50),
+            confidence VARCHAR(20),
+            watermark_max_id INT,
+            watermark_count INT,
+            computed_at DATETIME NOT NULL,
+            FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE
+        )
+        """,
+    ]),
+    (6, "tabel table_versions", [
+        """
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name VARCHAR(64) PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        INSERT IGNORE INTO table_versions (table_name, version) VALUES
+            ('products', 0), ('sales', 0), ('users', 0), ('restock_recommendations', 0)
+        """,
+    ]),
+    (7, "rollup sales_daily", [
+        """
+        CREATE TABLE IF NOT EXISTS sales_daily (
+            product_id INT NOT NULL,
+            tanggal DATE NOT NULL,
+            qty DOUBLE NOT NULL DEFAULT 0,
+            revenue BIGINT NOT NULL DEFAULT 0,
+            tx_count INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (product_id, tanggal),
+            FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE
+        )
+        """,
+        "CREATE INDEX idx_sales_daily_tanggal ON sales_daily (tanggal)",
+        """
+        INSERT INTO sales_daily (product_id, tanggal, qty, revenue, tx_count)
+        SELECT product_id, tanggal, SUM(jumlah), SUM(total_harga), COUNT(*)
+        FROM sales
+        WHERE product_id IS NOT NULL
+        GROUP BY product_id, tanggal
+        ON DUPLICATE KEY UPDATE
+            qty = VALUES(qty), revenue = VALUES(revenue), tx_count = VALUES(tx_count)
+        """,
+    ]),
+]
+
+# Tambah total harian ke sales_daily; dipakai add_sale dan import dalam transaksi yang sama
+SALES_DAILY_UPSERT = """
+    INSERT INTO sales_daily (product_id, tanggal, qty, revenue, tx_count)
+    VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        qty = qty + VALUES(qty),
+        revenue = revenue + VALUES(revenue),
+        tx_count = tx_count + VALUES(tx_count)
+"""
+
+# Tabel yang perubahannya dilacak di table_versions. Trigger opsional
+# (install_table_version_triggers) menangkap penulisan dari luar aplikasi.
+VERSIONED_TABLES = ('products', 'sales', 'users')
+
+# Tabel yang dimuat load_sql_dump, berurutan sesuai foreign key
+DUMP_TABLES = ('products', 'sales', 'users')
+
+# Pasangan (nama_produk, varian) per query lookup saat import; SQLite
+# membatasi compound SELECT (UNION ALL) hingga 500 bagian
+IMPORT_LOOKUP_BATCH = 400
+
+# Query yang paling sering dijalankan beserta index yang seharusnya dipakai
+HOT_QUERIES = {
+    'sales_by_date': (
+        "SELECT id FROM sales WHERE tanggal BETWEEN %s AND %s ORDER BY tanggal DESC",
+        ('2024-01-01', '2024-01-31'),
+        {'idx_sales_tanggal'},
+    ),
+    'sales_by_product_date': (
+        "SELECT tanggal, jumlah FROM sales WHERE product_id = %s AND tanggal >= %s ORDER BY tanggal",
+        (1, '2024-01-01'),
+        {'idx_sales_product_tanggal'},
+    ),
+    'daily_by_product': (
+        "SELECT tanggal, qty FROM sales_daily WHERE product_id = %s AND tanggal >= %s ORDER BY tanggal",
+        (1, '2024-01-01'),
+        {'PRIMARY'},
+    ),
+    'product_lookup': (
+        "SELECT id FROM products WHERE nama_produk = %s AND varian = %s",
+        ('Semen', '40kg'),
+        {'uq_products_nama_varian'},
+    ),
+}
+
 
 class DatabaseManager:
-    def __init__(self):
-        self.host = ACTIVE_CONFIG['host']
-        self.database = ACTIVE_CONFIG['database']
-        self.user = ACTIVE_CONFIG['user']
-        self.password = ACTIVE_CONFIG['password']
-        self.port = ACTIVE_CONFIG.get('port', 3306)
-        
+    def __init__(self, config=None):
+        # config default ACTIVE_CONFIG; 'backend' memilih MySQL atau SQLite (lihat backends.py)
+        self.config = ACTIVE_CONFIG if config is None else config
+        self.backend = backends.get_backend(self.config)
+        self.database = self.config['database']
+        self.pool = ConnectionPool(
+            self._open_connection,
+            size=self.config.get('pool_size', 5),
+            max_overflow=self.config.get('pool_max_overflow', 10),
+            timeout=self.config.get('pool_timeout', 30),
+            recycle=self.config.get('pool_recycle', 3600),
+            pre_ping=self.config.get('pool_pre_ping', True),
+        )
+        self.query_cache = QueryCache(
+            ttl=self.config.get('query_cache_ttl', 300),
+            max_entries=self.config.get('query_cache_size', 256),
+            max_bytes=self.config.get('query_cache_max_mb', 256) * 1024 * 1024,
+        )
+        self.metrics = Metrics(
+            enabled=self.config.get('metrics_enabled', True),
+            slow_query_ms=self.config.get('slow_query_ms', 500),
+        )
+        self._table_versions = {}
+        self._change_listeners = []
+
+    def _open_connection(self):
+        return self.backend.connect()
+
     def create_connection(self):
         try:
-            connection = mysql.connector.connect(
-                host=self.host,
-                database=self.database,
-                user=self.user,
-                password=self.password,
-                port=self.port
-            )
-            return connection
+            return self._open_connection()
         except Error as e:
-            print(f"Error connecting to MySQL: {e}")
+            print(f"Error connecting to database: {e}")
             return None
+
+    @contextmanager
+    def connection(self):
+        """Pinjam koneksi dari pool; menghasilkan None bila koneksi gagal.
+
+        Koneksi dibungkus self.metrics sehingga setiap query tercatat.
+        """
+        started = time.perf_counter()
+        try:
+            connection = self.pool.acquire()
+        except Error as e:
+            print(f"Error connecting to database: {e}")
+            yield None
+            return
+        try:
+            yield self.metrics.wrap(connection, time.perf_counter() - started)
+        finally:
+            self.pool.release(connection)
+
+    def metrics_gauges(self):
+        """Status pool koneksi dan cache query sebagai gauge untuk Metrics.prometheus_text"""
+        pool = self.pool.status()
+        cache = self.query_cache.stats()
+        return {
+            'stok_pool_connections_open': pool['opened'],
+            'stok_pool_connections_in_use': pool['in_use'],
+            'stok_query_cache_entries': cache['size'],
+            'stok_query_cache_bytes': cache['bytes'],
+            'stok_query_cache_hit_ratio': cache['hit_rate'],
+        }
+
+    @staticmethod
+    def _bump_table_versions(cursor, *tables):
+        """Naikkan versi `tables` di table_versions, dalam transaksi penulisan yang sama"""
+        cursor.executemany("""
+            INSERT INTO table_versions (table_name, version) VALUES (%s, 1)
+            ON DUPLICATE KEY UPDATE version = version + 1
+        """, [(table,) for table in tables])
+
+    def add_change_listener(self, callback):
+        """Daftarkan `callback(tables)` yang dipanggil saat tabel berubah.
+
+        `tables` berisi nama tabel yang berubah, atau None bila semua data
+        harus dianggap berubah.
+        """
+        self._change_listeners.append(callback)
+
+    def _tables_changed(self, *tables):
+        """Buang cache query untuk `tables` (semua bila kosong) dan beri tahu listener"""
+        self.query_cache.invalidate(*tables)
+        for callback in self._change_listeners:
+            try:
+                callback(set(tables) if tables else None)
+            except Exception as e:
+                print(f"Error in table change listener: {e}")
+
+    def poll_table_versions(self):
+        """Bandingkan table_versions dengan pembacaan terakhir.
+
+        Satu query ringan per rerun; tabel yang versinya berubah (termasuk
+        karena penulisan di replika lain) dibuang dari cache. Mengembalikan
+        set nama tabel yang berubah.
+        """
+        with self.connection() as connection:
+            if connection:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute("SELECT table_name, version FROM table_versions")
+                    versions = dict(cursor.fetchall())
+                except Error as e:
+                    print(f"Error polling table versions: {e}")
+                    return set()
+                finally:
+                    cursor.close()
+                changed = {
+                    table for table, version in versions.items()
+                    if self._table_versions.get(table) != version
+                }
+                self._table_versions = versions
+                if changed:
+                    self._tables_changed(*changed)
+                return changed
+        return set()
+
+    def install_table_version_triggers(self):
+        """Pasang trigger yang menaikkan table_versions untuk VERSIONED_TABLES.
+
+        Diperlukan bila tabel juga ditulis oleh tool lain di luar aplikasi.
+        Trigger berjalan per baris, sehingga import besar sedikit lebih lambat.
+        """
+        with self.connection() as connection:
+            if connection:
+                cursor = connection.cursor()
+                try:
+                    for table in VERSIONED_TABLES:
+                        for event in ('INSERT', 'UPDATE', 'DELETE'):
+                            name = f"trg_{table}_{event.lower()}_version"
+                            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+                            cursor.execute(self.backend.trigger_sql(name, event, table, f"""
+                                INSERT INTO table_versions (table_name, version) VALUES ('{table}', 1)
+                                ON DUPLICATE KEY UPDATE version = version + 1
+                            """))
+                    connection.commit()
+                    return True
+                except Error as e:
+                    print(f"Error installing table version triggers: {e}")
+                    return False
+                finally:
+                    cursor.close()
+        return False
     
     def create_database_and_tables(self):
+        connection = None
         try:
-            connection = mysql.connector.connect(
-                host=self.host,
-                user=self.user,
-                password=self.password,
-                port=self.port
-            )
+            connection = self.backend.connect_server()
             cursor = connection.cursor()
             
-            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {self.database}")
-            cursor.execute(f"USE {self.database}")
-            
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS users (
                     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -83,10 +521,74 @@ class DatabaseManager:
         except Error as e:
             print(f"Error creating database: {e}")
         finally:
-            if connection.is_connected():
+            if connection is not None and connection.is_connected():
                 cursor.close()
                 connection.close()
     
+    def run_migrations(self):
+        """Terapkan migrasi di MIGRATIONS yang belum tercatat di schema_version"""
+        with self.connection() as connection:
+            if connection:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute("""
+                        CREATE TABLE IF NOT EXISTS schema_version (
+                            version INT PRIMARY KEY,
+                            description VARCHAR(255) NOT NULL,
+                            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        )
+                    """)
+                    # Cegah dua replika aplikasi menjalankan migrasi bersamaan
+                    cursor.execute("SELECT GET_LOCK('stok_material_migrations', 60)")
+                    cursor.fetchone()
+                    try:
+                        cursor.execute("SELECT version FROM schema_version")
+                        applied = {row[0] for row in cursor.fetchall()}
+                        for version, description, statements in MIGRATIONS:
+                            if version in applied:
+                                continue
+                            for statement in statements:
+                                if isinstance(statement, dict):
+                                    statement = statement.get(self.backend.name)
+                                    if statement is None:
+                                        continue
+                                cursor.execute(statement)
+                            cursor.execute(
+                                "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                                (version, description),
+                            )
+                            connection.commit()
+                            print(f"Migrasi {version} diterapkan: {description}")
+                    finally:
+                        cursor.execute("SELECT RELEASE_LOCK('stok_material_migrations')")
+                        cursor.fetchone()
+                    self._tables_changed()
+                    return True
+                except Error as e:
+                    connection.rollback()
+                    print(f"Error applying migrations: {e}")
+                    return False
+                finally:
+                    cursor.close()
+        return False
+
+    def explain_hot_queries(self):
+        """Jalankan EXPLAIN untuk HOT_QUERIES.
+
+        Mengembalikan {nama: (index_dipakai, sesuai_harapan)} untuk memastikan
+        query utama memakai index dari MIGRATIONS, bukan full scan.
+        """
+        results = {}
+        with self.connection() as connection:
+            if connection:
+                try:
+                    for name, (sql, params, expected) in HOT_QUERIES.items():
+                        key = self.backend.explain_index(connection, sql, params)
+                        results[name] = (key, key in expected)
+                except Error as e:
+                    print(f"Error explaining queries: {e}")
+        return results
+
     def create_default_admin(self, cursor):
         try:
             cursor.execute("SELECT id FROM users WHERE username = 'admin'")
@@ -103,246 +605,1048 @@ class DatabaseManager:
             print(f"Error creating admin user: {e}")
     
     def authenticate_user(self, username, password):
-        connection = self.create_connection()
-        if connection:
-            try:
-                cursor = connection.cursor()
-                cursor.execute("""
-                    SELECT id, username, password_hash, role 
-                    FROM users WHERE username = %s
-                """, (username,))
-                user = cursor.fetchone()
+        with self.connection() as connection:
+            if connection:
+                try:
+                    cursor = connection.cursor()
+                    cursor.execute("""
+                        SELECT id, username, password_hash, role 
+                        FROM users WHERE username = %s
+                    """, (username,))
+                    user = cursor.fetchone()
                 
-                if user and bcrypt.checkpw(password.encode('utf-8'), user[2].encode('utf-8')):
-                    return {
-                        'id': user[0],
-                        'username': user[1],
-                        'role': user[3]
-                    }
-                return None
-            except Error as e:
-                print(f"Authentication error: {e}")
-                return None
-            finally:
-                cursor.close()
-                connection.close()
+                    if user and bcrypt.checkpw(password.encode('utf-8'), user[2].encode('utf-8')):
+                        return {
+                            'id': user[0],
+                            'username': user[1],
+                            'role': user[3]
+                        }
+                    return None
+                except Error as e:
+                    print(f"Authentication error: {e}")
+                    return None
+                finally:
+                    cursor.close()
         return None
     
+    @cached_query('products')
     def get_products(self):
-        connection = self.create_connection()
-        if connection:
-            try:
-                df = pd.read_sql("""
-                    SELECT *
-                    FROM products
-                    ORDER BY nama_produk
-                """, connection)
-                return df
-            except Error as e:
-                print(f"Error fetching products: {e}")
-                return pd.DataFrame()
-            finally:
-                connection.close()
+        with self.connection() as connection:
+            if connection:
+                try:
+                    df = pd.read_sql("""
+                        SELECT *
+                        FROM products
+                        ORDER BY nama_produk
+                    """, connection)
+                    return _typed_frame(df)
+                except Error as e:
+                    print(f"Error fetching products: {e}")
+                    return pd.DataFrame()
         return pd.DataFrame()
     
+    @cached_query('products')
+    def product_catalog(self):
+        """ProductCatalog bersama; dibangun ulang hanya saat tabel products berubah"""
+        return ProductCatalog(self.get_products())
+
     def add_product(self, nama_produk, varian, jenis, harga):
-        connection = self.create_connection()
-        if connection:
-            try:
-                cursor = connection.cursor()
-                cursor.execute("""
-                    INSERT INTO products (nama_produk, varian, jenis, harga)
-                    VALUES (%s, %s, %s, %s)
-                """, (nama_produk, varian, jenis, harga))
+        with self.connection() as connection:
+            if connection:
+                try:
+                    cursor = connection.cursor()
+                    cursor.execute("""
+                        INSERT INTO products (nama_produk, varian, jenis, harga)
+                        VALUES (%s, %s, %s, %s)
+                    """, (nama_produk, varian, jenis, harga))
                 
-                connection.commit()
-                return True
-            except Error as e:
-                print(f"Error adding product: {e}")
-                return False
-            finally:
-                cursor.close()
-                connection.close()
+                    self._bump_table_versions(cursor, 'products')
+                    connection.commit()
+                    self._tables_changed('products')
+                    return True
+                except Error as e:
+                    print(f"Error adding product: {e}")
+                    return False
+                finally:
+                    cursor.close()
         return False
 
+    @cached_query('users')
     def get_users(self):
-        connection = self.create_connection()
-        if connection:
-            try:
-                df = pd.read_sql(
-                    """
-                    SELECT id, username, role, created_at
-                    FROM users
-                    ORDER BY created_at DESC
-                    """,
-                    connection,
-                )
-                return df
-            except Error as e:
-                print(f"Error fetching users: {e}")
-                return pd.DataFrame()
-            finally:
-                connection.close()
+        with self.connection() as connection:
+            if connection:
+                try:
+                    df = pd.read_sql(
+                        """
+                        SELECT id, username, role, created_at
+                        FROM users
+                        ORDER BY created_at DESC
+                        """,
+                        connection,
+                    )
+                    return df
+                except Error as e:
+                    print(f"Error fetching users: {e}")
+                    return pd.DataFrame()
         return pd.DataFrame()
 
     def add_user(self, username: str, password: str, role: str = 'staff'):
-        connection = self.create_connection()
-        if connection:
-            try:
-                cursor = connection.cursor()
-                cursor.execute("SELECT id FROM users WHERE username = %s", (username,))
-                if cursor.fetchone():
-                    return False, "Username sudah digunakan."
+        with self.connection() as connection:
+            if connection:
+                try:
+                    cursor = connection.cursor()
+                    cursor.execute("SELECT id FROM users WHERE username = %s", (username,))
+                    if cursor.fetchone():
+                        return False, "Username sudah digunakan."
 
-                hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-                cursor.execute(
-                    """
-                    INSERT INTO users (username, password_hash, role)
-                    VALUES (%s, %s, %s)
-                    """,
-                    (username, hashed, role),
-                )
-                connection.commit()
-                return True, "OK"
-            except Error as e:
-                print(f"Error adding user: {e}")
-                return False, "Gagal menambah user"
-            finally:
-                cursor.close()
-                connection.close()
+                    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+                    cursor.execute(
+                        """
+                        INSERT INTO users (username, password_hash, role)
+                        VALUES (%s, %s, %s)
+                        """,
+                        (username, hashed, role),
+                    )
+                    self._bump_table_versions(cursor, 'users')
+                    connection.commit()
+                    self._tables_changed('users')
+                    return True, "OK"
+                except Error as e:
+                    print(f"Error adding user: {e}")
+                    return False, "Gagal menambah user"
+                finally:
+                    cursor.close()
         return False, "Koneksi database gagal"
 
     def update_user_role(self, user_id: int, role: str) -> bool:
-        connection = self.create_connection()
-        if connection:
-            try:
-                cursor = connection.cursor()
-                cursor.execute(
-                    "UPDATE users SET role = %s WHERE id = %s",
-                    (role, user_id),
-                )
-                connection.commit()
-                return True
-            except Error as e:
-                print(f"Error updating user role: {e}")
-                return False
+        with self.connection() as connection:
+            if connection:
+                try:
+                    cursor = connection.cursor()
+                    cursor.execute(
+                        "UPDATE users SET role = %s WHERE id = %s",
+                        (role, user_id),
+                    )
+                    self._bump_table_versions(cursor, 'users')
+                    connection.commit()
+                    self._tables_changed('users')
+                    return True
+                except Error as e:
+                    print(f"Error updating user role: {e}")
+                    return False
+                finally:
+                    cursor.close()
+        return False
 
     def update_user_password(self, user_id: int, new_password: str) -> bool:
-        connection = self.create_connection()
-        if connection:
-            try:
-                cursor = connection.cursor()
-                hashed = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-                cursor.execute(
-                    "UPDATE users SET password_hash = %s WHERE id = %s",
-                    (hashed, user_id),
-                )
-                connection.commit()
-                return True
-            except Error as e:
-                print(f"Error updating user password: {e}")
-                return False
-            finally:
-                cursor.close()
-                connection.close()
+        with self.connection() as connection:
+            if connection:
+                try:
+                    cursor = connection.cursor()
+                    hashed = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+                    cursor.execute(
+                        "UPDATE users SET password_hash = %s WHERE id = %s",
+                        (hashed, user_id),
+                    )
+                    self._bump_table_versions(cursor, 'users')
+                    connection.commit()
+                    self._tables_changed('users')
+                    return True
+                except Error as e:
+                    print(f"Error updating user password: {e}")
+                    return False
+                finally:
+                    cursor.close()
         return False
 
     def delete_user(self, user_id: int) -> bool:
-        connection = self.create_connection()
-        if connection:
-            try:
-                cursor = connection.cursor()
-                cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
-                connection.commit()
-                return True
-            except Error as e:
-                print(f"Error deleting user: {e}")
-                return False
-            finally:
-                cursor.close()
-                connection.close()
+        with self.connection() as connection:
+            if connection:
+                try:
+                    cursor = connection.cursor()
+                    cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
+                    self._bump_table_versions(cursor, 'users')
+                    connection.commit()
+                    self._tables_changed('users')
+                    return True
+                except Error as e:
+                    print(f"Error deleting user: {e}")
+                    return False
+                finally:
+                    cursor.close()
         return False
     
-    def get_sales_data(self):
-        connection = self.create_connection()
-        if connection:
-            try:
-                df = pd.read_sql("""
-                    SELECT s.*, p.nama_produk, p.varian, p.jenis
-                    FROM sales s
-                    JOIN products p ON s.product_id = p.id
-                    ORDER BY s.tanggal DESC
-                """, connection)
-                return df
-            except Error as e:
-                print(f"Error fetching sales data: {e}")
-                return pd.DataFrame()
-            finally:
-                connection.close()
+    @cached_query('sales', 'products')
+    def get_sales_data(self, columnar=None):
+        with self.connection() as connection:
+            if connection:
+                try:
+                    return self._read_frame(connection, """
+                        SELECT s.*, p.nama_produk, p.varian, p.jenis
+                        FROM sales s
+                        JOIN products p ON s.product_id = p.id
+                        ORDER BY s.tanggal DESC
+                    """, columnar=columnar)
+                except Error as e:
+                    print(f"Error fetching sales data: {e}")
+                    return pd.DataFrame()
         return pd.DataFrame()
     
-    def add_sale(self, tanggal, product_id, jumlah, harga_satuan):
-        connection = self.create_connection()
-        if connection:
+    @cached_query('sales', 'products')
+    def query_sales(self, start=None, end=None, product_ids=None, columns=None, limit=None, offset=None, after=None,
+                    columnar=None):
+        """Ambil penjualan dengan filter tanggal/produk dan LIMIT yang dijalankan di database.
+
+        `start`/`end` inklusif; `columns` dipilih dari SALES_COLUMNS;
+        `offset` hanya berlaku bersama `limit`. Hasil diurutkan (tanggal, id)
+        menurun; `after=(tanggal, id)` mengambil baris sesudah kunci tersebut
+        (pagination keyset, tanpa OFFSET yang makin lambat di halaman akhir).
+        `columnar` memilih jalur fetch, lihat _read_frame.
+        """
+        columns = list(columns) if columns else list(SALES_COLUMNS)
+        sql, params = self._sales_query(start, end, product_ids, columns, limit, offset, after)
+        if sql is None:
+            return _typed_frame(pd.DataFrame(columns=columns))
+
+        with self.connection() as connection:
+            if connection:
+                try:
+                    return self._read_frame(connection, sql, params, columnar)
+                except Error as e:
+                    print(f"Error querying sales data: {e}")
+                    return _typed_frame(pd.DataFrame(columns=columns))
+        return _typed_frame(pd.DataFrame(columns=columns))
+
+    @staticmethod
+    def _sales_query(start, end, product_ids, columns, limit=None, offset=None, after=None):
+        """SQL dan parameter untuk query_sales/export_sales; (None, None) bila product_ids kosong"""
+        unknown = [c for c in columns if c not in SALES_COLUMNS]
+        if unknown:
+            raise ValueError(f"Kolom penjualan tidak dikenal: {unknown}")
+
+        where, params = [], []
+        if start is not None:
+            where.append("s.tanggal >= %s")
+            params.append(start)
+        if end is not None:
+            where.append("s.tanggal <= %s")
+            params.append(end)
+        if product_ids is not None:
+            product_ids = [int(pid) for pid in product_ids]
+            if not product_ids:
+                return None, None
+            where.append(f"s.product_id IN ({', '.join(['%s'] * len(product_ids))})")
+            params.extend(product_ids)
+        if after is not None:
+            where.append("(s.tanggal < %s OR (s.tanggal = %s AND s.id < %s))")
+            params.extend([after[0], after[0], int(after[1])])
+
+        sql = f"""
+            SELECT {', '.join(f'{SALES_COLUMNS[c]} AS {c}' for c in columns)}
+            FROM sales s
+            JOIN products p ON s.product_id = p.id
+        """
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY s.tanggal DESC, s.id DESC"
+        if limit is not None:
+            sql += " LIMIT %s"
+            params.append(int(limit))
+            if offset:
+                sql += " OFFSET %s"
+                params.append(int(offset))
+        return sql, params
+
+    def export_sales(self, fmt='csv', start=None, end=None, product_ids=None, columns=None):
+        """Ekspor penjualan terfilter ke file sementara; lihat export_query"""
+        columns = list(columns) if columns else list(SALES_COLUMNS)
+        sql, params = self._sales_query(start, end, product_ids, columns)
+        if sql is None:
+            return exporter.export_batches([], columns, fmt, 'penjualan', FRAME_DTYPES)
+        return self.export_query(sql, params, fmt, 'penjualan')
+
+    def export_query(self, sql, params=None, fmt='csv', prefix='export'):
+        """Tulis hasil query ke file sementara (csv, csv.gz, parquet, xlsx) secara streaming.
+
+        Baris dibaca dari cursor unbuffered per `export_batch_size` dengan
+        fetchmany, sehingga memori tetap kecil berapa pun jumlah barisnya.
+        Skema Parquet diambil dari FRAME_DTYPES (kolom lain sebagai string).
+        Mengembalikan path file, atau None bila gagal.
+        """
+        batch_size = self.config.get('export_batch_size', 5000)
+        with self.connection() as connection:
+            if connection:
+                cursor = connection.cursor(buffered=False)
+                try:
+                    cursor.execute(sql, params)
+                    columns = [d[0] for d in cursor.description]
+                    batches = iter(lambda: cursor.fetchmany(batch_size), [])
+                    return exporter.export_batches(batches, columns, fmt, prefix, FRAME_DTYPES)
+                except Exception as e:
+                    print(f"Error exporting query: {e}")
+                    try:
+                        # Sisa hasil harus dibaca agar koneksi bisa dipakai lagi
+                        connection.consume_results()
+                    except Error:
+                        pass
+                    return None
+                finally:
+                    cursor.close()
+        return None
+
+    def _read_frame(self, connection, sql, params=None, columnar=None):
+        """DataFrame bertipe FRAME_DTYPES dari query.
+
+        `columnar=True` membaca cursor raw per `fetch_batch_size` baris
+        langsung ke array per kolom (columnar.fetch_frame); False memakai
+        pd.read_sql. None mengikuti ACTIVE_CONFIG['columnar_fetch'].
+        """
+        if columnar is None:
+            columnar = self.config.get('columnar_fetch', True)
+        if not columnar:
+            return _typed_frame(pd.read_sql(sql, connection, params=params or None))
+        cursor = connection.cursor(raw=True, buffered=False)
+        try:
+            cursor.execute(sql, params or ())
+            return fetch_frame(cursor, FRAME_DTYPES, self.config.get('fetch_batch_size', 50000))
+        except Exception:
             try:
+                # Sisa hasil cursor unbuffered harus dibaca agar koneksi bisa dipakai lagi
+                connection.consume_results()
+            except Error:
+                pass
+            raise
+        finally:
+            cursor.close()
+
+    def _fetch_scalar(self, sql, params=None, default=0, label="query"):
+        """Nilai pertama hasil query (`default` bila NULL/kosong) sebagai int, atau None bila gagal.
+
+        None tidak disimpan oleh cached_query, sehingga error sesaat tidak
+        ter-cache sebagai 0 selama TTL.
+        """
+        with self.connection() as connection:
+            if connection:
                 cursor = connection.cursor()
-                total_harga = int(jumlah * harga_satuan)
-                
-                cursor.execute("""
-                    INSERT INTO sales (tanggal, product_id, jumlah, harga_satuan, total_harga)
-                    VALUES (%s, %s, %s, %s, %s)
-                """, (tanggal, product_id, jumlah, harga_satuan, total_harga))
-                
-                connection.commit()
-                return True
-            except Error as e:
-                print(f"Error adding sale: {e}")
-                return False
-            finally:
-                cursor.close()
-                connection.close()
+                try:
+                    cursor.execute(sql, params)
+                    row = cursor.fetchone()
+                    return int(row[0]) if row and row[0] is not None else default
+                except Error as e:
+                    print(f"Error fetching {label}: {e}")
+                    return None
+                finally:
+                    cursor.close()
+        return None
+
+    @cached_query('products')
+    def count_products(self, search=None):
+        where, params = self._product_search(search)
+        return self._fetch_scalar("SELECT COUNT(*) FROM products" + where, params, label="product count")
+
+    @cached_query('products')
+    def query_products(self, search=None, limit=None, offset=None):
+        """Produk urut nama, opsional dicari (nama/varian) dan dibatasi LIMIT/OFFSET di database"""
+        where, params = self._product_search(search)
+        sql = "SELECT * FROM products" + where + " ORDER BY nama_produk, id"
+        if limit is not None:
+            sql += " LIMIT %s"
+            params.append(int(limit))
+            if offset:
+                sql += " OFFSET %s"
+                params.append(int(offset))
+        with self.connection() as connection:
+            if connection:
+                try:
+                    return _typed_frame(pd.read_sql(sql, connection, params=params or None))
+                except Error as e:
+                    print(f"Error querying products: {e}")
+                    return pd.DataFrame()
+        return pd.DataFrame()
+
+    @staticmethod
+    def _product_search(search):
+        if not search:
+            return "", []
+        pattern = f"%{search}%"
+        return " WHERE nama_produk LIKE %s OR varian LIKE %s", [pattern, pattern]
+
+    @cached_query('sales')
+    def sales_summary(self, start=None, end=None, product_ids=None):
+        """(jumlah transaksi, total pendapatan) untuk filter yang sama dengan query_sales, dari sales_daily"""
+        where, params = self._daily_filters(start, end, product_ids)
+        if where is None:
+            return 0, 0
+        sql = "SELECT COALESCE(SUM(tx_count), 0), COALESCE(SUM(revenue), 0) FROM sales_daily d"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        with self.connection() as connection:
+            if connection:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute(sql, params)
+                    count, revenue = cursor.fetchone()
+                    return int(count), int(revenue)
+                except Error as e:
+                    print(f"Error fetching sales summary: {e}")
+                    return None
+                finally:
+                    cursor.close()
+        return None
+
+    @cached_query('sales')
+    def count_sales(self):
+        return self._fetch_scalar("SELECT SUM(tx_count) FROM sales_daily", label="sales count")
+
+    @cached_query('sales')
+    def revenue_total(self):
+        return self._fetch_scalar("SELECT SUM(revenue) FROM sales_daily", label="total revenue")
+
+    @cached_query('sales')
+    def revenue_by_month(self):
+        """Pendapatan per bulan (kolom: bulan 'YYYY-MM', pendapatan)"""
+        with self.connection() as connection:
+            if connection:
+                try:
+                    return pd.read_sql("""
+                        SELECT DATE_FORMAT(tanggal, '%Y-%m') AS bulan,
+                               SUM(revenue) AS pendapatan
+                        FROM sales_daily
+                        GROUP BY bulan
+                        ORDER BY bulan
+                    """, connection)
+                except Error as e:
+                    print(f"Error fetching monthly revenue: {e}")
+                    return pd.DataFrame(columns=['bulan', 'pendapatan'])
+        return pd.DataFrame(columns=['bulan', 'pendapatan'])
+
+    @cached_query('sales', 'products')
+    def top_products(self, n=5, metric='jumlah'):
+        """`n` produk teratas menurut `metric` ('jumlah' atau 'total_harga')"""
+        column = {'jumlah': 'qty', 'total_harga': 'revenue'}.get(metric)
+        if column is None:
+            raise ValueError(f"Metrik tidak dikenal: {metric}")
+        with self.connection() as connection:
+            if connection:
+                try:
+                    return pd.read_sql(f"""
+                        SELECT p.nama_produk, SUM(d.{column}) AS total
+                        FROM sales_daily d
+                        JOIN products p ON d.product_id = p.id
+                        GROUP BY p.nama_produk
+                        ORDER BY total DESC
+                        LIMIT %s
+                    """, connection, params=(int(n),))
+                except Error as e:
+                    print(f"Error fetching top products: {e}")
+                    return pd.DataFrame(columns=['nama_produk', 'total'])
+        return pd.DataFrame(columns=['nama_produk', 'total'])
+
+    @cached_query('sales')
+    def sales_daily(self, start=None, end=None, product_ids=None, columnar=None):
+        """Total harian per produk dari rollup sales_daily.
+
+        Kolom: product_id, tanggal, qty, revenue, tx_count; diurutkan per
+        produk lalu tanggal. `start`/`end` inklusif; `columnar` lihat _read_frame.
+        """
+        columns = ['product_id', 'tanggal', 'qty', 'revenue', 'tx_count']
+        where, params = self._daily_filters(start, end, product_ids)
+        if where is None:
+            return _typed_frame(pd.DataFrame(columns=columns))
+        sql = "SELECT product_id, tanggal, qty, revenue, tx_count FROM sales_daily d"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY product_id, tanggal"
+        with self.connection() as connection:
+            if connection:
+                try:
+                    return self._read_frame(connection, sql, params, columnar)
+                except Error as e:
+                    print(f"Error fetching daily sales: {e}")
+                    return _typed_frame(pd.DataFrame(columns=columns))
+        return _typed_frame(pd.DataFrame(columns=columns))
+
+    @cached_query('sales')
+    def sales_by_month(self, product_ids=None):
+        """Total bulanan (kolom: bulan 'YYYY-MM', jumlah, pendapatan), opsional untuk produk tertentu"""
+        columns = ['bulan', 'jumlah', 'pendapatan']
+        where, params = self._daily_filters(None, None, product_ids)
+        if where is None:
+            return pd.DataFrame(columns=columns)
+        sql = """
+            SELECT DATE_FORMAT(tanggal, '%Y-%m') AS bulan,
+                   SUM(qty) AS jumlah,
+                   SUM(revenue) AS pendapatan
+            FROM sales_daily d
+        """
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " GROUP BY bulan ORDER BY bulan"
+        with self.connection() as connection:
+            if connection:
+                try:
+                    return pd.read_sql(sql, connection, params=params or None)
+                except Error as e:
+                    print(f"Error fetching monthly sales: {e}")
+                    return pd.DataFrame(columns=columns)
+        return pd.DataFrame(columns=columns)
+
+    @cached_query('sales', 'products')
+    def sales_by_product(self, start=None, end=None):
+        """Total per produk dalam periode (kolom: product_id, nama_produk, varian, jumlah, total_harga, tx_count)"""
+        columns = ['product_id', 'nama_produk', 'varian', 'jumlah', 'total_harga', 'tx_count']
+        where, params = self._daily_filters(start, end, None)
+        sql = """
+            SELECT d.product_id, p.nama_produk, p.varian,
+                   SUM(d.qty) AS jumlah, SUM(d.revenue) AS total_harga, SUM(d.tx_count) AS tx_count
+            FROM sales_daily d
+            JOIN products p ON d.product_id = p.id
+        """
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " GROUP BY d.product_id, p.nama_produk, p.varian ORDER BY total_harga DESC"
+        with self.connection() as connection:
+            if connection:
+                try:
+                    return _typed_frame(pd.read_sql(sql, connection, params=params or None))
+                except Error as e:
+                    print(f"Error fetching sales by product: {e}")
+                    return _typed_frame(pd.DataFrame(columns=columns))
+        return _typed_frame(pd.DataFrame(columns=columns))
+
+    @staticmethod
+    def _daily_filters(start, end, product_ids):
+        """Klausa WHERE untuk sales_daily; (None, None) bila product_ids kosong"""
+        where, params = [], []
+        if start is not None:
+            where.append("d.tanggal >= %s")
+            params.append(start)
+        if end is not None:
+            where.append("d.tanggal <= %s")
+            params.append(end)
+        if product_ids is not None:
+            product_ids = [int(pid) for pid in product_ids]
+            if not product_ids:
+                return None, None
+            where.append(f"d.product_id IN ({', '.join(['%s'] * len(product_ids))})")
+            params.extend(product_ids)
+        return where, params
+
+    def rebuild_sales_daily(self, start=None, end=None):
+        """Hitung ulang sales_daily dari sales (seluruhnya atau untuk rentang tanggal).
+
+        Dipakai untuk backfill atau setelah tabel sales diubah di luar
+        aplikasi. Mengembalikan jumlah baris rollup yang ditulis, atau False.
+        """
+        where, params = [], []
+        if start is not None:
+            where.append("tanggal >= %s")
+            params.append(start)
+        if end is not None:
+            where.append("tanggal <= %s")
+            params.append(end)
+        condition = (" WHERE " + " AND ".join(where)) if where else ""
+        with self.connection() as connection:
+            if connection:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute("DELETE FROM sales_daily" + condition, params)
+                    cursor.execute(f"""
+                        INSERT INTO sales_daily (product_id, tanggal, qty, revenue, tx_count)
+                        SELECT product_id, tanggal, SUM(jumlah), SUM(total_harga), COUNT(*)
+                        FROM sales
+                        {condition + (" AND" if condition else " WHERE")} product_id IS NOT NULL
+                        GROUP BY product_id, tanggal
+                    """, params)
+                    written = cursor.rowcount
+                    self._bump_table_versions(cursor, 'sales')
+                    connection.commit()
+                    self._tables_changed('sales')
+                    return written
+                except Error as e:
+                    connection.rollback()
+                    print(f"Error rebuilding sales_daily: {e}")
+                    return False
+                finally:
+                    cursor.close()
         return False
-    
-    def import_excel_data(self, excel_file):
-        try:
-            df = pd.read_excel(excel_file)
-            connection = self.create_connection()
-            
+
+    def load_sql_dump(self, path, tables=DUMP_TABLES):
+        """Muat data products, sales dan users dari dump MySQL (mis. stok_material_db.sql).
+
+        Dipakai untuk mengisi database lokal (SQLite) atau server baru dengan
+        data yang sama. Baris dengan id/username yang sudah ada dilewati
+        (INSERT IGNORE), lalu sales_daily dibangun ulang. Mengembalikan
+        {tabel: jumlah baris dibaca}, atau False bila gagal.
+        """
+        batch_size = self.config.get('import_batch_size', 1000)
+        counts = {}
+        with self.connection() as connection:
             if connection:
                 cursor = connection.cursor()
+                try:
+                    # Urutan sesuai foreign key: products sebelum sales
+                    for table in tables:
+                        for name, columns, rows in importer.iter_sql_dump(path, {table}):
+                            sql = f"""
+                                INSERT IGNORE INTO {name} ({', '.join(columns)})
+                                VALUES ({', '.join(['%s'] * len(columns))})
+                            """
+                            for i in range(0, len(rows), batch_size):
+                                cursor.executemany(sql, rows[i:i + batch_size])
+                            counts[name] = counts.get(name, 0) + len(rows)
+                    self._bump_table_versions(cursor, *tables)
+                    connection.commit()
+                except Exception as e:
+                    connection.rollback()
+                    print(f"Error loading SQL dump: {e}")
+                    return False
+                finally:
+                    cursor.close()
+                    self._tables_changed(*tables)
+            else:
+                return False
+        if 'sales' in tables and self.rebuild_sales_daily() is False:
+            return False
+        return counts
+
+    def sales_watermarks(self, product_ids=None):
+        """{product_id: (MAX(sales.id), jumlah baris)}; berubah setiap ada penjualan baru"""
+        sql = "SELECT product_id, MAX(id), COUNT(*) FROM sales"
+        params = []
+        if product_ids is not None:
+            product_ids = [int(pid) for pid in product_ids]
+            if not product_ids:
+                return {}
+            sql += f" WHERE product_id IN ({', '.join(['%s'] * len(product_ids))})"
+            params.extend(product_ids)
+        sql += " GROUP BY product_id"
+
+        with self.connection() as connection:
+            if connection:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute(sql, params)
+                    return {pid: (max_id, count) for pid, max_id, count in cursor.fetchall() if pid is not None}
+                except Error as e:
+                    print(f"Error fetching sales watermarks: {e}")
+                    return {}
+                finally:
+                    cursor.close()
+        return {}
+
+    @cached_query('products')
+    def get_product_by_id(self, product_id):
+        """Satu baris produk sebagai dict, atau None bila tidak ada"""
+        with self.connection() as connection:
+            if connection:
+                cursor = connection.cursor(dictionary=True)
+                try:
+                    cursor.execute("SELECT * FROM products WHERE id = %s", (int(product_id),))
+                    return cursor.fetchone()
+                except Error as e:
+                    print(f"Error fetching product {product_id}: {e}")
+                    return None
+                finally:
+                    cursor.close()
+        return None
+
+    @cached_query('sales')
+    def get_sales_history(self, product_id, days_back=90):
+        """Penjualan harian satu produk (tanggal, jumlah, total_harga, tx_count) dari sales_daily.
+
+        Jendela `days_back` hari dihitung mundur dari penjualan terakhir
+        produk tersebut; `days_back=None` mengambil seluruh riwayat.
+        """
+        columns = ['tanggal', 'jumlah', 'total_harga', 'tx_count']
+        empty = pd.DataFrame({
+            'tanggal': pd.Series(dtype='datetime64[ns]'),
+            'jumlah': pd.Series(dtype='float64'),
+            'total_harga': pd.Series(dtype='int64'),
+            'tx_count': pd.Series(dtype='int64'),
+        })
+        with self.connection() as connection:
+            if connection:
+                cursor = connection.cursor()
+                try:
+                    sql = """
+                        SELECT tanggal, qty, revenue, tx_count
+                        FROM sales_daily
+                        WHERE product_id = %s
+                    """
+                    params = [int(product_id)]
+                    if days_back is not None:
+                        cursor.execute("SELECT MAX(tanggal) FROM sales_daily WHERE product_id = %s", params)
+                        latest = cursor.fetchone()[0]
+                        if latest is None:
+                            return empty
+                        sql += " AND tanggal >= %s"
+                        params.append(pd.Timestamp(latest).date() - timedelta(days=int(days_back)))
+                    sql += " ORDER BY tanggal"
+                    cursor.execute(sql, params)
+                    rows = cursor.fetchall()
+                except Error as e:
+                    print(f"Error fetching sales history for product {product_id}: {e}")
+                    return empty
+                finally:
+                    cursor.close()
+                if not rows:
+                    return empty
+                df = pd.DataFrame.from_records(rows, columns=columns)
+                return df.astype({
+                    'tanggal': 'datetime64[ns]', 'jumlah': 'float64', 'total_harga': 'int64', 'tx_count': 'int64'
+                })
+        return empty
+
+    @cached_query('restock_recommendations', 'products')
+    def get_restock_snapshot(self):
+        """Rekomendasi restock terakhir yang tersimpan, urut dari yang paling mendesak"""
+        with self.connection() as connection:
+            if connection:
+                try:
+                    return pd.read_sql("""
+                        SELECT r.product_id, p.nama_produk, p.varian, r.days_ahead,
+                               r.predicted_demand, r.recommended_order, r.urgency,
+                               r.method, r.confidence, r.watermark_max_id, r.watermark_count,
+                               r.computed_at
+                        FROM restock_recommendations r
+                        JOIN products p ON r.product_id = p.id
+                        ORDER BY FIELD(r.urgency, 'High', 'Medium', 'Low'), r.recommended_order DESC
+                    """, connection).pipe(_typed_frame)
+                except Error as e:
+                    print(f"Error fetching restock snapshot: {e}")
+                    return pd.DataFrame()
+        return pd.DataFrame()
+
+    def save_restock_recommendations(self, rows):
+        """Simpan (upsert) rekomendasi restock per produk"""
+        if not rows:
+            return True
+        with self.connection() as connection:
+            if connection:
+                cursor = connection.cursor()
+                try:
+                    cursor.executemany("""
+                        INSERT INTO restock_recommendations
+                            (product_id, days_ahead, predicted_demand, recommended_order, urgency,
+                             method, confidence, watermark_max_id, watermark_count, computed_at)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        ON DUPLICATE KEY UPDATE
+                            days_ahead = VALUES(days_ahead),
+                            predicted_demand = VALUES(predicted_demand),
+                            recommended_order = VALUES(recommended_order),
+                            urgency = VALUES(urgency),
+                            method = VALUES(method),
+                            confidence = VALUES(confidence),
+                            watermark_max_id = VALUES(watermark_max_id),
+                            watermark_count = VALUES(watermark_count),
+                            computed_at = VALUES(computed_at)
+                    """, [
+                        (
+                            int(r['product_id']), int(r['days_ahead']), float(r['predicted_demand']),
+                            int(r['recommended_order']), r['urgency'], r['method'], r['confidence'],
+                            r['watermark_max_id'], r['watermark_count'], r['computed_at'],
+                        )
+                        for r in rows
+                    ])
+                    self._bump_table_versions(cursor, 'restock_recommendations')
+                    connection.commit()
+                    self._tables_changed('restock_recommendations')
+                    return True
+                except Error as e:
+                    print(f"Error saving restock recommendations: {e}")
+                    connection.rollback()
+                    return False
+                finally:
+                    cursor.close()
+        return False
+
+    def add_sale(self, tanggal, product_id, jumlah, harga_satuan):
+        with self.connection() as connection:
+            if connection:
+                try:
+                    cursor = connection.cursor()
+                    total_harga = int(jumlah * harga_satuan)
                 
-                for _, row in df.iterrows():
-                    cursor.execute("""
-                        SELECT id FROM products 
-                        WHERE nama_produk = %s AND varian = %s
-                    """, (row['Produk'], row['Varian']))
-                    
-                    product = cursor.fetchone()
-                    
-                    if not product:
-                        cursor.execute("""
-                            INSERT INTO products (nama_produk, varian, jenis, harga)
-                            VALUES (%s, %s, %s, %s)
-                        """, (row['Produk'], row['Varian'], row['Jenis'], row['Harga']))
-                        product_id = cursor.lastrowid
-                    else:
-                        product_id = product[0]
-                    
-                    total_harga = int(row['Jumlah'] * row['Harga'])
                     cursor.execute("""
                         INSERT INTO sales (tanggal, product_id, jumlah, harga_satuan, total_harga)
                         VALUES (%s, %s, %s, %s, %s)
-                    """, (row['Tanggal'], product_id, row['Jumlah'], row['Harga'], total_harga))
-                
-                connection.commit()
-                return True
+                    """, (tanggal, product_id, jumlah, harga_satuan, total_harga))
+                    cursor.execute(SALES_DAILY_UPSERT, (product_id, tanggal, jumlah, total_harga, 1))
                 
+                    self._bump_table_versions(cursor, 'sales')
+                    connection.commit()
+                    self._tables_changed('sales')
+                    return True
+                except Error as e:
+                    print(f"Error adding sale: {e}")
+                    return False
+                finally:
+                    cursor.close()
+        return False
+    
+    def import_excel_data(self, excel_file, file_name=None, chunk_size=None, progress=None, resume=True):
+        """Import penjualan dari Excel/CSV secara bertahap dan set-based.
+
+        File dibaca per potongan `chunk_size` baris (lihat importer.iter_chunks).
+        Tiap potongan divalidasi, produknya di-resolve lewat satu peta produk,
+        penjualannya di-insert per batch dengan executemany, lalu di-commit
+        bersama checkpoint di import_checkpoints. Bila import gagal, unggah
+        ulang file yang sama akan melanjutkan dari potongan terakhir yang
+        berhasil (kecuali `resume=False`).
+
+        `progress(rows_done, total_rows)` dipanggil setelah tiap potongan.
+        Mengembalikan statistik import (baris, baris/detik, durasi per tahap)
+        atau False bila gagal.
+        """
+        file_name = file_name or getattr(excel_file, 'name', None) or 'import.xlsx'
+        chunk_size = chunk_size or self.config.get('import_chunk_size', 5000)
+        started = time.perf_counter()
+        stages = {}
+
+        try:
+            file_hash = importer.file_fingerprint(excel_file)
+            total_rows = importer.count_rows(excel_file, file_name)
         except Exception as e:
             print(f"Error importing Excel data: {e}")
             return False
-        finally:
-            if connection and connection.is_connected():
-                cursor.close()
-                connection.close()
+
+        with self.connection() as connection:
+            if connection:
+                cursor = connection.cursor()
+                try:
+                    rows_done = self._get_import_checkpoint(cursor, file_hash) if resume else 0
+                    resumed_from = rows_done
+                    stats = {'rows': 0, 'skipped': 0, 'new_products': 0, 'unmatched': []}
+                    product_map = {}
+
+                    chunks = importer.iter_chunks(excel_file, file_name, chunk_size, skip_rows=rows_done)
+                    try:
+                        while True:
+                            t = time.perf_counter()
+                            chunk = next(chunks, None)
+                            self._add_stage(stages, 'baca_file', t)
+                            if chunk is None:
+                                break
+
+                            chunk_stats = self._import_sales_frame(cursor, chunk, product_map, stages)
+                            for key in stats:
+                                stats[key] += chunk_stats[key]
+                            rows_done += len(chunk)
+                            self._save_import_checkpoint(cursor, file_hash, file_name, rows_done)
+                            self._bump_table_versions(cursor, 'sales', 'products')
+                            connection.commit()
+                            if progress:
+                                progress(rows_done, total_rows)
+                    finally:
+                        chunks.close()
+                        # Potongan yang sudah di-commit tetap tersimpan walau import gagal
+                        self._tables_changed('sales', 'products')
+
+                    cursor.execute("DELETE FROM import_checkpoints WHERE file_hash = %s", (file_hash,))
+                    connection.commit()
+                    return {**self._import_summary(stats, stages, started), 'resumed_from': resumed_from}
+                except Exception as e:
+                    connection.rollback()
+                    print(f"Error importing Excel data: {e}")
+                    return False
+                finally:
+                    cursor.close()
         
         return False
+
+    def get_import_checkpoint(self, file_hash):
+        """Jumlah baris yang sudah diimport untuk file dengan hash ini"""
+        with self.connection() as connection:
+            if connection:
+                cursor = connection.cursor()
+                try:
+                    return self._get_import_checkpoint(cursor, file_hash)
+                except Error as e:
+                    print(f"Error fetching import checkpoint: {e}")
+                    return 0
+                finally:
+                    cursor.close()
+        return 0
+
+    @staticmethod
+    def _get_import_checkpoint(cursor, file_hash):
+        cursor.execute("SELECT rows_done FROM import_checkpoints WHERE file_hash = %s", (file_hash,))
+        row = cursor.fetchone()
+        return int(row[0]) if row else 0
+
+    @staticmethod
+    def _save_import_checkpoint(cursor, file_hash, file_name, rows_done):
+        cursor.execute("""
+            INSERT INTO import_checkpoints (file_hash, file_name, rows_done, updated_at)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE rows_done = VALUES(rows_done), updated_at = VALUES(updated_at)
+        """, (file_hash, file_name[:255], rows_done, datetime.now()))
+
+    def _import_sales_frame(self, cursor, df, product_map, stages):
+        """Validasi, resolve produk dan insert penjualan untuk satu DataFrame.
+
+        `product_map` ({(nama_produk, varian): id}) diisi dan dipakai ulang
+        antar pemanggilan; durasi tiap tahap ditambahkan ke `stages`.
+        """
+        t = time.perf_counter()
+        df = self._clean_import_frame(df)
+        skipped = df.attrs.get('skipped', 0)
+        self._add_stage(stages, 'validasi', t)
+
+        t = time.perf_counter()
+        pairs = df.drop_duplicates(['Produk', 'Varian'])[['Produk', 'Varian', 'Jenis', 'Harga']]
+        new_products = self._resolve_import_products(cursor, pairs, product_map)
+        self._add_stage(stages, 'resolve_produk', t)
+
+        t = time.perf_counter()
+        ids = pd.DataFrame(
+            [(nama, varian, pid) for (nama, varian), pid in product_map.items()],
+            columns=['Produk', 'Varian', 'product_id'],
+        )
+        df = df.merge(ids, on=['Produk', 'Varian'], how='left')
+        unmatched = self._unmatched_import_rows(df)
+        if unmatched:
+            df = df[df['product_id'].notna()]
+        total_harga = (df['Jumlah'] * df['Harga']).astype('int64')
+        rows = list(zip(
+            df['Tanggal'].dt.date.tolist(),
+            df['product_id'].astype('int64').tolist(),
+            df['Jumlah'].tolist(),
+            df['Harga'].astype('int64').tolist(),
+            total_harga.tolist(),
+        ))
+        self._add_stage(stages, 'transformasi', t)
+
+        t = time.perf_counter()
+        batch_size = self.config.get('import_batch_size', 1000)
+        for i in range(0, len(rows), batch_size):
+            cursor.executemany("""
+                INSERT INTO sales (tanggal, product_id, jumlah, harga_satuan, total_harga)
+                VALUES (%s, %s, %s, %s, %s)
+            """, rows[i:i + batch_size])
+        self._add_stage(stages, 'insert_penjualan', t)
+
+        t = time.perf_counter()
+        daily = pd.DataFrame({
+            'product_id': df['product_id'].astype('int64'),
+            'tanggal': df['Tanggal'].dt.date,
+            'qty': df['Jumlah'],
+            'revenue': total_harga,
+        }).groupby(['product_id', 'tanggal'], sort=False).agg(
+            qty=('qty', 'sum'), revenue=('revenue', 'sum'), tx_count=('qty', 'size'),
+        ).reset_index()
+        daily_rows = list(zip(
+            daily['product_id'].tolist(),
+            daily['tanggal'].tolist(),
+            daily['qty'].tolist(),
+            daily['revenue'].tolist(),
+            daily['tx_count'].tolist(),
+        ))
+        for i in range(0, len(daily_rows), batch_size):
+            cursor.executemany(SALES_DAILY_UPSERT, daily_rows[i:i + batch_size])
+        self._add_stage(stages, 'rollup_harian', t)
+
+        return {
+            'rows': len(rows),
+            'skipped': skipped + sum(count for _, _, count in unmatched),
+            'new_products': new_products,
+            'unmatched': unmatched,
+        }
+
+    @staticmethod
+    def _unmatched_import_rows(df):
+        """[(produk, varian, jumlah baris)] untuk baris yang produknya tidak ditemukan"""
+        missing = df[df['product_id'].isna()]
+        if missing.empty:
+            return []
+        unmatched = []
+        for (nama, varian), group in missing.groupby(['Produk', 'Varian'], dropna=False, sort=False):
+            varian = None if pd.isna(varian) else varian
+            print(f"Import: produk '{nama}' varian '{varian}' tidak ditemukan, {len(group)} baris dilewati")
+            unmatched.append((nama, varian, len(group)))
+        return unmatched
+
+    @staticmethod
+    def _clean_import_frame(df):
+        missing = [c for c in importer.IMPORT_COLUMNS if c not in df.columns]
+        if missing:
+            raise ValueError(f"Kolom yang hilang: {missing}")
+
+        df = df[['Tanggal', 'Produk', 'Varian', 'Jumlah', 'Jenis', 'Harga']].dropna(how='all').copy()
+        df['Tanggal'] = pd.to_datetime(df['Tanggal'], errors='coerce')
+        df['Jumlah'] = pd.to_numeric(df['Jumlah'], errors='coerce')
+        df['Harga'] = pd.to_numeric(df['Harga'], errors='coerce')
+        # Produk/Varian tidak di-strip: nama di tabel products bisa berakhiran
+        # spasi dan dicocokkan apa adanya oleh database (lihat _resolve_import_products)
+        # Kolom selalu object (None untuk kosong): Varian yang kosong semua
+        # dibaca pandas sebagai float64 NaN dan gagal di-merge dengan peta produk
+        for col in ('Produk', 'Varian'):
+            df[col] = df[col].astype(str).astype(object).where(df[col].notna(), None)
+        df['Jenis'] = df['Jenis'].where(df['Jenis'].isna(), df['Jenis'].astype(str).str.strip())
+
+        valid = df[['Tanggal', 'Produk', 'Jumlah', 'Harga']].notna().all(axis=1)
+        skipped = int((~valid).sum())
+        df = df[valid]
+        df.attrs['skipped'] = skipped
+        return df
+
+    def _resolve_import_products(self, cursor, pairs, product_map):
+        """Lengkapi `product_map` untuk semua pasangan di `pairs`; kembalikan jumlah produk baru.
+
+        Pasangan yang sama persis dengan baris products diambil dari peta.
+        Sisanya di-insert (INSERT IGNORE) lalu id-nya dicari sekaligus dengan
+        join terhadap daftar pasangan, sehingga kecocokan mengikuti collation
+        database (mis. 'semen' = 'Semen' pada utf8mb4_0900_ai_ci) seperti
+        import lama. Pasangan yang tetap tidak ditemukan tidak dimasukkan ke peta.
+        """
+        if not product_map:
+            cursor.execute("SELECT id, nama_produk, varian FROM products")
+            product_map.update({(nama, varian): pid for pid, nama, varian in cursor.fetchall()})
+
+        keys = [(nama, None if pd.isna(varian) else varian) for nama, varian in zip(pairs['Produk'], pairs['Varian'])]
+        missing = [
+            (nama, varian, None if pd.isna(jenis) else jenis, int(harga))
+            for (nama, varian), jenis, harga in zip(keys, pairs['Jenis'], pairs['Harga'])
+            if (nama, varian) not in product_map
+        ]
+        if not missing:
+            return 0
+
+        cursor.executemany("""
+            INSERT IGNORE INTO products (nama_produk, varian, jenis, harga)
+            VALUES (%s, %s, %s, %s)
+        """, missing)
+        new_products = max(cursor.rowcount, 0)
+
+        # Satu query per IMPORT_LOOKUP_BATCH pasangan; nilai literal mengikuti
+        # collation kolom products saat dibandingkan
+        for start in range(0, len(missing), IMPORT_LOOKUP_BATCH):
+            batch = missing[start:start + IMPORT_LOOKUP_BATCH]
+            pairs_sql = " UNION ALL ".join(["SELECT %s AS pos, %s AS nama_produk, %s AS varian"] * len(batch))
+            params = [value for pos, (nama, varian, _, _) in enumerate(batch) for value in (pos, nama, varian)]
+            cursor.execute(f"""
+                SELECT k.pos, MIN(p.id)
+                FROM ({pairs_sql}) k
+                JOIN products p ON p.nama_produk = k.nama_produk
+                    AND (p.varian = k.varian OR (p.varian IS NULL AND k.varian IS NULL))
+                GROUP BY k.pos
+            """, params)
+            for pos, pid in cursor.fetchall():
+                nama, varian, _, _ = batch[int(pos)]
+                product_map[(nama, varian)] = pid
+        return new_products
+
+    @staticmethod
+    def _add_stage(stages, name, t):
+        stages[name] = stages.get(name, 0.0) + time.perf_counter() - t
+
+    @staticmethod
+    def _import_summary(stats, stages, started):
+        seconds = time.perf_counter() - started
+        return {
+            **stats,
+            'seconds': seconds,
+            'rows_per_sec': stats['rows'] / seconds if seconds > 0 else 0.0,
+            'stages': dict(stages),
+        }
@@ -0,0 +1,141 @@
+import csv
+import gzip
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+# format: (label, ekstensi, mime)
+EXPORT_FORMATS = {
+    'csv': ('CSV', '.csv', 'text/csv'),
+    'csv.gz': ('CSV (gzip)', '.csv.gz', 'application/gzip'),
+    'parquet': ('Parquet', '.parquet', 'application/vnd.apache.parquet'),
+    'xlsx': ('Excel', '.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), 'stok_material_exports')
+EXPORT_MAX_AGE = 3600  # detik sebelum file ekspor lama dihapus
+
+
+def _write_csv(f, batches, columns):
+    writer = csv.writer(f)
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows(batch)
+
+
+def _arrow_type(dtype):
+    """Tipe Arrow untuk dtype pandas/NumPy; teks, kategori dan kolom tak dikenal menjadi string"""
+    import pyarrow as pa
+
+    try:
+        np_dtype = np.dtype(dtype)
+    except TypeError:
+        return pa.string()
+    if np_dtype.kind in 'OSU':
+        return pa.string()
+    return pa.from_numpy_dtype(np_dtype)
+
+
+def _arrow_column(values, type_):
+    import pyarrow as pa
+
+    series = pd.Series(values, dtype=object)
+    if pa.types.is_string(type_):
+        series = series.where(series.isna(), series.astype(str))
+    elif pa.types.is_timestamp(type_):
+        series = pd.to_datetime(series)
+    else:
+        series = pd.to_numeric(series)
+    return pa.Array.from_pandas(series, type=type_)
+
+
+def _write_parquet(path, batches, columns, dtypes=None):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Skema ditetapkan di awal dari `dtypes`, bukan ditebak dari batch pertama:
+    # kolom yang kosong semua di batch pertama (mis. varian) akan bertipe null
+    # dan batch berikutnya gagal di tengah ekspor
+    dtypes = dtypes or {}
+    schema = pa.schema([(column, _arrow_type(dtypes.get(column, object))) for column in columns])
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in batches:
+            values = list(zip(*batch)) if batch else [()] * len(columns)
+            arrays = [_arrow_column(column_values, field.type) for column_values, field in zip(values, schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+
+def _write_xlsx(path, batches, columns):
+    from openpyxl import Workbook
+
+    # write_only: baris langsung ditulis ke file, tidak disimpan di memori
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Data')
+    sheet.append(columns)
+    for batch in batches:
+        for row in batch:
+            sheet.append(row)
+    workbook.save(path)
+
+
+def write_batches(batches, columns, fmt, path, dtypes=None):
+    """Tulis iterator batch (list tuple) ke `path` dalam format `fmt`.
+
+    `dtypes` ({kolom: dtype}, mis. FRAME_DTYPES) menentukan skema Parquet;
+    kolom yang tidak ada di dalamnya ditulis sebagai string.
+    """
+    if fmt == 'csv':
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            _write_csv(f, batches, columns)
+    elif fmt == 'csv.gz':
+        with gzip.open(path, 'wt', newline='', encoding='utf-8') as f:
+            _write_csv(f, batches, columns)
+    elif fmt == 'parquet':
+        _write_parquet(path, batches, columns, dtypes)
+    elif fmt == 'xlsx':
+        _write_xlsx(path, batches, columns)
+    else:
+        raise ValueError(f"Format ekspor tidak dikenal: {fmt}")
+
+
+def cleanup(max_age=EXPORT_MAX_AGE):
+    """Hapus file ekspor yang lebih tua dari `max_age` detik"""
+    if not os.path.isdir(EXPORT_DIR):
+        return
+    cutoff = time.time() - max_age
+    for name in os.listdir(EXPORT_DIR):
+        path = os.path.join(EXPORT_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def export_batches(batches, columns, fmt, prefix='export', dtypes=None):
+    """Tulis batch ke file sementara baru dan kembalikan path-nya; `dtypes` lihat write_batches"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format ekspor tidak dikenal: {fmt}")
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    cleanup()
+    fd, path = tempfile.mkstemp(prefix=f"{prefix}_", suffix=EXPORT_FORMATS[fmt][1], dir=EXPORT_DIR)
+    os.close(fd)
+    try:
+        write_batches(batches, columns, fmt, path, dtypes)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+def frame_batches(df, batch_size=5000):
+    """Potong DataFrame menjadi batch tuple tanpa menyalin seluruh isinya sekaligus"""
+    for start in range(0, len(df), batch_size):
+        yield list(df.iloc[start:start + batch_size].itertuples(index=False, name=None))
+
+
+def export_frame(df, fmt, prefix='export'):
+    """Ekspor DataFrame yang sudah ada (mis. hasil prediksi) dengan format yang sama"""
+    columns = [str(c) for c in df.columns]
+    return export_batches(frame_batches(df), columns, fmt, prefix, dict(zip(columns, df.dtypes)))
@@ -0,0 +1,82 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from config import ACTIVE_CONFIG
+
+
+def run_forecast(predictor, product_id, days_ahead=30):
+    """Prediksi satu produk beserta grafiknya: (predictions, product, monthly_forecast, chart).
+
+    Grafik memakai prediksi yang sama sehingga model tidak dijalankan dua kali.
+    """
+    predictions, product, monthly_forecast = predictor.predict_sales(product_id, days_ahead)
+    chart = None
+    if predictions:
+        chart = predictor.create_sales_chart(product_id, days_ahead, predictions=predictions)
+    return predictions, product, monthly_forecast, chart
+
+
+class ForecastExecutor:
+    """Prediksi per produk yang dijalankan di thread pool, dibagi antar sesi.
+
+    Halaman memanggil `submit` saat tombol ditekan dan lagi di setiap
+    rerun untuk memeriksa future-nya, sehingga skrip Streamlit tidak
+    menunggu fitting. Permintaan untuk produk dan horizon yang sama memakai
+    satu future, selagi berjalan maupun sesudah selesai, sampai tabel
+    sales/products berubah. `workers` default ACTIVE_CONFIG['forecast_threads'];
+    0 menjalankan prediksi langsung di thread pemanggil.
+    """
+
+    def __init__(self, predictor, workers=None):
+        self.predictor = predictor
+        self.workers = ACTIVE_CONFIG.get('forecast_threads', 2) if workers is None else workers
+        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix='forecast') if self.workers > 0 else None
+        self._lock = threading.Lock()
+        self._futures = {}
+        self.submitted = 0
+        self.reused = 0
+        db = predictor.db
+        if hasattr(db, 'add_change_listener'):
+            db.add_change_listener(self._on_tables_changed)
+
+    def submit(self, product_id, days_ahead=30):
+        """Future hasil run_forecast; future yang ada dipakai ulang kecuali gagal"""
+        key = (int(product_id), int(days_ahead))
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None and not (future.done() and future.exception() is not None):
+                self.reused += 1
+                return future
+            self.submitted += 1
+            if self._pool is not None:
+                future = self._pool.submit(run_forecast, self.predictor, *key)
+                self._futures[key] = future
+                return future
+            future = self._futures[key] = Future()
+        try:
+            future.set_result(run_forecast(self.predictor, *key))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def get(self, product_id, days_ahead=30):
+        """Future yang sudah ada untuk produk dan horizon ini (untuk polling), atau None"""
+        with self._lock:
+            return self._futures.get((int(product_id), int(days_ahead)))
+
+    def _on_tables_changed(self, tables):
+        if tables is None or 'sales' in tables or 'products' in tables:
+            # Future yang masih berjalan dibiarkan selesai; get/submit
+            # berikutnya menghitung ulang dengan data baru
+            with self._lock:
+                self._futures.clear()
+
+    def status(self):
+        with self._lock:
+            running = sum(1 for future in self._futures.values() if not future.done())
+            return {
+                'workers': self.workers,
+                'running': running,
+                'cached': len(self._futures) - running,
+                'submitted': self.submitted,
+                'reused': self.reused,
+            }
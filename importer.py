@@ -0,0 +1,161 @@
+import hashlib
+import os
+import re
+from itertools import islice
+import pandas as pd
+
+IMPORT_COLUMNS = ['Tanggal', 'Produk', 'Varian', 'Jumlah', 'Jenis', 'Harga']
+
+
+def file_kind(file_name):
+    ext = os.path.splitext(file_name or '')[1].lower()
+    if ext == '.csv':
+        return 'csv'
+    if ext == '.xls':
+        return 'xls'
+    return 'xlsx'
+
+
+def file_fingerprint(file):
+    """SHA-1 isi file, dipakai sebagai kunci checkpoint import"""
+    file.seek(0)
+    digest = hashlib.sha1()
+    for block in iter(lambda: file.read(1 << 20), b''):
+        digest.update(block)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def count_rows(file, file_name):
+    """Jumlah baris data (tanpa header), atau None bila tidak diketahui"""
+    kind = file_kind(file_name)
+    file.seek(0)
+    try:
+        if kind == 'csv':
+            newlines = sum(block.count(b'\n') for block in iter(lambda: file.read(1 << 20), b''))
+            return max(newlines - 1, 0)
+        if kind == 'xlsx':
+            from openpyxl import load_workbook
+            workbook = load_workbook(file, read_only=True, data_only=True)
+            try:
+                max_row = workbook.active.max_row
+            finally:
+                workbook.close()
+            return max_row - 1 if max_row else None
+        return None
+    finally:
+        file.seek(0)
+
+
+def iter_chunks(file, file_name, chunk_size, skip_rows=0):
+    """Baca file import per potongan `chunk_size` baris.
+
+    File .xlsx dibaca baris demi baris (openpyxl read-only) dan CSV dengan
+    `read_csv(chunksize=...)`, sehingga hanya satu potongan yang ada di
+    memori. `skip_rows` melewati baris data yang sudah diimport.
+    """
+    kind = file_kind(file_name)
+    file.seek(0)
+
+    if kind == 'csv':
+        reader = pd.read_csv(file, chunksize=chunk_size, skiprows=range(1, skip_rows + 1))
+        with reader:
+            yield from reader
+        return
+
+    if kind == 'xls':
+        # Format lama tidak bisa di-stream; baca sekali lalu potong
+        df = pd.read_excel(file)
+        for start in range(skip_rows, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+        return
+
+    from openpyxl import load_workbook
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [str(col).strip() if col is not None else '' for col in header]
+        rows = islice(rows, skip_rows, None)
+        while True:
+            batch = list(islice(rows, chunk_size))
+            if not batch:
+                break
+            yield pd.DataFrame.from_records(batch, columns=header)
+    finally:
+        workbook.close()
+
+
+def read_preview(file, file_name, n=5):
+    """Baca hanya `n` baris pertama untuk pratinjau"""
+    chunks = iter_chunks(file, file_name, n)
+    try:
+        return next(chunks, pd.DataFrame())
+    finally:
+        chunks.close()
+        file.seek(0)
+
+
+_DUMP_INSERT = re.compile(r"INSERT INTO `?(\w+)`?\s*\(([^)]*)\)\s*VALUES\s*", re.I)
+_DUMP_TOKEN = re.compile(r"""\s*(?:'((?:[^'\\]|\\.|'')*)'|(NULL)\b|(-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)|([(),;]))""", re.S)
+_DUMP_ESCAPES = {'0': '\0', 'n': '\n', 'r': '\r', 't': '\t', 'Z': '\x1a', 'b': '\b'}
+
+
+def _unescape_dump(value):
+    value = value.replace("''", "'")
+    if '\\' not in value:
+        return value
+    return re.sub(r'\\(.)', lambda m: _DUMP_ESCAPES.get(m.group(1), m.group(1)), value, flags=re.S)
+
+
+def _parse_dump_values(text, pos):
+    """Baris-baris tuple VALUES mulai `pos` hingga ';' penutup statement"""
+    rows, row = [], None
+    while True:
+        match = _DUMP_TOKEN.match(text, pos)
+        if match is None:
+            raise ValueError(f"Dump SQL tidak valid di posisi {pos}")
+        pos = match.end()
+        string, null, number, symbol = match.groups()
+        if symbol == '(':
+            row = []
+        elif symbol == ')':
+            rows.append(tuple(row))
+            row = None
+        elif symbol == ';':
+            return rows
+        elif symbol == ',':
+            continue
+        elif null:
+            row.append(None)
+        elif number is not None:
+            row.append(float(number) if any(c in number for c in '.eE') else int(number))
+        else:
+            row.append(_unescape_dump(string))
+
+
+def iter_sql_dump(path, tables):
+    """Baca data dari dump MySQL (mis. stok_material_db.sql hasil phpMyAdmin).
+
+    Setiap statement `INSERT INTO tabel (kolom...) VALUES (...), ...;` untuk
+    tabel di `tables` dihasilkan sebagai (tabel, kolom, list tuple baris),
+    sehingga hanya satu statement yang ada di memori. Statement lain
+    (CREATE/ALTER/SET) dilewati; skema dibuat oleh aplikasi sendiri.
+    """
+    with open(path, encoding='utf-8') as f:
+        statement = []
+        for line in f:
+            if not statement and not line.startswith('INSERT INTO'):
+                continue
+            statement.append(line)
+            if not line.rstrip().endswith(';'):
+                continue
+            text = ''.join(statement)
+            statement = []
+            match = _DUMP_INSERT.match(text)
+            if match is None or match.group(1) not in tables:
+                continue
+            columns = [c.strip().strip('`') for c in match.group(2).split(',')]
+            yield match.group(1), columns, _parse_dump_values(text, match.end())
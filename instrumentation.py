@@ -0,0 +1,355 @@
+import hashlib
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+import numpy as np
+
+SAMPLE_SIZE = 256   # durasi terakhir per kunci untuk persentil
+SLOW_LOG_SIZE = 50  # query lambat terakhir yang ditampilkan di panel
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.I)
+_SPACE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(sql):
+    """Bentuk umum query: literal menjadi ?, daftar IN (...) diringkas, spasi dirapikan"""
+    sql = _STRING.sub('?', sql).replace('%s', '?')
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def _row_bytes(row):
+    values = row.values() if isinstance(row, dict) else row
+    return sum(sys.getsizeof(v) for v in values)
+
+
+class _Timing:
+    """Agregat durasi satu kunci: jumlah, total, maksimum dan sampel terakhir"""
+
+    __slots__ = ('count', 'total', 'max', 'samples', 'rows', 'bytes', 'acquire', 'items')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+        self.rows = 0
+        self.bytes = 0
+        self.acquire = 0.0
+        self.items = 0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+
+    def summary(self):
+        samples = np.fromiter(self.samples, dtype=float) if self.samples else np.zeros(1)
+        return {
+            'count': self.count,
+            'total_ms': self.total * 1000,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'p50_ms': float(np.percentile(samples, 50)) * 1000,
+            'p95_ms': float(np.percentile(samples, 95)) * 1000,
+            'max_ms': self.max * 1000,
+        }
+
+
+class Metrics:
+    """Pencatat waktu query, render halaman dan forecast di dalam proses.
+
+    Query dikelompokkan per fingerprint SQL (lihat `fingerprint`) dengan
+    jumlah baris, perkiraan byte, waktu eksekusi + fetch dan waktu tunggu
+    koneksi dari pool. Durasi lain (render halaman, fit/predict model)
+    dicatat per (jenis, nama) lewat `timed`. Query yang melewati
+    `slow_query_ms` dicetak beserta parameternya.
+    """
+
+    def __init__(self, enabled=True, slow_query_ms=500):
+        self.enabled = enabled
+        self.slow_query_ms = slow_query_ms
+        self.started_at = time.time()
+        self._queries = {}
+        self._timings = {}
+        self._acquire = _Timing()
+        self._slow = deque(maxlen=SLOW_LOG_SIZE)
+        self._lock = threading.Lock()
+        self._textfile_written = 0.0
+
+    def record_acquire(self, seconds):
+        with self._lock:
+            self._acquire.add(seconds)
+
+    def record_query(self, sql, params, seconds, rows, nbytes, acquire=0.0):
+        key = fingerprint(sql)
+        with self._lock:
+            timing = self._queries.get(key)
+            if timing is None:
+                timing = self._queries[key] = _Timing()
+            timing.add(seconds)
+            timing.rows += rows
+            timing.bytes += nbytes
+            timing.acquire += acquire
+        if self.slow_query_ms and seconds * 1000 >= self.slow_query_ms:
+            params_text = repr(tuple(params) if params is not None else ())[:500]
+            with self._lock:
+                self._slow.append({
+                    'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'ms': seconds * 1000,
+                    'rows': rows,
+                    'query': key,
+                    'params': params_text,
+                })
+            print(f"Slow query ({seconds * 1000:.0f} ms, {rows} baris): {key} params={params_text}")
+
+    def record_timing(self, kind, name, seconds, items=1):
+        with self._lock:
+            timing = self._timings.get((kind, name))
+            if timing is None:
+                timing = self._timings[(kind, name)] = _Timing()
+            timing.add(seconds)
+            timing.items += items
+
+    @contextmanager
+    def timed(self, kind, name, items=1):
+        """Catat durasi blok `with` sebagai (kind, name), mis. ('render', 'Dashboard')"""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_timing(kind, name, time.perf_counter() - started, items)
+
+    def wrap(self, connection, acquire=0.0):
+        """Koneksi yang mencatat setiap query; koneksi asli bila instrumentasi nonaktif"""
+        if not self.enabled:
+            return connection
+        self.record_acquire(acquire)
+        return InstrumentedConnection(connection, self, acquire)
+
+    def reset(self):
+        with self._lock:
+            self._queries.clear()
+            self._timings.clear()
+            self._acquire = _Timing()
+            self._slow.clear()
+            self.started_at = time.time()
+
+    def query_stats(self):
+        """Statistik per fingerprint query, urut total waktu terbesar"""
+        with self._lock:
+            rows = [
+                {
+                    'query': key,
+                    **timing.summary(),
+                    'rows': timing.rows,
+                    'bytes': timing.bytes,
+                    'acquire_ms': timing.acquire * 1000,
+                }
+                for key, timing in self._queries.items()
+            ]
+        return sorted(rows, key=lambda r: r['total_ms'], reverse=True)
+
+    def timing_stats(self, kind=None):
+        """Statistik durasi per (jenis, nama), opsional hanya satu jenis"""
+        with self._lock:
+            rows = [
+                {'kind': k, 'name': name, **timing.summary(), 'items': timing.items}
+                for (k, name), timing in self._timings.items()
+                if kind is None or k == kind
+            ]
+        return sorted(rows, key=lambda r: r['total_ms'], reverse=True)
+
+    def acquire_stats(self):
+        with self._lock:
+            return self._acquire.summary()
+
+    def slow_queries(self):
+        with self._lock:
+            return list(reversed(self._slow))
+
+    def prometheus_text(self, extra=None):
+        """Metrik dalam format teks Prometheus (exposition format 0.0.4).
+
+        `extra` adalah {nama_metrik: nilai} tambahan berjenis gauge,
+        mis. status pool koneksi.
+        """
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ','.join(f'{k}="{_escape_label(v)}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        queries = self.query_stats()
+        query_labels = [
+            {'query_id': hashlib.sha1(q['query'].encode()).hexdigest()[:10], 'query': q['query'][:200]}
+            for q in queries
+        ]
+        metric('stok_query_seconds_total', 'counter', "Total waktu eksekusi dan fetch per fingerprint query",
+               [(l, q['total_ms'] / 1000) for l, q in zip(query_labels, queries)])
+        metric('stok_query_calls_total', 'counter', "Jumlah eksekusi per fingerprint query",
+               [(l, q['count']) for l, q in zip(query_labels, queries)])
+        metric('stok_query_rows_total', 'counter', "Baris yang dibaca atau diubah per fingerprint query",
+               [(l, q['rows']) for l, q in zip(query_labels, queries)])
+        metric('stok_query_bytes_total', 'counter', "Perkiraan byte hasil per fingerprint query",
+               [(l, q['bytes']) for l, q in zip(query_labels, queries)])
+        metric('stok_query_seconds_max', 'gauge', "Durasi terlama per fingerprint query",
+               [(l, q['max_ms'] / 1000) for l, q in zip(query_labels, queries)])
+
+        acquire = self.acquire_stats()
+        metric('stok_pool_acquire_seconds_total', 'counter', "Total waktu menunggu koneksi dari pool",
+               [({}, acquire['total_ms'] / 1000)])
+        metric('stok_pool_acquire_total', 'counter', "Jumlah peminjaman koneksi dari pool",
+               [({}, acquire['count'])])
+
+        timings = self.timing_stats()
+        metric('stok_duration_seconds_total', 'counter', "Total durasi render halaman dan forecast",
+               [({'kind': t['kind'], 'name': t['name']}, t['total_ms'] / 1000) for t in timings])
+        metric('stok_duration_calls_total', 'counter', "Jumlah render halaman dan forecast",
+               [({'kind': t['kind'], 'name': t['name']}, t['count']) for t in timings])
+        metric('stok_duration_p95_seconds', 'gauge', "Persentil 95 durasi dari sampel terakhir",
+               [({'kind': t['kind'], 'name': t['name']}, t['p95_ms'] / 1000) for t in timings])
+
+        for name, value in (extra or {}).items():
+            metric(name, 'gauge', name.replace('_', ' '), [({}, value)])
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path, interval=0, extra=None):
+        """Tulis prometheus_text ke `path` (mis. untuk textfile collector node_exporter).
+
+        Ditulis atomik lewat file sementara; dilewati bila penulisan
+        terakhir belum lewat `interval` detik. Mengembalikan True bila ditulis.
+        """
+        now = time.monotonic()
+        if interval and now - self._textfile_written < interval:
+            return False
+        self._textfile_written = now
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(self.prometheus_text(extra))
+            os.replace(tmp, path)
+            return True
+        except OSError as e:
+            print(f"Error writing metrics file: {e}")
+            return False
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+class InstrumentedCursor:
+    """Cursor yang mengukur execute + fetch dan mencatatnya saat cursor ditutup atau dipakai ulang"""
+
+    def __init__(self, cursor, connection):
+        self._cursor = cursor
+        self._connection = connection
+        self._sql = None
+
+    def _start(self, sql, params):
+        self._finish()
+        self._sql = sql
+        self._params = params
+        self._seconds = 0.0
+        self._rows = 0
+        self._bytes = 0
+
+    def _fetched(self, rows, seconds):
+        self._seconds += seconds
+        if rows:
+            self._rows += len(rows)
+            # Perkiraan dari baris pertama; menghitung setiap baris terlalu mahal
+            self._bytes += _row_bytes(rows[0]) * len(rows)
+
+    def _finish(self):
+        if self._sql is None:
+            return
+        rows = self._rows
+        if not rows:
+            rowcount = getattr(self._cursor, 'rowcount', -1)
+            rows = rowcount if rowcount and rowcount > 0 else 0
+        self._connection._record(self._sql, self._params, self._seconds, rows, self._bytes)
+        self._sql = None
+
+    def execute(self, sql, params=None, *args, **kwargs):
+        self._start(sql, params)
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(sql, params, *args, **kwargs)
+        finally:
+            self._seconds += time.perf_counter() - started
+
+    def executemany(self, sql, seq_of_params, *args, **kwargs):
+        seq_of_params = list(seq_of_params)
+        self._start(sql, seq_of_params[0] if seq_of_params else None)
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(sql, seq_of_params, *args, **kwargs)
+        finally:
+            self._seconds += time.perf_counter() - started
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._fetched([row] if row is not None else [], time.perf_counter() - started)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        started = time.perf_counter()
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._fetched(rows, time.perf_counter() - started)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._fetched(rows, time.perf_counter() - started)
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._finish()
+        return self._cursor.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """Koneksi pinjaman pool yang membungkus cursor dengan InstrumentedCursor.
+
+    Waktu tunggu koneksi dari pool dibebankan ke query pertama.
+    """
+
+    def __init__(self, connection, metrics, acquire=0.0):
+        self._connection = connection
+        self._metrics = metrics
+        self._acquire = acquire
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._connection.cursor(*args, **kwargs), self)
+
+    def _record(self, sql, params, seconds, rows, nbytes):
+        acquire, self._acquire = self._acquire, 0.0
+        self._metrics.record_query(sql, params, seconds, rows, nbytes, acquire)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
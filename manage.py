@@ -0,0 +1,105 @@
+"""Perintah pemeliharaan offline, mis. dijadwalkan lewat cron:
+
+    python manage.py train-models [--product-id ID ...] [--workers N]
+    python manage.py refresh-restock [--days N] [--workers N] [--force]
+    python manage.py install-triggers
+    python manage.py rebuild-sales-daily [--start YYYY-MM-DD] [--end YYYY-MM-DD]
+    python manage.py load-dump [stok_material_db.sql]
+"""
+import argparse
+import time
+from config import ACTIVE_CONFIG
+from database import DatabaseManager
+from model_registry import DiskModelStore
+from prediction import SalesPredictor
+
+
+def train_models(args):
+    db = DatabaseManager()
+    predictor = SalesPredictor(db, store=DiskModelStore(args.model_dir))
+    started = time.perf_counter()
+    result = predictor.train_all(args.product_id, workers=args.workers)
+    print(
+        f"{result['products']} produk: {result['trained']} model di-fit ulang, "
+        f"{result['reused']} masih terkini ({time.perf_counter() - started:.1f} detik) -> {args.model_dir}"
+    )
+
+
+def refresh_restock(args):
+    db = DatabaseManager()
+    predictor = SalesPredictor(db, store=DiskModelStore(args.model_dir))
+    result = predictor.refresh_restock_recommendations(args.days, workers=args.workers, force=args.force)
+    print(
+        f"{result['refreshed']} dari {result['products']} produk dihitung ulang "
+        f"({result['seconds']:.1f} detik){'' if result['saved'] else ' - GAGAL disimpan'}"
+    )
+
+
+def install_triggers(args):
+    db = DatabaseManager()
+    if db.run_migrations() and db.install_table_version_triggers():
+        print("Trigger table_versions terpasang")
+    else:
+        print("Gagal memasang trigger table_versions")
+
+
+def rebuild_sales_daily(args):
+    db = DatabaseManager()
+    started = time.perf_counter()
+    written = db.rebuild_sales_daily(args.start, args.end)
+    if written is False:
+        print("Gagal membangun ulang sales_daily")
+    else:
+        print(f"sales_daily dibangun ulang: {written} baris ({time.perf_counter() - started:.1f} detik)")
+
+
+def load_dump(args):
+    db = DatabaseManager()
+    db.create_database_and_tables()
+    if not db.run_migrations():
+        print("Gagal menjalankan migrasi")
+        return
+    started = time.perf_counter()
+    counts = db.load_sql_dump(args.path)
+    if counts is False:
+        print(f"Gagal memuat {args.path}")
+    else:
+        rows = ', '.join(f"{table}: {n}" for table, n in counts.items())
+        print(f"{args.path} dimuat ke {db.backend.label} ({rows}; {time.perf_counter() - started:.1f} detik)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perintah pemeliharaan Toko Material")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    train = commands.add_parser('train-models', help="Latih dan simpan model prediksi semua produk")
+    train.add_argument('--product-id', type=int, action='append', help="Batasi ke produk tertentu (boleh berulang)")
+    train.add_argument('--workers', type=int, default=None, help="Jumlah thread paralel (default: forecast_workers)")
+    train.add_argument('--model-dir', default=ACTIVE_CONFIG.get('model_dir', 'models'))
+    train.set_defaults(func=train_models)
+
+    restock = commands.add_parser('refresh-restock', help="Hitung ulang rekomendasi restock yang usang")
+    restock.add_argument('--days', type=int, default=30, help="Horizon prediksi (hari)")
+    restock.add_argument('--workers', type=int, default=ACTIVE_CONFIG.get('restock_workers', 0))
+    restock.add_argument('--force', action='store_true', help="Hitung ulang semua produk")
+    restock.add_argument('--model-dir', default=ACTIVE_CONFIG.get('model_dir', 'models'))
+    restock.set_defaults(func=refresh_restock)
+
+    triggers = commands.add_parser('install-triggers', help="Pasang trigger database untuk table_versions")
+    triggers.set_defaults(func=install_triggers)
+
+    rollup = commands.add_parser('rebuild-sales-daily', help="Bangun ulang rollup sales_daily dari tabel sales")
+    rollup.add_argument('--start', help="Tanggal awal (YYYY-MM-DD), default seluruh data")
+    rollup.add_argument('--end', help="Tanggal akhir (YYYY-MM-DD)")
+    rollup.set_defaults(func=rebuild_sales_daily)
+
+    dump = commands.add_parser('load-dump', help="Muat data dari dump MySQL (products, sales, users)")
+    dump.add_argument('path', nargs='?', default='stok_material_db.sql')
+    dump.set_defaults(func=load_dump)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
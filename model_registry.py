@@ -0,0 +1,135 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+
+class ModelRegistry:
+    """Cache LRU thread-safe untuk model prediksi yang sudah di-fit.
+
+    Kunci berbentuk (product_id, feature_set, watermark). Watermark berubah
+    setiap ada penjualan baru untuk produk tersebut, sehingga model lama tidak
+    akan terpakai lagi dan langsung dibuang saat model baru disimpan.
+    """
+
+    def __init__(self, max_size=500):
+        self.max_size = max_size
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                self.misses += 1
+                return None
+            self._models.move_to_end(key)
+            self.hits += 1
+            return model
+
+    def put(self, key, model):
+        product_id, feature_set = key[0], key[1]
+        with self._lock:
+            stale = [k for k in self._models if k[0] == product_id and k[1] == feature_set and k != key]
+            for k in stale:
+                del self._models[k]
+            self._models[key] = model
+            self._models.move_to_end(key)
+            while len(self._models) > self.max_size:
+                self._models.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, product_id=None):
+        """Buang model satu produk, atau semua model bila product_id None"""
+        with self._lock:
+            if product_id is None:
+                self._models.clear()
+                return
+            for k in [k for k in self._models if k[0] == product_id]:
+                del self._models[k]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._models),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+class DiskModelStore:
+    """Simpan model yang sudah di-fit ke disk agar bertahan setelah restart.
+
+    Tiap produk punya `<feature_set>/product_<id>.joblib` (model) dan
+    `.json` (metadata: watermark, jendela data latih, jumlah baris, kolom
+    fitur, metrik). Metadata dibaca lebih dulu sehingga model usang tidak
+    perlu di-load.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _paths(self, product_id, feature_set):
+        base = os.path.join(self.directory, feature_set, f"product_{int(product_id)}")
+        return base + '.joblib', base + '.json'
+
+    def load(self, key):
+        product_id, feature_set, watermark = key
+        model_path, meta_path = self._paths(product_id, feature_set)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                metadata = json.load(f)
+            if tuple(metadata.get('watermark') or ()) != tuple(watermark):
+                return None
+            import joblib
+            return joblib.load(model_path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error loading model {model_path}: {e}")
+            return None
+
+    def save(self, key, model, metadata):
+        product_id, feature_set, watermark = key
+        model_path, meta_path = self._paths(product_id, feature_set)
+        metadata = {
+            **metadata,
+            'product_id': int(product_id),
+            'feature_set': feature_set,
+            'watermark': [int(v) for v in watermark],
+            'saved_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        try:
+            import joblib
+            os.makedirs(os.path.dirname(model_path), exist_ok=True)
+            # Tulis ke file sementara lalu rename agar pembaca tidak melihat file setengah jadi
+            suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+            joblib.dump(model, model_path + suffix)
+            os.replace(model_path + suffix, model_path)
+            with open(meta_path + suffix, 'w', encoding='utf-8') as f:
+                json.dump(metadata, f, indent=2)
+            os.replace(meta_path + suffix, meta_path)
+            return True
+        except Exception as e:
+            print(f"Error saving model {model_path}: {e}")
+            return False
+
+    def metadata(self, feature_set):
+        """Metadata semua model tersimpan untuk satu feature set"""
+        directory = os.path.join(self.directory, feature_set)
+        if not os.path.isdir(directory):
+            return []
+        items = []
+        for name in sorted(os.listdir(directory)):
+            if name.endswith('.json'):
+                with open(os.path.join(directory, name), encoding='utf-8') as f:
+                    items.append(json.load(f))
+        return items
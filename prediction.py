@@ -1,18 +1,306 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import plotly.graph_objects as go
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import StandardScaler
+from catalog import text_values
+from config import ACTIVE_CONFIG
+from model_registry import ModelRegistry
+
+FEATURE_COLS = ['day_of_week', 'day_of_month', 'month', 'is_weekend', 'prev_day_sales']
+MIN_TRAINING_ROWS = 30
+
+# Mode 'recursive': deret harian padat dengan lag/rolling, diprediksi rekursif
+LAGS = (1, 7, 14, 28)
+WINDOWS = (7, 14, 28)
+HISTORY_DAYS = max(LAGS + WINDOWS)
+DAILY_FEATURE_COLS = (
+    ['day_of_week', 'day_of_month', 'month', 'is_weekend']
+    + [f'lag_{k}' for k in LAGS]
+    + [f'rolling_mean_{w}' for w in WINDOWS]
+)
+
+# Ubah versi bila fitur/model berubah agar model lama di cache tidak terpakai
+FEATURE_SETS = {'basic': 'basic_v1', 'recursive': 'daily_lags_v2'}
+
+
+def _add_features(df, by=None):
+    """Tambah fitur waktu dan lag secara vektor; `by` memisahkan lag per kelompok"""
+    tanggal = df['tanggal']
+    df['day_of_week'] = tanggal.dt.dayofweek
+    df['day_of_month'] = tanggal.dt.day
+    df['month'] = tanggal.dt.month
+    df['day_of_year'] = tanggal.dt.dayofyear
+    df['is_weekend'] = (df['day_of_week'] >= 5).astype(int)
+
+    # Lag: penjualan baris sebelumnya
+    lag = df.groupby(by, sort=False)['jumlah'].shift(1) if by else df['jumlah'].shift(1)
+    df['prev_day_sales'] = lag.fillna(0)
+    return df
+
+
+class FittedModel:
+    """Model satu produk yang sudah di-fit; cukup untuk memprediksi tanpa data penjualan"""
+
+    def __init__(self, method, confidence, last_date, last_value, average=None, scaler=None, model=None,
+                 n_rows=0, first_date=None, metrics=None):
+        self.method = method
+        self.confidence = confidence
+        self.last_date = last_date
+        self.last_value = last_value
+        self.average = average
+        self.scaler = scaler
+        self.model = model
+        self.n_rows = n_rows
+        self.first_date = first_date
+        self.metrics = metrics or {}
+
+    def describe(self):
+        """Metadata model untuk disimpan bersama artefaknya"""
+        return {
+            'method': self.method,
+            'confidence': self.confidence,
+            'training_window': [
+                self.first_date.strftime('%Y-%m-%d') if self.first_date is not None else None,
+                self.last_date.strftime('%Y-%m-%d'),
+            ],
+            'row_count': int(self.n_rows),
+            'feature_columns': FEATURE_COLS if self.model is not None else [],
+            'metrics': self.metrics,
+        }
+
+    def predict(self, days_ahead):
+        """Kembalikan (tanggal_prediksi, nilai_prediksi) untuk `days_ahead` hari"""
+        if self.model is None:
+            start = pd.Timestamp(datetime.now().date()) + pd.Timedelta(days=1)
+            dates = pd.date_range(start, periods=days_ahead, freq='D')
+            return dates, np.full(days_ahead, self.average)
+
+        dates = pd.date_range(self.last_date + pd.Timedelta(days=1), periods=days_ahead, freq='D')
+        prev_day_sales = np.zeros(days_ahead)
+        prev_day_sales[0] = self.last_value
+        X_future = np.column_stack([
+            dates.dayofweek,
+            dates.day,
+            dates.month,
+            (dates.dayofweek >= 5).astype(int),
+            prev_day_sales,
+        ])
+        values = np.maximum(self.model.predict(self.scaler.transform(X_future)), 0)
+        return dates, np.round(values, 2)
+
+
+def _new_regression():
+    """StandardScaler + LinearRegression; sklearn baru diimport saat model pertama di-fit"""
+    from sklearn.linear_model import LinearRegression
+    from sklearn.preprocessing import StandardScaler
+    return StandardScaler(), LinearRegression()
+
+
+def _fit_series(tanggal, jumlah, X):
+    """Fit model untuk satu produk.
+
+    Fungsi tingkat modul tanpa state sehingga aman dijalankan di thread pool.
+    """
+    first_date, last_date = pd.Timestamp(tanggal[0]), pd.Timestamp(tanggal[-1])
+    if len(jumlah) < MIN_TRAINING_ROWS:
+        avg = max(1, round(float(np.mean(jumlah)), 2))
+        metrics = {'mae': float(np.mean(np.abs(jumlah - avg)))}
+        return FittedModel('rata_rata_sederhana', 'sedang', last_date, jumlah[-1], average=avg,
+                           n_rows=len(jumlah), first_date=first_date, metrics=metrics)
+
+    scaler, model = _new_regression()
+    X_scaled = scaler.fit_transform(X)
+    model.fit(X_scaled, jumlah)
+    fitted_values = model.predict(X_scaled)
+    metrics = {
+        'r2': float(model.score(X_scaled, jumlah)),
+        'mae': float(np.mean(np.abs(jumlah - fitted_values))),
+    }
+    return FittedModel('regresi_linear', 'tinggi', last_date, jumlah[-1], scaler=scaler, model=model,
+                       n_rows=len(jumlah), first_date=first_date, metrics=metrics)
+
+
+def _fit_group(args):
+    product_id, tanggal, jumlah, X = args
+    return product_id, _fit_series(tanggal, jumlah, X)
+
+
+def _dense_daily(tanggal, jumlah):
+    """Deret harian padat dari total harian yang urut; hari tanpa penjualan bernilai 0"""
+    days = ((tanggal - tanggal[0]) // np.timedelta64(1, 'D')).astype(np.int64)
+    y = np.zeros(days[-1] + 1)
+    np.add.at(y, days, jumlah)
+    return y
+
+
+def _calendar_features(dates):
+    return np.column_stack([
+        dates.dayofweek,
+        dates.day,
+        dates.month,
+        (dates.dayofweek >= 5).astype(int),
+    ])
+
+
+def _lag_features(y, t):
+    """Fitur lag dan rolling mean untuk indeks hari `t` (array), hanya dari y[:t].
+
+    Lag yang melampaui awal deret diisi rata-rata kumulatif y[:t].
+    """
+    cs = np.concatenate(([0.0], np.cumsum(y)))
+    expanding = cs[t] / np.maximum(t, 1)
+    columns = []
+    for k in LAGS:
+        idx = t - k
+        columns.append(np.where(idx >= 0, y[np.maximum(idx, 0)], expanding))
+    for w in WINDOWS:
+        start = np.maximum(t - w, 0)
+        columns.append((cs[t] - cs[start]) / np.maximum(t - start, 1))
+    return np.column_stack(columns)
+
+
+class RecursiveFittedModel(FittedModel):
+    """Model deret harian yang memprediksi hari demi hari dengan memakai hasilnya sendiri sebagai lag"""
+
+    def __init__(self, method, confidence, last_date, history, **kwargs):
+        super().__init__(method, confidence, last_date, history[-1], **kwargs)
+        self.history = history
+
+    def describe(self):
+        return {**super().describe(), 'feature_columns': DAILY_FEATURE_COLS if self.model is not None else []}
+
+    def predict(self, days_ahead):
+        if self.model is None:
+            return super().predict(days_ahead)
+
+        dates = pd.date_range(self.last_date + pd.Timedelta(days=1), periods=days_ahead, freq='D')
+        calendar = _calendar_features(dates)
+        # Hitung regresi linear langsung dengan NumPy: jauh lebih murah daripada
+        # memanggil scaler/model sklearn untuk satu baris di setiap langkah
+        mean, scale = self.scaler.mean_, self.scaler.scale_
+        coef, intercept = self.model.coef_, self.model.intercept_
+
+        # Bagian kalender tidak bergantung pada prediksi sebelumnya: hitung sekaligus
+        n_cal = calendar.shape[1]
+        lag_weight = coef[n_cal:] / scale[n_cal:]
+        base = ((calendar - mean[:n_cal]) / scale[:n_cal]) @ coef[:n_cal] + intercept - mean[n_cal:] @ lag_weight
+
+        buffer = [float(v) for v in self.history]
+        n = len(buffer)
+        for h in range(days_ahead):
+            t = n + h
+            features = [buffer[t - k] if t >= k else sum(buffer) / t for k in LAGS]
+            features += [sum(buffer[max(t - w, 0):t]) / min(w, t) for w in WINDOWS]
+            buffer.append(max(float(base[h] + np.dot(lag_weight, features)), 0.0))
+        return dates, np.round(np.array(buffer[n:]), 2)
+
+
+def _fit_daily_series(tanggal, jumlah):
+    """Fit model rekursif dari total harian satu produk (tanggal urut, boleh bolong)"""
+    y = _dense_daily(tanggal, jumlah)
+    first_date = pd.Timestamp(tanggal[0])
+    last_date = pd.Timestamp(tanggal[-1])
+    history = y[-HISTORY_DAYS:]
+    # Ambang dihitung dari hari yang benar-benar ada penjualannya, bukan
+    # panjang deret setelah diisi nol: 2 transaksi berjarak 60 hari tidak
+    # cukup untuk model lag. Di bawah ambang dipakai rata-rata sederhana
+    # seperti mode 'basic' (rata-rata harian termasuk hari tanpa penjualan).
+    if np.count_nonzero(y) < MIN_TRAINING_ROWS:
+        avg = round(float(np.mean(y)), 2)
+        metrics = {'mae': float(np.mean(np.abs(y - avg)))}
+        return RecursiveFittedModel('rata_rata_sederhana', 'sedang', last_date, history, average=avg,
+                                    n_rows=len(y), first_date=first_date, metrics=metrics)
+
+    t = np.arange(1, len(y))
+    dates = pd.date_range(first_date, periods=len(y), freq='D')[t]
+    X = np.hstack((_calendar_features(dates), _lag_features(y, t)))
+    target = y[t]
+
+    scaler, model = _new_regression()
+    X_scaled = scaler.fit_transform(X)
+    # Kolom konstan (skala 0) dibiarkan apa adanya oleh StandardScaler
+    model.fit(X_scaled, target)
+    fitted_values = model.predict(X_scaled)
+    metrics = {
+        'r2': float(model.score(X_scaled, target)),
+        'mae': float(np.mean(np.abs(target - fitted_values))),
+    }
+    return RecursiveFittedModel('regresi_rekursif', 'tinggi', last_date, history, scaler=scaler, model=model,
+                                n_rows=len(y), first_date=first_date, metrics=metrics)
+
+
+def _fit_daily_group(args):
+    product_id, tanggal, jumlah = args
+    return product_id, _fit_daily_series(tanggal, jumlah)
+
 
 class SalesPredictor:
     """Prediksi penjualan material menggunakan regresi linear"""
     
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, registry=None, store=None, mode=None):
         self.db = db_manager
-        self.model = LinearRegression()
-        self.scaler = StandardScaler()
+        self.mode = mode or ACTIVE_CONFIG.get('forecast_mode', 'recursive')
+        self.feature_set = FEATURE_SETS[self.mode]
+        self.registry = registry or ModelRegistry(ACTIVE_CONFIG.get('model_cache_size', 500))
+        self.store = store
         self.is_trained = False
+        # Watermark semua produk, disimpan selama tabel sales tidak berubah.
+        # Hanya aktif bila database bisa memberi tahu perubahan tabel.
+        self._watermarks = None
+        self._previous_watermarks = {}
+        self._watermarks_lock = threading.Lock()
+        self._track_changes = hasattr(db_manager, 'add_change_listener')
+        if self._track_changes:
+            db_manager.add_change_listener(self._on_tables_changed)
+        self.metrics = getattr(db_manager, 'metrics', None)
+
+    def _timed(self, stage, items=1):
+        """Catat durasi fit/predict ke metrics database (halaman Performa) bila tersedia"""
+        return self.metrics.timed('forecast', stage, items) if self.metrics else nullcontext()
+
+    def _on_tables_changed(self, tables):
+        if tables is None or 'sales' in tables or 'products' in tables:
+            self._watermarks = None
+
+    def _sales_watermarks(self, product_ids):
+        """{product_id: watermark} untuk `product_ids`.
+
+        Bila perubahan tabel dilacak, watermark semua produk dimuat sekali
+        dan dipakai ulang sampai tabel sales berubah; saat dimuat ulang,
+        model produk yang watermark-nya berubah langsung dibuang dari registry.
+        """
+        if not self._track_changes:
+            return self.db.sales_watermarks(product_ids)
+        with self._watermarks_lock:
+            watermarks = self._watermarks
+            if watermarks is None:
+                watermarks = self.db.sales_watermarks()
+                # Hasil kosong bisa berarti query gagal; jangan disimpan
+                if watermarks:
+                    previous = self._previous_watermarks
+                    for product_id in set(previous) | set(watermarks):
+                        if previous.get(product_id) != watermarks.get(product_id):
+                            self.registry.discard(product_id)
+                    self._watermarks = self._previous_watermarks = watermarks
+        return {pid: watermarks[pid] for pid in product_ids if pid in watermarks}
+
+    def _cached_model(self, key):
+        """Model dari registry memori, atau dari disk (lazy) bila tersedia"""
+        fitted = self.registry.get(key)
+        if fitted is None and self.store is not None:
+            fitted = self.store.load(key)
+            if fitted is not None:
+                self.registry.put(key, fitted)
+        return fitted
+
+    def _remember_model(self, key, fitted):
+        self.registry.put(key, fitted)
+        if self.store is not None:
+            self.store.save(key, fitted, fitted.describe())
         
     def _prepare_features(self, df):
         """Prepare features for the model"""
@@ -23,17 +311,22 @@ class SalesPredictor:
         df['tanggal'] = pd.to_datetime(df['tanggal'])
         df = df.sort_values('tanggal')
         
-        # Basic time features
-        df['day_of_week'] = df['tanggal'].dt.dayofweek
-        df['day_of_month'] = df['tanggal'].dt.day
-        df['month'] = df['tanggal'].dt.month
-        df['day_of_year'] = df['tanggal'].dt.dayofyear
-        df['is_weekend'] = df['day_of_week'].isin([5, 6]).astype(int)
-        
-        # Add lag features (previous day's sales)
-        df['prev_day_sales'] = df['jumlah'].shift(1).fillna(0)
-        
-        return df
+        return _add_features(df)
+
+    @staticmethod
+    def _to_records(dates, values, method, confidence, product):
+        return [
+            {
+                'tanggal': date.strftime('%Y-%m-%d'),
+                'predicted_sales': value,
+                'confidence': confidence,
+                'method': method,
+                'produk_id': product.get('id', 0),
+                'nama_produk': product.get('nama_produk', 'Tidak Diketahui'),
+                'varian': product.get('varian', '')
+            }
+            for date, value in zip(dates, np.asarray(values).tolist())
+        ]
     
     def _fallback_prediction(self, product, days_ahead, reason):
         default_qty = 1
@@ -80,91 +373,33 @@ class SalesPredictor:
     
     def predict_sales(self, product_id, days_ahead=30):
         try:
-            products_df = self.db.get_products()
-            if products_df is None or products_df.empty:
-                fallback_preds, product_info = self._fallback_prediction(
-                    {'id': product_id, 'nama_produk': 'Unknown', 'varian': '', 'stok_awal': 1}, 
-                    days_ahead, 
-                    'no_products'
+            product = self.db.get_product_by_id(product_id)
+            if not product:
+                fallback_pred = self._fallback_prediction(
+                    {'id': product_id, 'nama_produk': 'Tidak Diketahui', 'varian': '', 'stok_awal': 1},
+                    days_ahead,
+                    'produk_tidak_ditemukan'
                 )
-                
-                monthly_forecast = self._aggregate_daily_to_monthly(fallback_preds)
-                
-                return fallback_preds, product_info, monthly_forecast
-                
-            product = products_df[products_df['id'] == product_id].iloc[0].to_dict()
-            
-            sales_df = self.db.get_sales_data()
-            if sales_df is None or sales_df.empty:
-                fallback_pred = self._fallback_prediction(product, days_ahead, 'no_sales_data')
                 return fallback_pred[0], fallback_pred[1], None
-                
-            product_sales = sales_df[sales_df['product_id'] == product_id].copy()
-            product_sales = sales_df[sales_df['product_id'] == product_id].copy()
-            if product_sales.empty:
+            
+            watermark = self._sales_watermarks([product_id]).get(product_id)
+            if watermark is None:
                 fallback_pred = self._fallback_prediction(product, days_ahead, 'no_product_sales')
                 return fallback_pred[0], fallback_pred[1], None
-                
-            df = self._prepare_features(product_sales)
-            if df.empty:
-                fallback_pred = self._fallback_prediction(product, days_ahead, 'feature_prep_failed')
-                return fallback_pred[0], fallback_pred[1], None
-            
-            avg_daily_sales = df['jumlah'].mean()
-            
-            if len(df) < 30:
-                predictions = []
-                for i in range(1, days_ahead + 1):
-                    pred_date = datetime.now() + timedelta(days=i)
-                    predictions.append({
-                        'tanggal': pred_date.strftime('%Y-%m-%d'),
-                        'predicted_sales': max(1, round(avg_daily_sales, 2)),
-                        'confidence': 'sedang',
-                        'method': 'rata_rata_sederhana',
-                        'produk_id': product_id,
-                        'nama_produk': product.get('nama_produk', 'Tidak Diketahui'),
-                        'varian': product.get('varian', '')
-                    })
-                
-                monthly_forecast = self._aggregate_daily_to_monthly(predictions)
-                return predictions, product, monthly_forecast
-            
-            feature_cols = ['day_of_week', 'day_of_month', 'month', 'is_weekend', 'prev_day_sales']
-            X = df[feature_cols]
-            y = df['jumlah']
-            
-            X_scaled = self.scaler.fit_transform(X)
-            
-            self.model.fit(X_scaled, y)
-            
-            last_date = df['tanggal'].max()
-            future_dates = [last_date + timedelta(days=i) for i in range(1, days_ahead + 1)]
-            
-            future_df = pd.DataFrame({
-                'tanggal': future_dates,
-                'day_of_week': [d.weekday() for d in future_dates],
-                'day_of_month': [d.day for d in future_dates],
-                'month': [d.month for d in future_dates],
-                'is_weekend': [1 if d.weekday() >= 5 else 0 for d in future_dates],
-                'prev_day_sales': [df['jumlah'].iloc[-1]] + [0] * (days_ahead - 1)
-            })
-            
-            X_future = future_df[feature_cols]
-            X_future_scaled = self.scaler.transform(X_future)
-            predictions_values = self.model.predict(X_future_scaled)
-            predictions_values = [max(0, p) for p in predictions_values]
-            
-            predictions = []
-            for i in range(days_ahead):
-                predictions.append({
-                    'tanggal': future_dates[i].strftime('%Y-%m-%d'),
-                    'predicted_sales': round(predictions_values[i], 2),
-                    'confidence': 'tinggi',
-                    'method': 'regresi_linear',
-                    'produk_id': product_id,
-                    'nama_produk': product.get('nama_produk', 'Tidak Diketahui'),
-                    'varian': product.get('varian', '')
-                })
+
+            key = (product_id, self.feature_set, watermark)
+            fitted = self._cached_model(key)
+            if fitted is None:
+                with self._timed('fit'):
+                    fitted = self._fit_products([product_id]).get(product_id)
+                if fitted is None:
+                    fallback_pred = self._fallback_prediction(product, days_ahead, 'no_product_sales')
+                    return fallback_pred[0], fallback_pred[1], None
+                self._remember_model(key, fitted)
+
+            with self._timed('predict'):
+                dates, values = fitted.predict(days_ahead)
+            predictions = self._to_records(dates, values, fitted.method, fitted.confidence, {**product, 'id': product_id})
             
             monthly_forecast = self._aggregate_daily_to_monthly(predictions)
                 
@@ -172,6 +407,12 @@ class SalesPredictor:
             
         except Exception as e:
             print(f"Error in predict_sales: {e}")
+            return self._moving_average_prediction(product_id, days_ahead)
+
+    def _moving_average_prediction(self, product_id, days_ahead):
+        """Prediksi cadangan dari rata-rata bergerak 7 hari bila model gagal"""
+        product = None
+        try:
             product = self.db.get_product_by_id(product_id)
             if not product:
                 fallback_pred = self._fallback_prediction(
@@ -185,104 +426,214 @@ class SalesPredictor:
             if sales_data is None or sales_data.empty:
                 fallback_pred = self._fallback_prediction(product, days_ahead, 'tidak_ada_data_penjualan')
                 return fallback_pred[0], fallback_pred[1], None
-                
-            sales_data['tanggal'] = pd.to_datetime(sales_data['tanggal'])
-            sales_data = sales_data.sort_values('tanggal')
-            
-            df = sales_data.copy()
-            df = self._prepare_features(df)
-            
-            if len(df) < 7:
-                avg_sales = df['jumlah'].mean() if not df.empty else product.get('stok_awal', 1)
-                predictions = []
-                for i in range(1, days_ahead + 1):
-                    predictions.append({
-                        'tanggal': (datetime.now() + timedelta(days=i)).strftime('%Y-%m-%d'),
-                        'predicted_sales': round(avg_sales, 2),
-                        'confidence': 'rendah',
-                        'method': 'rata_rata_sederhana',
-                        'produk_id': product_id,
-                        'nama_produk': product.get('nama_produk', 'Tidak Diketahui'),
-                        'varian': product.get('varian', '')
-                    })
-                return predictions, product
-            
-            window = min(7, len(df))
-            avg_sales = df['jumlah'].tail(window).mean()
-            
-            predictions = []
-            last_date = df['tanggal'].max()
             
-            for i in range(1, days_ahead + 1):
-                pred_date = last_date + timedelta(days=i)
-                predictions.append({
-                    'tanggal': pred_date.strftime('%Y-%m-%d'),
-                    'predicted_sales': round(avg_sales, 2),
-                    'confidence': 'sedang',
-                    'method': 'rata_rata_bergerak',
-                    'produk_id': product_id,
-                    'nama_produk': product.get('nama_produk', 'Tidak Diketahui'),
-                    'varian': product.get('varian', '')
-                })
-                
-            return predictions, product
+            if len(sales_data) < 7:
+                avg_sales = sales_data['jumlah'].mean()
+                start = pd.Timestamp(datetime.now().date()) + pd.Timedelta(days=1)
+                method, confidence = 'rata_rata_sederhana', 'rendah'
+            else:
+                avg_sales = sales_data['jumlah'].tail(7).mean()
+                start = sales_data['tanggal'].max() + pd.Timedelta(days=1)
+                method, confidence = 'rata_rata_bergerak', 'sedang'
+
+            dates = pd.date_range(start, periods=days_ahead, freq='D')
+            predictions = self._to_records(
+                dates, np.full(days_ahead, round(float(avg_sales), 2)), method, confidence, {**product, 'id': product_id}
+            )
+            return predictions, product, self._aggregate_daily_to_monthly(predictions)
             
         except Exception as e:
             print(f"Error in predict_sales: {str(e)}")
-            if 'product' not in locals():
+            if not product:
                 product = {'id': product_id, 'nama_produk': 'Tidak Diketahui', 'stok_awal': 1}
-            return self._fallback_prediction(
+            fallback_pred = self._fallback_prediction(
                 product,
                 days_ahead,
                 f'error: {str(e)}'
             )
+            return fallback_pred[0], fallback_pred[1], None
+
+    def predict_demand(self, product_id, days_ahead=30):
+        """Prediksi kebutuhan harian satu produk: ([{tanggal, predicted_demand, ...}], product)"""
+        predictions, product, _ = self.predict_sales(product_id, days_ahead)
+        demand = [
+            {**{k: v for k, v in p.items() if k != 'predicted_sales'}, 'predicted_demand': p['predicted_sales']}
+            for p in predictions or []
+        ]
+        return demand, product
     
-    def get_restock_recommendations(self):
-        try:
+    def predict_all(self, days_ahead=30, product_ids=None, workers=None):
+        """Prediksi harian untuk banyak produk sekaligus.
+
+        Model diambil dari registry bila watermark penjualan produk belum
+        berubah. Untuk produk lainnya penjualan dimuat sekali, fitur dibangun
+        secara vektor, lalu model di-fit per produk (di thread pool bila
+        `workers` > 1, default dari ACTIVE_CONFIG['forecast_workers']). Mengembalikan
+        DataFrame rapi: product_id, nama_produk, varian, tanggal,
+        predicted_sales, method, confidence.
+        """
+        columns = ['product_id', 'nama_produk', 'varian', 'tanggal', 'predicted_sales', 'method', 'confidence']
+        products_df = self.db.get_products()
+        if products_df is None or products_df.empty:
+            return pd.DataFrame(columns=columns)
+        if product_ids is not None:
+            products_df = products_df[products_df['id'].isin(list(product_ids))]
+
+        fitted_models, _ = self._ensure_models(products_df['id'].tolist(), workers)
+
+        results = {}
+        with self._timed('predict', len(fitted_models)):
+            for product_id, fitted in fitted_models.items():
+                dates, values = fitted.predict(days_ahead)
+                results[product_id] = (dates, values, fitted.method, fitted.confidence)
+
+        products = products_df[['id', 'nama_produk', 'varian']]
+        if products.empty:
+            return pd.DataFrame(columns=columns)
+        fallback = (
+            pd.date_range(pd.Timestamp(datetime.now().date()) + pd.Timedelta(days=1), periods=days_ahead, freq='D'),
+            np.ones(days_ahead), 'fallback_no_product_sales', 'rendah',
+        )
+        parts = [results.get(product_id, fallback) for product_id in products['id']]
+
+        # Susun satu DataFrame dari array gabungan, bukan satu DataFrame per produk
+        return pd.DataFrame({
+            'product_id': np.repeat(products['id'].to_numpy(), days_ahead),
+            'nama_produk': products['nama_produk'].repeat(days_ahead).array,
+            'varian': products['varian'].repeat(days_ahead).array,
+            'tanggal': np.concatenate([part[0].to_numpy() for part in parts]),
+            'predicted_sales': np.concatenate([part[1] for part in parts]),
+            'method': np.repeat([part[2] for part in parts], days_ahead),
+            'confidence': np.repeat([part[3] for part in parts], days_ahead),
+        })[columns]
+
+    def _ensure_models(self, product_ids, workers=None):
+        """Model terkini untuk `product_ids`; hanya produk dengan penjualan baru yang di-fit ulang.
+
+        Mengembalikan ({product_id: FittedModel}, jumlah model yang di-fit).
+        """
+        watermarks = self._sales_watermarks(product_ids)
+        fitted_models = {}
+        stale_ids = []
+        for product_id, watermark in watermarks.items():
+            fitted = self._cached_model((product_id, self.feature_set, watermark))
+            if fitted is None:
+                stale_ids.append(product_id)
+            else:
+                fitted_models[product_id] = fitted
+
+        if stale_ids:
+            with self._timed('fit', len(stale_ids)):
+                new_models = self._fit_products(stale_ids, workers)
+            for product_id, fitted in new_models.items():
+                self._remember_model((product_id, self.feature_set, watermarks[product_id]), fitted)
+            fitted_models.update(new_models)
+        return fitted_models, len(stale_ids)
+
+    def train_all(self, product_ids=None, workers=None):
+        """Fit (dan simpan) model untuk semua produk yang datanya berubah, mis. dari job malam"""
+        if product_ids is None:
             products_df = self.db.get_products()
-            if products_df is None or products_df.empty:
+            product_ids = [] if products_df is None or products_df.empty else products_df['id'].tolist()
+        fitted_models, trained = self._ensure_models(product_ids, workers)
+        return {'products': len(fitted_models), 'trained': trained, 'reused': len(fitted_models) - trained}
+
+    def _fit_products(self, product_ids, workers=None):
+        """Muat penjualan `product_ids` sekali lalu fit model per produk"""
+        if self.mode == 'recursive' and len(product_ids) == 1:
+            # Satu produk: total harian langsung dari rollup sales_daily
+            sales_df = self.db.get_sales_history(product_ids[0], days_back=None)
+            sales_df['product_id'] = product_ids[0]
+        elif self.mode == 'recursive':
+            sales_df = self.db.sales_daily(product_ids=product_ids)
+            sales_df = sales_df.rename(columns={'qty': 'jumlah'})[['product_id', 'tanggal', 'jumlah']]
+        else:
+            sales_df = self.db.query_sales(
+                product_ids=product_ids,
+                columns=['product_id', 'tanggal', 'jumlah'],
+            )
+        if sales_df.empty:
+            return {}
+        # tanggal sudah datetime64 dari DatabaseManager; jumlah float32 dilebarkan untuk fitting
+        sales_df['jumlah'] = sales_df['jumlah'].astype(float)
+
+        if self.mode == 'recursive':
+            daily = sales_df.groupby(['product_id', 'tanggal'], sort=True)['jumlah'].sum().reset_index()
+            tanggal = daily['tanggal'].to_numpy()
+            jumlah = daily['jumlah'].to_numpy(dtype=float)
+            fit_group = _fit_daily_group
+            tasks = [
+                (product_id, tanggal[idx], jumlah[idx])
+                for product_id, idx in daily.groupby('product_id', sort=False).indices.items()
+            ]
+        else:
+            sales_df = sales_df.sort_values(['product_id', 'tanggal'], kind='stable')
+            sales_df = _add_features(sales_df, by='product_id')
+            tanggal = sales_df['tanggal'].to_numpy()
+            jumlah = sales_df['jumlah'].to_numpy(dtype=float)
+            X = sales_df[FEATURE_COLS].to_numpy(dtype=float)
+            fit_group = _fit_group
+            tasks = [
+                (product_id, tanggal[idx], jumlah[idx], X[idx])
+                for product_id, idx in sales_df.groupby('product_id', sort=False).indices.items()
+            ]
+
+        workers = ACTIVE_CONFIG.get('forecast_workers', 0) if workers is None else workers
+        if workers and workers > 1 and len(tasks) > 1:
+            # Thread, bukan proses: fork dari thread latar server Streamlit bisa
+            # mewarisi lock yang sedang dipegang, dan spawn/forkserver menjalankan
+            # ulang app.py (Streamlit memasangnya sebagai __main__) di setiap worker
+            with ThreadPoolExecutor(max_workers=min(workers, os.cpu_count() or 1), thread_name_prefix='fit') as pool:
+                return dict(pool.map(fit_group, tasks))
+        return dict(map(fit_group, tasks))
+
+    def model_cache_stats(self):
+        return self.registry.stats()
+
+    @staticmethod
+    def _restock_summary(forecast, days_ahead):
+        """Ringkas prediksi harian menjadi kebutuhan dan urgensi restock per produk"""
+        summary = forecast.groupby('product_id', sort=False).agg(
+            nama_produk=('nama_produk', 'first'),
+            varian=('varian', 'first'),
+            total_predicted=('predicted_sales', 'sum'),
+            method=('method', 'first'),
+            confidence=('confidence', 'first'),
+        ).reset_index()
+
+        total_predicted = summary['total_predicted'].astype(float)
+        # Safety stock 20% di atas prediksi kebutuhan
+        required_stock = total_predicted * 1.2
+        avg_daily = total_predicted.clip(lower=0) / days_ahead
+
+        summary['varian'] = text_values(summary['varian'])
+        summary['predicted_demand'] = total_predicted.round(2)
+        summary['recommended_order'] = required_stock.clip(lower=0).round().astype(int)
+        summary['urgency'] = np.select([avg_daily >= 10, avg_daily >= 5], ['High', 'Medium'], 'Low')
+        summary['required_stock'] = required_stock
+        return summary
+
+    def get_restock_recommendations(self, days_ahead=30):
+        try:
+            forecast = self.predict_all(days_ahead)
+            if forecast.empty:
                 return []
-            
-            recommendations = []
-            
-            for _, product in products_df.iterrows():
-                product_id = product['id']
-                current_stock = 0
-                min_stock = 0
-                
-                predictions, _ = self.predict_demand(product_id, 30)
-                if not predictions:
-                    continue
-                
-                total_predicted = sum(p['predicted_demand'] for p in predictions)
-                
-                safety_stock = total_predicted * 0.2
-                
-                required_stock = total_predicted + safety_stock
-                recommended_order = max(0, required_stock)
-                
-                if required_stock > 0:
-                    avg_daily = total_predicted / 30 if total_predicted > 0 else 0
-                    if avg_daily >= 10:
-                        urgency = 'High'
-                    elif avg_daily >= 5:
-                        urgency = 'Medium'
-                    else:
-                        urgency = 'Low'
-                    
-                    method = predictions[0].get('method', 'unknown')
-                    confidence = predictions[0].get('confidence', 'medium')
-                    
-                    recommendations.append({
-                        'product_id': product_id,
-                        'nama_produk': product['nama_produk'],
-                        'varian': product.get('varian', ''),
-                        'predicted_demand_30days': round(total_predicted, 2),
-                        'recommended_order': round(recommended_order),
-                        'confidence': confidence,
-                        'method': method,
-                        'urgency': urgency
-                    })
+
+            summary = self._restock_summary(forecast, days_ahead)
+            summary = summary[summary['required_stock'] > 0]
+            recommendations = [
+                {
+                    'product_id': product.product_id,
+                    'nama_produk': product.nama_produk,
+                    'varian': product.varian,
+                    'predicted_demand_30days': product.predicted_demand,
+                    'recommended_order': product.recommended_order,
+                    'confidence': product.confidence,
+                    'method': product.method,
+                    'urgency': product.urgency
+                }
+                for product in summary.itertuples(index=False)
+            ]
             
             urgency_order = {'High': 0, 'Medium': 1, 'Low': 2}
             return sorted(recommendations, 
@@ -291,23 +642,81 @@ class SalesPredictor:
         except Exception as e:
             print(f"Error in get_restock_recommendations: {e}")
             return []
+
+    def refresh_restock_recommendations(self, days_ahead=30, workers=None, force=False):
+        """Hitung ulang rekomendasi restock tersimpan untuk produk yang usang.
+
+        Produk dianggap usang bila belum ada di tabel restock_recommendations,
+        dihitung dengan horizon lain, atau watermark penjualannya berubah sejak
+        terakhir dihitung. `force=True` menghitung ulang semua produk.
+        """
+        started = time.perf_counter()
+        products_df = self.db.get_products()
+        if products_df is None or products_df.empty:
+            return {'products': 0, 'refreshed': 0, 'saved': True, 'seconds': 0.0}
+        product_ids = products_df['id'].tolist()
+        watermarks = self._sales_watermarks(product_ids)
+
+        stored = {}
+        snapshot = self.db.get_restock_snapshot()
+        if not snapshot.empty:
+            for product_id, horizon, max_id, count in zip(
+                snapshot['product_id'], snapshot['days_ahead'],
+                snapshot['watermark_max_id'], snapshot['watermark_count'],
+            ):
+                watermark = None if pd.isna(max_id) else (int(max_id), int(count))
+                stored[int(product_id)] = (int(horizon), watermark)
+
+        stale_ids = [
+            product_id for product_id in product_ids
+            if force or stored.get(product_id) != (days_ahead, watermarks.get(product_id))
+        ]
+        saved = True
+        if stale_ids:
+            forecast = self.predict_all(days_ahead, product_ids=stale_ids, workers=workers)
+            summary = self._restock_summary(forecast, days_ahead)
+            computed_at = datetime.now().replace(microsecond=0)
+            rows = []
+            for product in summary.itertuples(index=False):
+                watermark = watermarks.get(product.product_id) or (None, None)
+                rows.append({
+                    'product_id': product.product_id,
+                    'days_ahead': days_ahead,
+                    'predicted_demand': product.predicted_demand,
+                    'recommended_order': product.recommended_order,
+                    'urgency': product.urgency,
+                    'method': product.method,
+                    'confidence': product.confidence,
+                    'watermark_max_id': watermark[0],
+                    'watermark_count': watermark[1],
+                    'computed_at': computed_at,
+                })
+            saved = self.db.save_restock_recommendations(rows)
+
+        return {
+            'products': len(product_ids),
+            'refreshed': len(stale_ids),
+            'saved': saved,
+            'seconds': round(time.perf_counter() - started, 2),
+        }
     
-    def create_sales_chart(self, product_id, days_ahead=30):
+    def create_sales_chart(self, product_id, days_ahead=30, predictions=None):
+        """Grafik riwayat 90 hari dan prediksi; `predictions` dari predict_sales dipakai ulang bila diberikan"""
         try:
             hist_data = self.db.get_sales_history(product_id=product_id, days_back=90)
             if hist_data is None or hist_data.empty:
                 return None
                 
-            predictions, _, _ = self.predict_sales(product_id, days_ahead)  # Mengambil 3 return values
+            if predictions is None:
+                predictions, _, _ = self.predict_sales(product_id, days_ahead)
             if not predictions:
                 return None
                 
-            hist_data['tanggal'] = pd.to_datetime(hist_data['tanggal'])
-            hist_data = hist_data.sort_values('tanggal')
-            
             pred_df = pd.DataFrame(predictions)
             pred_df['tanggal'] = pd.to_datetime(pred_df['tanggal'])
             
+            import plotly.graph_objects as go
+
             fig = go.Figure()
             
             fig.add_trace(go.Scatter(
@@ -362,6 +771,7 @@ class SalesPredictor:
             if predictions and 'method' in predictions[0]:
                 method_map = {
                     'regresi_linear': 'Regresi Linear',
+                    'regresi_rekursif': 'Regresi Rekursif',
                     'rata_rata_bergerak': 'Rata-rata Bergerak',
                     'rata_rata_sederhana': 'Rata-rata Sederhana',
                     'fallback': 'Estimasi'
@@ -374,7 +784,7 @@ class SalesPredictor:
                     y=1.08,
                     xref='paper',
                     yref='paper',
-                    text=f"Metode: {method_map.get(method.split('_')[0], method)} | "
+                    text=f"Metode: {method_map.get(method, method_map.get(method.split('_')[0], method))} | "
                          f"Tingkat Kepercayaan: {confidence.capitalize()}",
                     showarrow=False,
                     font=dict(size=12, color='gray')
@@ -392,11 +802,8 @@ class SalesPredictor:
             if sales_df is None or sales_df.empty:
                 return None
                 
-            sales_df['tanggal'] = pd.to_datetime(sales_df['tanggal'])
-            sales_df['tanggal'] = pd.to_datetime(sales_df['tanggal'])
-            
-            sales_df['year_month'] = sales_df['tanggal'].dt.strftime('%Y-%m')
-            monthly_trends = sales_df.groupby('year_month')['jumlah'].sum().reset_index()
+            year_month = sales_df['tanggal'].dt.to_period('M').astype(str).rename('year_month')
+            monthly_trends = sales_df.groupby(year_month)['jumlah'].sum().reset_index()
             
             top_products = sales_df.groupby('product_id')['jumlah'].sum().nlargest(5)
             
@@ -0,0 +1,185 @@
+import copy
+import functools
+import sys
+import threading
+import time
+from collections import OrderedDict
+import pandas as pd
+
+
+def _freeze(value):
+    """Ubah argumen menjadi bentuk hashable untuk kunci cache"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = tuple(_freeze(v) for v in value)
+        return tuple(sorted(items, key=repr)) if isinstance(value, (set, frozenset)) else items
+    return value
+
+
+def _copy(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    if isinstance(value, (dict, list)):
+        return copy.deepcopy(value)
+    return value
+
+
+def _size_of(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_size_of(k) + _size_of(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_size_of(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def _cacheable(value):
+    # Method DatabaseManager mengembalikan None/False/DataFrame (atau objek
+    # dengan `.empty`) kosong saat gagal; hasil seperti itu tidak disimpan
+    # agar error tidak ikut di-cache
+    if value is None or value is False:
+        return False
+    if isinstance(value, pd.DataFrame) or hasattr(value, 'empty'):
+        return not value.empty
+    return True
+
+
+class QueryCache:
+    """Cache hasil query bersama (read-through) dengan TTL dan eviction LRU.
+
+    Kunci berupa (nama query, parameter). Tiap entri mencatat tabel
+    sumbernya sehingga method tulis cukup memanggil `invalidate('sales')`.
+    Nilai dikembalikan sebagai salinan agar pemanggil bebas mengubahnya.
+    """
+
+    def __init__(self, ttl=300, max_entries=256, max_bytes=256 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # key -> (value, expires_at, tables, nbytes)
+        self._key_stats = OrderedDict()  # key -> [hits, misses]
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._generation = 0
+
+    def get_or_load(self, key, tables, loader):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._count(key, hit=True)
+                return _copy(entry[0])
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            self._count(key, hit=False)
+            generation = self._generation
+
+        value = loader()
+        if self.ttl > 0 and _cacheable(value):
+            self._put(key, frozenset(tables), value, generation)
+        return _copy(value)
+
+    def _put(self, key, tables, value, generation):
+        nbytes = _size_of(value)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            # Ada penulisan selama query berjalan: hasilnya mungkin sudah usang
+            if generation != self._generation:
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl, tables, nbytes)
+            self._bytes += nbytes
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry[3]
+
+    def _count(self, key, hit):
+        counts = self._key_stats.get(key)
+        if counts is None:
+            counts = self._key_stats[key] = [0, 0]
+            # Statistik per kunci ikut dibatasi agar tidak tumbuh tanpa batas
+            while len(self._key_stats) > self.max_entries * 4:
+                self._key_stats.popitem(last=False)
+        counts[0 if hit else 1] += 1
+
+    def invalidate(self, *tables):
+        """Buang entri yang bergantung pada `tables`, atau semua entri bila kosong"""
+        with self._lock:
+            self._generation += 1
+            if not tables:
+                keys = list(self._entries)
+            else:
+                tables = set(tables)
+                keys = [k for k, entry in self._entries.items() if entry[2] & tables]
+            for k in keys:
+                self._drop(k)
+            self.invalidations += len(keys)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def key_stats(self):
+        """Statistik per kunci: hit rate, ukuran memori dan sisa TTL"""
+        now = time.monotonic()
+        with self._lock:
+            rows = []
+            for key, (hits, misses) in self._key_stats.items():
+                entry = self._entries.get(key)
+                rows.append({
+                    'query': key[0],
+                    'params': repr(key[1:]) if len(key) > 1 else '',
+                    'hits': hits,
+                    'misses': misses,
+                    'hit_rate': hits / (hits + misses),
+                    'bytes': entry[3] if entry else 0,
+                    'ttl_left': max(entry[1] - now, 0.0) if entry else 0.0,
+                    'tables': ', '.join(sorted(entry[2])) if entry else '',
+                })
+            return rows
+
+
+def cached_query(*tables):
+    """Dekorator method DatabaseManager: hasil di-cache per (nama method, argumen).
+
+    `tables` adalah tabel sumber query, dipakai untuk invalidasi saat ada penulisan.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            cache = getattr(self, 'query_cache', None)
+            if cache is None:
+                return method(self, *args, **kwargs)
+            key = (method.__name__, _freeze(args), _freeze(kwargs))
+            return cache.get_or_load(key, tables, lambda: method(self, *args, **kwargs))
+        return wrapper
+    return decorator
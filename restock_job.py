@@ -0,0 +1,84 @@
+import threading
+from datetime import datetime
+from config import ACTIVE_CONFIG
+
+
+class RestockJob:
+    """Job latar untuk menghitung ulang rekomendasi restock.
+
+    Perhitungan berjalan di thread terpisah sehingga rerun Streamlit tidak
+    menunggu; fitting model memakai thread pool sebanyak `workers`
+    (default ACTIVE_CONFIG['restock_workers']). Halaman cukup membaca
+    snapshot dari tabel restock_recommendations.
+    """
+
+    def __init__(self, predictor, days_ahead=30, workers=None, interval=None):
+        self.predictor = predictor
+        self.days_ahead = days_ahead
+        self.workers = ACTIVE_CONFIG.get('restock_workers', 0) if workers is None else workers
+        self.interval = ACTIVE_CONFIG.get('restock_interval', 0) if interval is None else interval
+        self._lock = threading.Lock()
+        self._thread = None
+        self._scheduler = None
+        self._stop = threading.Event()
+        self.started_at = None
+        self.finished_at = None
+        self.last_result = None
+        self.last_error = None
+
+    def trigger(self, force=False):
+        """Mulai perhitungan ulang di latar; False bila job masih berjalan"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._thread = threading.Thread(target=self._run, args=(force,), name='restock-job', daemon=True)
+            self.started_at = datetime.now()
+            self._thread.start()
+            return True
+
+    def _run(self, force):
+        try:
+            # Job bisa berjalan tanpa sesi aktif; ambil perubahan tabel dari replika lain
+            poll = getattr(self.predictor.db, 'poll_table_versions', None)
+            if poll is not None:
+                poll()
+            result = self.predictor.refresh_restock_recommendations(
+                self.days_ahead, workers=self.workers, force=force
+            )
+            self.last_result, self.last_error = result, None
+        except Exception as e:
+            print(f"Error in restock job: {e}")
+            self.last_error = str(e)
+        finally:
+            self.finished_at = datetime.now()
+
+    def start_schedule(self):
+        """Jalankan refresh setiap `interval` detik (0 = hanya manual).
+
+        Run pertama baru setelah satu interval agar startup aplikasi tetap
+        ringan; sebelum itu halaman Rekomendasi Restock memicu job sendiri
+        bila belum ada snapshot.
+        """
+        if self.interval <= 0 or self._scheduler is not None:
+            return
+        self._scheduler = threading.Thread(target=self._schedule, name='restock-scheduler', daemon=True)
+        self._scheduler.start()
+
+    def _schedule(self):
+        while not self._stop.wait(self.interval):
+            self.trigger()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        running = self._thread is not None and self._thread.is_alive()
+        return {
+            'running': running,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'last_result': self.last_result,
+            'last_error': self.last_error,
+            'interval': self.interval,
+            'workers': self.workers,
+        }
@@ -0,0 +1,33 @@
+"""Ekspor streaming ke Parquet dengan skema yang ditetapkan di awal."""
+from datetime import date
+import pandas as pd
+import exporter
+from database import FRAME_DTYPES
+
+
+def test_parquet_null_first_batch(tmp_path):
+    columns = ['tanggal', 'product_id', 'nama_produk', 'varian', 'jumlah', 'total_harga']
+    batches = [
+        [(date(2024, 1, 2), 1, 'Pengki', None, 1.0, 15000)],
+        [(date(2024, 1, 1), 2, 'Semen', '40kg', 2.5, 125000)],
+    ]
+    path = tmp_path / 'penjualan.parquet'
+    exporter.write_batches(iter(batches), columns, 'parquet', str(path), FRAME_DTYPES)
+
+    df = pd.read_parquet(path)
+    assert df['varian'].isna().tolist() == [True, False] and df['varian'][1] == '40kg'
+    assert str(df['tanggal'].dtype).startswith('datetime64')
+    assert df['product_id'].dtype == 'int32'
+
+
+def test_parquet_export_frame_keeps_dtypes(tmp_path, monkeypatch):
+    monkeypatch.setattr(exporter, 'EXPORT_DIR', str(tmp_path))
+    frame = pd.DataFrame({
+        'varian': pd.Categorical([None, 'x']),
+        'total': [1.5, 2.0],
+        'tanggal': pd.to_datetime(['2024-01-01', '2024-01-02']),
+    })
+    df = pd.read_parquet(exporter.export_frame(frame, 'parquet'))
+    assert df['varian'].isna().tolist() == [True, False] and df['varian'][1] == 'x'
+    assert df['total'].tolist() == [1.5, 2.0]
+    assert df['tanggal'].tolist() == frame['tanggal'].tolist()
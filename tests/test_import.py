@@ -0,0 +1,54 @@
+"""Import penjualan dari CSV lewat DatabaseManager.import_excel_data."""
+import io
+import pytest
+from config import SQLITE_CONFIG
+from database import DatabaseManager
+
+HEADER = b"Tanggal,Produk,Varian,Jumlah,Jenis,Harga\n"
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager({**SQLITE_CONFIG, 'sqlite_path': str(tmp_path / 'import.db'), 'query_cache_ttl': 0, 'metrics_enabled': False})
+    db.create_database_and_tables()
+    db.run_migrations()
+    yield db
+    db.pool.dispose()
+
+
+def _import(db, body, **kwargs):
+    return db.import_excel_data(io.BytesIO(HEADER + body), 'penjualan.csv', **kwargs)
+
+
+def test_import_blank_varian_column(db):
+    stats = _import(db, (
+        b"2024-01-01,Pengki,,2,Alat,15000\n"
+        b"2024-01-02,Pengki,,1,Alat,15000\n"
+        b"2024-01-02,Sapu,,3,Alat,12000\n"
+    ))
+    assert stats and stats['rows'] == 3 and stats['new_products'] == 2
+    products = db.get_products()
+    assert products['varian'].isna().all()
+    assert len(db.get_sales_data()) == 3
+
+
+def test_import_blank_varian_chunk_after_filled_chunk(db):
+    # Potongan kedua hanya berisi Varian kosong
+    stats = _import(db, (
+        b"2024-01-01,Semen,40kg,2,Bahan,50000\n"
+        b"2024-01-02,Pengki,,1,Alat,15000\n"
+        b"2024-01-03,Pengki,,4,Alat,15000\n"
+    ), chunk_size=1)
+    assert stats and stats['rows'] == 3 and stats['unmatched'] == []
+    assert sorted(db.get_products()['nama_produk'].astype(str)) == ['Pengki', 'Semen']
+
+
+def test_import_resolves_many_new_products(db):
+    from database import IMPORT_LOOKUP_BATCH
+
+    count = IMPORT_LOOKUP_BATCH + 50
+    body = b"".join(f"2024-01-01,Produk {i},V{i % 3},1,Bahan,{1000 + i}\n".encode() for i in range(count))
+    stats = _import(db, body)
+    assert stats and stats['rows'] == count and stats['new_products'] == count and stats['unmatched'] == []
+    sales = db.get_sales_data()
+    assert sales['product_id'].nunique() == count
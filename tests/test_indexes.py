@@ -0,0 +1,26 @@
+"""Query utama (HOT_QUERIES) harus memakai index dari MIGRATIONS, bukan full scan."""
+import pytest
+from config import SQLITE_CONFIG
+from database import HOT_QUERIES, DatabaseManager
+
+
+@pytest.fixture(scope='module')
+def db(tmp_path_factory):
+    path = tmp_path_factory.mktemp('db') / 'indexes.db'
+    db = DatabaseManager({**SQLITE_CONFIG, 'sqlite_path': str(path), 'query_cache_ttl': 0, 'metrics_enabled': False})
+    db.create_database_and_tables()
+    db.run_migrations()
+    yield db
+    db.pool.dispose()
+
+
+@pytest.fixture(scope='module')
+def explained(db):
+    return db.explain_hot_queries()
+
+
+@pytest.mark.parametrize('name', sorted(HOT_QUERIES))
+def test_hot_query_uses_index(explained, name):
+    assert name in explained, f"EXPLAIN {name} gagal dijalankan"
+    index, ok = explained[name]
+    assert ok, f"{name} memakai {index!r}, diharapkan salah satu dari {sorted(HOT_QUERIES[name][2])}"
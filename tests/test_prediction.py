@@ -0,0 +1,18 @@
+"""Pemilihan model pada mode 'recursive' (deret harian)."""
+import numpy as np
+import pandas as pd
+from prediction import MIN_TRAINING_ROWS, _fit_daily_series
+
+
+def test_sparse_sales_fall_back_to_average():
+    # Dua penjualan berjarak 60 hari: deret padat 61 hari, tetapi hanya 2 hari berisi
+    tanggal = np.array(['2024-01-01', '2024-03-01'], dtype='datetime64[ns]')
+    fitted = _fit_daily_series(tanggal, np.array([5.0, 3.0]))
+    assert fitted.method == 'rata_rata_sederhana'
+    assert fitted.average == round(8.0 / 61, 2)
+
+
+def test_threshold_counts_sales_days():
+    tanggal = pd.date_range('2024-01-01', periods=MIN_TRAINING_ROWS, freq='3D').to_numpy()
+    assert _fit_daily_series(tanggal[:-1], np.ones(MIN_TRAINING_ROWS - 1)).method == 'rata_rata_sederhana'
+    assert _fit_daily_series(tanggal, np.ones(MIN_TRAINING_ROWS)).method == 'regresi_rekursif'
@@ -0,0 +1,28 @@
+"""Hasil query yang gagal tidak boleh disimpan di QueryCache."""
+import pytest
+from mysql.connector import errors
+from config import SQLITE_CONFIG
+from database import DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager({**SQLITE_CONFIG, 'sqlite_path': str(tmp_path / 'cache.db'), 'query_cache_ttl': 3600, 'metrics_enabled': False})
+    db.create_database_and_tables()
+    db.run_migrations()
+    yield db
+    db.pool.dispose()
+
+
+@pytest.mark.parametrize('method', ['count_products', 'count_sales', 'revenue_total'])
+def test_failed_scalar_is_not_cached(db, monkeypatch, method):
+    acquire = db.pool.acquire
+
+    def fail():
+        raise errors.OperationalError(msg="koneksi terputus")
+
+    monkeypatch.setattr(db.pool, 'acquire', fail)
+    assert getattr(db, method)() is None
+
+    monkeypatch.setattr(db.pool, 'acquire', acquire)
+    assert getattr(db, method)() == 0